@@ -0,0 +1,152 @@
+"""
+Benchmark the startup time of the `d2b` command line interface.
+
+`d2b` is often called in shell loops or from editor integrations, so
+the time until the first line of output matters. This script measures
+(in fresh interpreters) how long it takes to import `doi2bibtex.cli`
+and to run `d2b --version`, subtracts the startup time of a bare
+Python interpreter, and checks the result against a budget.
+
+Usage:
+    python benchmarks/import_time.py [--runs N] [--budget-ms MS]
+
+The exit code is 1 if the median exceeds the budget, or if any of the
+heavy dependencies are imported without being needed.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from argparse import ArgumentParser, Namespace
+from typing import List
+
+import statistics
+import subprocess
+import sys
+import time
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+# Dependencies that should only be imported by the code paths that use them
+HEAVY_MODULES = [
+    "bibtexparser",
+    "bs4",
+    "httpx",
+    "isbnlib",
+    "pylatexenc",
+    "requests",
+    "rich",
+    "unidecode",
+    "yaml",
+]
+
+# The code snippets whose startup time we measure
+SNIPPETS = {
+    "python": "pass",
+    "import": "import doi2bibtex.cli",
+    "version": (
+        "import sys; sys.argv = ['d2b', '--version']; "
+        "from doi2bibtex.cli import main; main()"
+    ),
+}
+
+
+def parse_cli_args() -> Namespace:
+    """
+    Parse the command line arguments.
+    """
+
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=20,
+        help="Number of runs for each measurement.",
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=150,
+        help="Maximum median time (in ms) on top of a bare interpreter.",
+    )
+    return parser.parse_args()
+
+
+def measure(code: str, runs: int) -> List[float]:
+    """
+    Run the given `code` in `runs` fresh interpreters and return the
+    wall-clock times (in milliseconds).
+    """
+
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        times.append((time.perf_counter() - start) * 1000)
+
+    return times
+
+
+def get_imported_heavy_modules() -> List[str]:
+    """
+    Return the heavy modules that are imported by `doi2bibtex.cli`.
+    """
+
+    code = (
+        "import sys, doi2bibtex.cli; "
+        "print(' '.join(sorted(set(_.split('.')[0] for _ in sys.modules))))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+    return [_ for _ in HEAVY_MODULES if _ in output.split()]
+
+
+# -----------------------------------------------------------------------------
+# MAIN CODE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    args = parse_cli_args()
+
+    # Measure the startup times; the first run of every snippet is a warmup
+    # (e.g., to populate the `__pycache__` directories)
+    results = {}
+    for name, code in SNIPPETS.items():
+        measure(code, runs=1)
+        results[name] = measure(code, runs=args.runs)
+
+    # Report the median and the best time for every snippet
+    baseline = statistics.median(results["python"])
+    print(f"{'':<10}{'median':>10}{'min':>10}{'overhead':>10}")
+    for name, times in results.items():
+        median = statistics.median(times)
+        print(
+            f"{name:<10}{median:>8.1f}ms{min(times):>8.1f}ms"
+            f"{median - baseline:>8.1f}ms"
+        )
+
+    # Check the budget and the heavy modules
+    failed = False
+    overhead = statistics.median(results["version"]) - baseline
+    if overhead > args.budget_ms:
+        print(f"\n`d2b --version` exceeds the budget of {args.budget_ms}ms!")
+        failed = True
+    if heavy_modules := get_imported_heavy_modules():
+        print(f"\nImported heavy modules: {', '.join(heavy_modules)}")
+        failed = True
+
+    sys.exit(1 if failed else 0)
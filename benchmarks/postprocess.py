@@ -0,0 +1,230 @@
+"""
+Benchmark the post-processing of BibTeX entries.
+
+This compares the compiled post-processing pipeline (see `process.py`)
+with the previous implementation, which checked every option of the
+configuration (and re-read `remove_fields`) for every single entry.
+Both are run on the same synthetic corpus (without any network access,
+i.e., without `resolve_adsurl` and `crossmatch_with_dblp`), and the
+results are checked to be identical.
+
+Usage:
+    python benchmarks/postprocess.py [--entries N] [--runs N]
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from argparse import ArgumentParser, Namespace
+from copy import deepcopy
+from pathlib import Path
+from typing import Callable, List
+from unittest.mock import patch
+
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from doi2bibtex.config import Configuration  # noqa: E402
+from doi2bibtex import process  # noqa: E402
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+def parse_cli_args() -> Namespace:
+    """
+    Parse the command line arguments.
+    """
+
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--entries",
+        type=int,
+        default=100_000,
+        help="Number of (synthetic) BibTeX entries.",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=1,
+        help="Number of runs for each implementation.",
+    )
+    return parser.parse_args()
+
+
+def make_corpus(n_entries: int, seed: int = 42) -> List[dict]:
+    """
+    Create a synthetic corpus of BibTeX entries (as dicts).
+    """
+
+    rng = random.Random(seed)
+    lastnames = ["M{\\\"u}ller", "Smith", "de la Cruz", "García", "Li"]
+    firstnames = ["Anna", "B.", "Carlos", "D. E.", "Fang"]
+    titles = [
+        "On the {{Theory}} of Things, Part {}",
+        "Deep learning for gravitational-wave detection: Paper {}",
+        "A survey of exoplanet atmospheres, volume {}",
+        "Results from the first {} years of observations",
+    ]
+    journals = [
+        "Physical Review D",
+        "Nature",
+        "Astronomy {\\&}amp$\\mathsemicolon$ Astrophysics",
+    ]
+
+    corpus = []
+    for i in range(n_entries):
+        n_authors = rng.choice([1, 2, 3, 5, 8, 40])
+        authors = " and ".join(
+            f"{rng.choice(firstnames)} {rng.choice(lastnames)}"
+            for _ in range(n_authors)
+        )
+        entry = {
+            "ENTRYTYPE": rng.choice(["article", "article", "book", "misc"]),
+            "ID": f"entry{i}",
+            "author": authors,
+            "title": rng.choice(titles).format(i),
+            "journal": rng.choice(journals),
+            "year": str(rng.randint(1990, 2024)),
+            "month": rng.choice(["jan", "feb", "mar", "sep", "dec"]),
+            "pages": "160â€“175",
+            "doi": f"10.1000/xyz.{i}",
+            "url": f"https://doi.org/10.1000%2Fxyz.{i}",
+            "publisher": "Some Publisher",
+            "abstract": "Lorem ipsum dolor sit amet. " * 10,
+        }
+        corpus.append(entry)
+
+    return corpus
+
+
+def postprocess_bibtex_branching(
+    bibtex_dict: dict,
+    identifier: str,
+    config: Configuration,
+) -> dict:
+    """
+    The previous implementation of `postprocess_bibtex()`, which checks
+    every option for every entry (without the network-based steps).
+    """
+
+    bibtex_dict = process.fix_broken_ampersand(bibtex_dict)
+    bibtex_dict = process.fix_broken_pagenumbers(bibtex_dict)
+    if config.convert_latex_chars:
+        bibtex_dict = process.convert_latex_chars(bibtex_dict)
+    if config.fix_arxiv_entrytype:
+        bibtex_dict = process.fix_arxiv_entrytype(bibtex_dict, identifier)
+    if config.abbreviate_journal_names:
+        bibtex_dict = process.abbreviate_journal_name(bibtex_dict)
+    if config.generate_citekey:
+        bibtex_dict = process.generate_citekey(bibtex_dict)
+    authors_list = bibtex_dict["author"].split(" and ")
+    et_al = ""
+    if len(authors_list) > config.limit_authors:
+        authors_list = authors_list[:config.limit_authors]
+        et_al = " and others"
+    bibtex_dict["author"] = " and ".join(authors_list) + et_al
+    if config.format_author_names:
+        bibtex_dict = process.format_author_names(bibtex_dict)
+    if config.convert_month_to_number:
+        bibtex_dict = process.convert_month_to_number(bibtex_dict)
+    if config.remove_fields:
+        for field in config.remove_fields.get("all", []):
+            if field in bibtex_dict:
+                del bibtex_dict[field]
+        for field in config.remove_fields.get(bibtex_dict["ENTRYTYPE"], []):
+            if field in bibtex_dict:
+                del bibtex_dict[field]
+    if config.remove_url_if_doi:
+        bibtex_dict = process.remove_url_if_doi(bibtex_dict)
+
+    return bibtex_dict
+
+
+def run(
+    postprocess: Callable[[dict, str, Configuration], dict],
+    corpus: List[dict],
+    config: Configuration,
+) -> List[dict]:
+    """
+    Post-process all entries of the `corpus` with the given function.
+    """
+
+    return [postprocess(entry, entry["doi"], config) for entry in corpus]
+
+
+def uncached_latex_to_unicode(text: str) -> str:
+    """
+    The previous version of `latex_to_unicode()`, which created a new
+    `LatexNodes2Text` instance for every string.
+    """
+
+    from pylatexenc.latex2text import LatexNodes2Text
+
+    return str(LatexNodes2Text(math_mode='verbatim').latex_to_text(text))
+
+
+# -----------------------------------------------------------------------------
+# MAIN CODE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    args = parse_cli_args()
+
+    # Use the default configuration without the steps that need network
+    with patch.object(Path, "exists", lambda _: False):
+        config = Configuration()
+    config.resolve_adsurl = False
+    config.crossmatch_with_dblp = False
+    config.limit_authors = 10
+    config.remove_fields = {
+        "all": ["abstract", "keywords", "file"],
+        "article": ["publisher", "issn"],
+        "book": ["isbn"],
+    }
+
+    print(f"Creating a corpus of {args.entries:,} entries...", flush=True)
+    corpus = make_corpus(args.entries)
+
+    # Time both implementations on fresh copies of the corpus
+    times: dict = {"branching": [], "compiled": []}
+    results: dict = {}
+    for _ in range(args.runs):
+        for name in times:
+            entries = deepcopy(corpus)
+            start = time.perf_counter()
+            if name == "branching":
+                with patch.object(
+                    process, "latex_to_unicode", uncached_latex_to_unicode
+                ):
+                    results[name] = run(
+                        postprocess_bibtex_branching, entries, config
+                    )
+            else:
+                results[name] = run(
+                    process.postprocess_bibtex, entries, config
+                )
+            times[name].append(time.perf_counter() - start)
+
+    # Both implementations must give the same results
+    if results["branching"] != results["compiled"]:
+        print("The results of the two implementations differ!")
+        sys.exit(1)
+
+    # Report the median time and the throughput
+    print(f"{'':<12}{'median':>10}{'entries/s':>12}")
+    for name, values in times.items():
+        median = statistics.median(values)
+        print(f"{name:<12}{median:>9.2f}s{args.entries / median:>12,.0f}")
+    speedup = (
+        statistics.median(times["branching"])
+        / statistics.median(times["compiled"])
+    )
+    print(f"Speedup: {speedup:.2f}x")
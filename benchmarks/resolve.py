@@ -0,0 +1,566 @@
+"""
+Benchmark resolving identifiers end-to-end, without any network access.
+
+All requests to Crossref, arxiv2bibtex, ADS, dblp and Google Books are
+sent to a local server (via the `base_urls` option) that replays the
+responses in `benchmarks/fixtures/`. These are copies of real responses
+of the different APIs, with placeholders (e.g., `<IDENTIFIER>`), so that
+the server can answer for any (synthetic) identifier. The server adds a
+random latency to every response and, optionally, answers a fraction of
+the requests with an error, so that retries are exercised as well.
+
+Three workloads are measured:
+    single:      resolve a mix of DOIs, arXiv IDs, ADS bibcodes and
+                 ISBNs one by one (`resolve_identifier()`)
+    batch:       resolve the same mix in batches (`resolve_identifiers()`)
+    enrichment:  resolve DOIs and arXiv IDs one by one, with `adsurl`
+                 and the cross-match with dblp enabled
+
+For every workload, the throughput (identifiers per second) and the
+p50 / p95 / p99 latency (per identifier, or per batch) are reported.
+
+Usage:
+    python benchmarks/resolve.py [--identifiers N] [--latency MS]
+        [--error-rate P] [--jobs N] [--batch-size N] [--authors N]
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from argparse import ArgumentParser, Namespace
+from copy import copy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Callable, Dict, List, Tuple
+from unittest.mock import patch
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from doi2bibtex.config import Configuration  # noqa: E402
+from doi2bibtex.resolve import (  # noqa: E402
+    make_result,
+    resolve_identifier,
+    resolve_identifiers,
+)
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# The base URLs of the backends, and the path prefix that replaces them
+SERVICES = {
+    "https://api.adsabs.harvard.edu": "ads",
+    "https://api.crossref.org": "crossref",
+    "https://arxiv2bibtex.org": "arxiv2bibtex",
+    "https://dblp.org": "dblp",
+    "https://openlibrary.org": "open_library",
+    "https://www.googleapis.com": "google_books",
+}
+
+# Names for the synthetic author lists (with some LaTeX-encoded characters,
+# so that `convert_latex_chars` has something to do)
+FIRSTNAMES = ["Anna", "B. P.", "Carlos", "Diederik P.", "Fang", "Max"]
+LASTNAMES = ["Abbott", "Garc{\\'\\i}a", "Kingma", "M{\\\"u}ller", "Welling"]
+
+
+def parse_cli_args() -> Namespace:
+    """
+    Parse the command line arguments.
+    """
+
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--identifiers",
+        type=int,
+        default=200,
+        help="Number of identifiers for each workload.",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=20.0,
+        help="Median latency (in ms) of the responses of the local server.",
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of the requests that are answered with an error.",
+    )
+    parser.add_argument(
+        "--error-status",
+        type=int,
+        default=503,
+        help="HTTP status code of the injected errors.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=8,
+        help="Number of workers for the batch workload.",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Number of identifiers per batch for the batch workload.",
+    )
+    parser.add_argument(
+        "--authors",
+        type=int,
+        default=10,
+        help="Number of authors of every entry.",
+    )
+    parser.add_argument(
+        "--workloads",
+        nargs="+",
+        choices=["single", "batch", "enrichment"],
+        default=["single", "batch", "enrichment"],
+        help="Workloads to run.",
+    )
+    parser.add_argument(
+        "--isbn-backends",
+        nargs="+",
+        choices=["google-books", "open-library"],
+        default=["google-books"],
+        help="Backends for ISBNs (see the `isbn_backends` option).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Seed for the latencies and the injected errors.",
+    )
+    return parser.parse_args()
+
+
+def fill(template: str, **values: str) -> str:
+    """
+    Replace the placeholders (e.g., `<IDENTIFIER>`) in a fixture.
+    """
+
+    for key, value in values.items():
+        template = template.replace(f"<{key.upper()}>", value)
+
+    return template
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """
+    A local stand-in for all backends, which answers every request with
+    the matching fixture (after a random delay), or with an error.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, args: Namespace) -> None:
+
+        super().__init__(("127.0.0.1", 0), FixtureRequestHandler)
+
+        self.latency = args.latency / 1000
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.n_authors = args.authors
+        self.rng = random.Random(args.seed)
+        self.lock = Lock()
+        self.n_requests: Dict[str, int] = {}
+
+        self.fixtures = {
+            _.name: _.read_text(encoding="utf-8")
+            for _ in FIXTURES_DIR.iterdir()
+        }
+
+    @property
+    def base_urls(self) -> Dict[str, str]:
+        """
+        The `base_urls` option that sends all requests to this server.
+        """
+
+        port = self.server_address[1]
+        return {
+            base_url: f"http://127.0.0.1:{port}/{service}"
+            for base_url, service in SERVICES.items()
+        }
+
+    def make_entry_values(self, identifier: str) -> Dict[str, str]:
+        """
+        Get the (deterministic) synthetic values for the placeholders
+        of the entry for the given `identifier`.
+        """
+
+        rng = random.Random(identifier)
+        authors = [
+            (rng.choice(FIRSTNAMES), rng.choice(LASTNAMES))
+            for _ in range(self.n_authors)
+        ]
+        return {
+            "identifier": identifier,
+            "title": f"On the {rng.choice(['Theory', 'Practice'])} of "
+            f"Things, Part {rng.randint(1, 9999)}",
+            "year": str(rng.randint(1990, 2024)),
+            "authors": " and ".join(f"{f} {last}" for f, last in authors),
+            "ads_authors": " and ".join(
+                f"{{{last}}}, {f}" for f, last in authors
+            ),
+            "json_authors": json.dumps([f"{f} {last}" for f, last in authors]),
+        }
+
+    def respond(
+        self,
+        method: str,
+        path: str,
+        body: bytes,
+    ) -> Tuple[int, str]:
+        """
+        Get the status code and the text of the response to a request.
+        """
+
+        service, _, rest = path.lstrip("/").partition("/")
+        url = urlsplit("/" + rest)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        with self.lock:
+            self.n_requests[service] = self.n_requests.get(service, 0) + 1
+            delay = self.latency * self.rng.lognormvariate(0, 0.5)
+            is_error = self.rng.random() < self.error_rate
+        time.sleep(delay)
+        if is_error:
+            return self.error_status, ""
+
+        handlers: Dict[str, Callable[[str, dict, bytes], Tuple[int, str]]]
+        handlers = {
+            "ads": self.ads,
+            "arxiv2bibtex": self.arxiv2bibtex,
+            "crossref": self.crossref,
+            "dblp": self.dblp,
+            "google_books": self.google_books,
+            "open_library": self.open_library,
+        }
+        if service not in handlers:
+            return 404, ""
+
+        return handlers[service](url.path, query, body)
+
+    def ads(self, path: str, query: dict, body: bytes) -> Tuple[int, str]:
+
+        # Search: find the bibcodes for one or more identifiers
+        if path == "/v1/search/query":
+            q = query.get("q", "")
+            identifiers = re.findall(r'"([^"]+)"', q) or [
+                q.replace("identifier:", "", 1)
+            ]
+            docs = [
+                json.loads(
+                    fill(
+                        self.fixtures["ads_search_doc.json"],
+                        identifier=_,
+                        bibcode=make_bibcode(_),
+                    )
+                )
+                for _ in identifiers
+            ]
+            return 200, json.dumps({"response": {"docs": docs}})
+
+        # Export: get the BibTeX entries for one or more bibcodes
+        if path == "/v1/export/bibtex":
+            bibcodes = json.loads(body)["bibcode"]
+            entries = []
+            for bibcode in bibcodes:
+                values = self.make_entry_values(bibcode)
+                values["authors"] = values["ads_authors"]
+                entries.append(
+                    fill(self.fixtures["ads_export.bib"], bibcode=bibcode,
+                         **values)
+                )
+            return 200, json.dumps(
+                {
+                    "msg": f"Retrieved {len(bibcodes)} abstracts, starting "
+                    "with number 1.",
+                    "export": "\n\n".join(entries) + "\n",
+                }
+            )
+
+        return 404, ""
+
+    def arxiv2bibtex(
+        self, path: str, query: dict, body: bytes
+    ) -> Tuple[int, str]:
+
+        values = self.make_entry_values(query.get("q", ""))
+        return 200, fill(self.fixtures["arxiv2bibtex.html"], **values)
+
+    def crossref(self, path: str, query: dict, body: bytes) -> Tuple[int, str]:
+
+        suffix = "/transform/application/x-bibtex"
+        if not path.startswith("/works/") or not path.endswith(suffix):
+            return 404, ""
+
+        doi = unquote(path[len("/works/"):-len(suffix)])
+        values = self.make_entry_values(doi)
+        return 200, fill(self.fixtures["crossref.bib"], **values)
+
+    def dblp(self, path: str, query: dict, body: bytes) -> Tuple[int, str]:
+
+        # The query is the last name of the first author and the title; we
+        # return a conference paper with exactly that title
+        title = query.get("q", "").partition(" ")[2]
+        hit = json.loads(
+            fill(self.fixtures["dblp_hit.json"], title=title, year="2014")
+        )
+        return 200, json.dumps(
+            {"result": {"hits": {"@total": "1", "hit": [hit]}}}
+        )
+
+    def google_books(
+        self, path: str, query: dict, body: bytes
+    ) -> Tuple[int, str]:
+
+        # The query is one or more ISBNs (e.g., "isbn:X OR isbn:Y")
+        items = []
+        for isbn in re.findall(r"isbn:(\w+)", query.get("q", "")):
+            values = self.make_entry_values(isbn)
+            values["authors"] = values["json_authors"]
+            volumes = json.loads(
+                fill(self.fixtures["google_books.json"], **values)
+            )
+            items += volumes["items"]
+        return 200, json.dumps(
+            {"kind": "books#volumes", "totalItems": len(items), "items": items}
+        )
+
+    def open_library(
+        self, path: str, query: dict, body: bytes
+    ) -> Tuple[int, str]:
+
+        # The books are returned under the requested `bibkeys`
+        books = {}
+        for bibkey in query.get("bibkeys", "").split(","):
+            values = self.make_entry_values(bibkey.replace("ISBN:", ""))
+            values["authors"] = json.dumps(
+                [{"name": _} for _ in json.loads(values["json_authors"])]
+            )
+            books[bibkey] = json.loads(
+                fill(self.fixtures["open_library.json"], **values)
+            )
+        return 200, json.dumps(books)
+
+
+class FixtureRequestHandler(BaseHTTPRequestHandler):
+    """
+    Pass all requests on to the `FixtureServer`.
+    """
+
+    # Keep connections alive (like the real APIs), and send the headers and
+    # the body without waiting for delayed ACKs (which take ~40 ms)
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: FixtureServer
+
+    def do_GET(self) -> None:
+        self.reply(*self.server.respond("GET", self.path, b""))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        self.reply(*self.server.respond("POST", self.path, body))
+
+    def reply(self, status: int, text: str) -> None:
+        content = text.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *_: object) -> None:
+        pass
+
+
+def make_bibcode(identifier: str) -> str:
+    """
+    Make a (deterministic) synthetic ADS bibcode for an identifier.
+    """
+
+    n = random.Random(identifier).randint(0, 9999)
+    return f"2020Bench{n:04d}L{n:04d}A"
+
+
+def make_isbn(i: int) -> str:
+    """
+    Make a valid (synthetic) ISBN-13.
+    """
+
+    digits = f"978{i:09d}"
+    total = sum(int(d) * (3 if j % 2 else 1) for j, d in enumerate(digits))
+    return digits + str((10 - total % 10) % 10)
+
+
+def make_identifiers(n: int, kinds: List[str], offset: int) -> List[str]:
+    """
+    Make `n` distinct identifiers, cycling through the given `kinds`.
+    """
+
+    identifiers = []
+    for i in range(offset, offset + n):
+        kind = kinds[i % len(kinds)]
+        if kind == "doi":
+            identifiers.append(f"10.5555/bench.{i}")
+        elif kind == "arxiv":
+            identifiers.append(f"2101.{i:05d}")
+        elif kind == "ads":
+            identifiers.append(f"2020Bench{i % 10000:04d}L{i % 10000:04d}A")
+        else:
+            identifiers.append(make_isbn(i))
+
+    return identifiers
+
+
+def percentile(values: List[float], q: float) -> float:
+    """
+    Get the `q`-th percentile of the `values` (nearest-rank method).
+    """
+
+    values = sorted(values)
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def count_failures(identifiers: List[str], results: List[str]) -> int:
+    """
+    Count the identifiers that could not be resolved.
+    """
+
+    return sum(
+        "error" in make_result(identifier, result)
+        for identifier, result in zip(identifiers, results)
+    )
+
+
+def run_single(
+    identifiers: List[str],
+    config: Configuration,
+) -> Tuple[List[float], int]:
+    """
+    Resolve the identifiers one by one; return the latency of every
+    identifier and the number of failures.
+    """
+
+    latencies, results = [], []
+    for identifier in identifiers:
+        start = time.perf_counter()
+        results.append(resolve_identifier(identifier, config))
+        latencies.append(time.perf_counter() - start)
+
+    return latencies, count_failures(identifiers, results)
+
+
+def run_batch(
+    identifiers: List[str],
+    config: Configuration,
+    n_jobs: int,
+    batch_size: int,
+) -> Tuple[List[float], int]:
+    """
+    Resolve the identifiers in batches; return the latency of every
+    batch and the number of failures.
+    """
+
+    latencies, n_failed = [], 0
+    for i in range(0, len(identifiers), batch_size):
+        batch = identifiers[i:i + batch_size]
+        start = time.perf_counter()
+        results = resolve_identifiers(batch, config, n_jobs=n_jobs)
+        latencies.append(time.perf_counter() - start)
+        n_failed += count_failures(batch, results)
+
+    return latencies, n_failed
+
+
+# -----------------------------------------------------------------------------
+# MAIN CODE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    args = parse_cli_args()
+
+    # Start the local stand-in for the backends
+    server = FixtureServer(args)
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    # Use the default configuration, but send all requests to the local
+    # server, and do not use the cache or any rate limits
+    with patch.object(Path, "exists", lambda _: False):
+        config = Configuration()
+    config.base_urls = server.base_urls
+    config.use_cache = False
+    config.rate_limits = {}
+    config.resolve_adsurl = False
+    config.crossmatch_with_dblp = False
+    config.isbn_backends = args.isbn_backends
+    os.environ.setdefault("ADS_TOKEN", "benchmark")
+
+    enrichment_config = copy(config)
+    enrichment_config.resolve_adsurl = True
+    enrichment_config.crossmatch_with_dblp = True
+
+    print(
+        f"Latency: {args.latency:.0f} ms (median), error rate: "
+        f"{args.error_rate:.1%}, authors: {args.authors}",
+        flush=True,
+    )
+    print(
+        f"{'workload':<12}{'ids':>6}{'failed':>8}{'ids/s':>10}"
+        f"{'p50 [ms]':>11}{'p95 [ms]':>11}{'p99 [ms]':>11}"
+    )
+
+    # Resolve one identifier of every kind before measuring anything, so
+    # that the lazy imports (e.g., `bs4`) do not count towards the latency
+    all_kinds = ["doi", "arxiv", "ads", "isbn"]
+    run_single(make_identifiers(4, all_kinds, 10**6), enrichment_config)
+    server.n_requests.clear()
+
+    for i, workload in enumerate(args.workloads):
+
+        offset = i * args.identifiers
+        start = time.perf_counter()
+        if workload == "single":
+            identifiers = make_identifiers(args.identifiers, all_kinds, offset)
+            latencies, n_failed = run_single(identifiers, config)
+        elif workload == "batch":
+            identifiers = make_identifiers(args.identifiers, all_kinds, offset)
+            latencies, n_failed = run_batch(
+                identifiers, config, args.jobs, args.batch_size
+            )
+        else:
+            identifiers = make_identifiers(
+                args.identifiers, ["doi", "arxiv"], offset
+            )
+            latencies, n_failed = run_single(identifiers, enrichment_config)
+        total = time.perf_counter() - start
+
+        print(
+            f"{workload:<12}{len(identifiers):>6}{n_failed:>8}"
+            f"{len(identifiers) / total:>10.1f}"
+            f"{1000 * percentile(latencies, 50):>11.1f}"
+            f"{1000 * percentile(latencies, 95):>11.1f}"
+            f"{1000 * percentile(latencies, 99):>11.1f}",
+            flush=True,
+        )
+
+    n_requests = sorted(server.n_requests.items())
+    print("Requests: " + ", ".join(f"{k}={v}" for k, v in n_requests))
+    server.shutdown()
@@ -0,0 +1,383 @@
+"""
+Micro-benchmark every step of the post-processing pipeline.
+
+Each step of `postprocess_bibtex()` (see `process.compile_pipeline()`)
+and the BibTeX round trip (`bibtex_string_to_dict()` and
+`dict_to_bibtex_string()`) is timed separately on synthetic corpora:
+    typical:        entries with 1 to 40 authors
+    collaboration:  entries with 3000 authors (e.g., LIGO, ATLAS, ...)
+Every step gets the output of the previous steps as its input, that is,
+exactly what it would see in the actual pipeline. The steps that need
+network access (`resolve_adsurl` and `crossmatch_with_dblp`) are not
+included.
+
+The results (in microseconds per entry) are appended to a history file
+(one JSON record per line), together with the commit and the Python
+version, so that they can be tracked over time. Every run is compared
+to the best of the previous runs on the same machine: if a step became
+slower by more than `--threshold`, the exit code is 1.
+
+Usage:
+    python benchmarks/steps.py [--entries N] [--collaborations N]
+        [--repeat N] [--threshold X] [--history FILE] [--no-save]
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from argparse import ArgumentParser, Namespace
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from unittest.mock import patch
+
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from doi2bibtex.bibtex import (  # noqa: E402
+    bibtex_string_to_dict,
+    dict_to_bibtex_string,
+)
+from doi2bibtex.config import Configuration  # noqa: E402
+from doi2bibtex.process import compile_pipeline  # noqa: E402
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+# A step gets a list of (identifier, entry) tuples and returns the results
+Step = Callable[[List[Tuple[str, dict]]], list]
+
+# Names for the synthetic entries (with LaTeX-encoded characters)
+FIRSTNAMES = ["Anna", "B. P.", "Carlos", "D. E.", "Fang", "J{\\\"o}rg"]
+LASTNAMES = [
+    "Abbott", "M{\\\"u}ller", "de la Cruz", "Garc{\\'\\i}a", "Li",
+    "Smith", "{\\O}stergaard", "Nu{\\~n}ez",
+]
+TITLES = [
+    "On the {{Theory}} of Things, Part {}",
+    "Observation of {{Gravitational Waves}} from a Binary Merger {}",
+    "A survey of exoplanet atmospheres with $\\alpha$ = {}",
+    "Results from the first {} years of {{ATLAS}} observations",
+]
+JOURNALS = [
+    "Physical Review D",
+    "The Astrophysical Journal",
+    "Astronomy {\\&}amp$\\mathsemicolon$ Astrophysics",
+    "arXiv preprints",
+]
+
+
+def parse_cli_args() -> Namespace:
+    """
+    Parse the command line arguments.
+    """
+
+    parser = ArgumentParser()
+    parser.add_argument(
+        "--entries",
+        type=int,
+        default=1000,
+        help="Number of entries of the `typical` corpus.",
+    )
+    parser.add_argument(
+        "--collaborations",
+        type=int,
+        default=10,
+        help="Number of entries (with 3000 authors) of the `collaboration` "
+        "corpus.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times that every step is timed (the best is used).",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Maximum relative slowdown of a step (e.g., 0.25 = 25%%).",
+    )
+    parser.add_argument(
+        "--min-difference",
+        type=float,
+        default=5.0,
+        help="Ignore slowdowns of less than this (in us per entry).",
+    )
+    parser.add_argument(
+        "--baseline-runs",
+        type=int,
+        default=5,
+        help="Compare against the best of this many previous runs.",
+    )
+    parser.add_argument(
+        "--history",
+        type=Path,
+        default=Path(__file__).parent / "results" / "steps.jsonl",
+        help="File with the results of the previous runs.",
+    )
+    parser.add_argument(
+        "--no-save",
+        action="store_true",
+        help="Do not add the results of this run to the history.",
+    )
+    return parser.parse_args()
+
+
+def make_entry(rng: random.Random, i: int, n_authors: int) -> dict:
+    """
+    Make a synthetic BibTeX entry (as a dict) with `n_authors` authors.
+    """
+
+    authors = " and ".join(
+        f"{rng.choice(LASTNAMES)}, {rng.choice(FIRSTNAMES)}"
+        for _ in range(n_authors)
+    )
+    journal = rng.choice(JOURNALS)
+    entry = {
+        "ENTRYTYPE": rng.choice(["article", "article", "book", "misc"]),
+        "ID": f"entry{i}",
+        "author": authors,
+        "title": rng.choice(TITLES).replace("{}", str(i)),
+        "journal": journal,
+        "year": str(rng.randint(1990, 2024)),
+        "month": rng.choice(["jan", "feb", "mar", "sep", "dec"]),
+        "pages": "160â€“175",
+        "doi": f"10.1000/xyz.{i}",
+        "url": f"https://doi.org/10.1000%2Fxyz.{i}",
+        "publisher": "Some Publisher",
+        "abstract": "Lorem ipsum dolor sit amet. " * 10,
+    }
+    if journal == "arXiv preprints":
+        entry["eprint"] = f"2101.{i:05d}"
+
+    return entry
+
+
+def make_corpora(n_entries: int, n_collaborations: int) -> Dict[str, list]:
+    """
+    Make the synthetic corpora as lists of (identifier, entry) tuples.
+    """
+
+    rng = random.Random(42)
+    typical = [
+        make_entry(rng, i, rng.choice([1, 2, 3, 5, 8, 40]))
+        for i in range(n_entries)
+    ]
+    collaboration = [
+        make_entry(rng, i, 3000) for i in range(n_collaborations)
+    ]
+
+    return {
+        name: [(entry.get("eprint", entry["doi"]), entry) for entry in corpus]
+        for name, corpus in (
+            ("typical", typical),
+            ("collaboration", collaboration),
+        )
+    }
+
+
+def time_step(
+    step: Step,
+    items: list,
+    repeat: int,
+    min_time: float = 0.02,
+) -> Tuple[float, list]:
+    """
+    Run the `step` on (fresh copies of) the `items` and return the best
+    time (in seconds) of `repeat` runs, and the results. Fast steps are
+    run multiple times per measurement (until it takes at least about
+    `min_time` seconds), so that the timer overhead does not matter.
+    """
+
+    # Calibrate the number of runs per measurement
+    copies = deepcopy(items)
+    start = time.perf_counter()
+    results = step(copies)
+    number = min(1000, math.ceil(min_time / (time.perf_counter() - start)))
+
+    best = float("inf")
+    for _ in range(repeat):
+        all_copies = [deepcopy(items) for _ in range(number)]
+        start = time.perf_counter()
+        for copies in all_copies:
+            step(copies)
+        best = min(best, (time.perf_counter() - start) / number)
+
+    return best, results
+
+
+def run_corpus(
+    items: List[Tuple[str, dict]],
+    config: Configuration,
+    repeat: int,
+) -> Dict[str, float]:
+    """
+    Time all steps on the given corpus; return the time of every step
+    in microseconds per entry.
+    """
+
+    results: Dict[str, float] = {}
+    identifiers = [identifier for identifier, _ in items]
+
+    # Parse the entries from their BibTeX strings (like the backends do)
+    strings = [dict_to_bibtex_string(dict(entry)) for _, entry in items]
+    seconds, entries = time_step(
+        lambda _: [bibtex_string_to_dict(s) for s in strings], [], repeat
+    )
+    results["bibtex_string_to_dict"] = seconds
+    items = list(zip(identifiers, entries))
+
+    # Run the steps of the pipeline; each step gets the output of the
+    # previous one
+    for name, step in compile_pipeline(config):
+        seconds, entries = time_step(
+            lambda copies, step=step: [  # type: ignore[misc]
+                step(d, i, config, None) for i, d in copies
+            ],
+            items,
+            repeat,
+        )
+        results[name] = seconds
+        items = list(zip(identifiers, entries))
+
+    # Write the final entries back to BibTeX strings
+    seconds, _ = time_step(
+        lambda copies: [dict_to_bibtex_string(d) for _, d in copies],
+        items,
+        repeat,
+    )
+    results["dict_to_bibtex_string"] = seconds
+
+    return {name: 1e6 * s / len(identifiers) for name, s in results.items()}
+
+
+def get_commit() -> str:
+    """
+    Get the (short) hash of the current git commit, if available.
+    """
+
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_history(file_path: Path) -> List[dict]:
+    """
+    Load the records of the previous runs (if any).
+    """
+
+    if not file_path.exists():
+        return []
+
+    with open(file_path, "r") as jsonl_file:
+        return [json.loads(line) for line in jsonl_file if line.strip()]
+
+
+def get_baseline(
+    history: List[dict],
+    record: dict,
+    n_runs: int,
+) -> Dict[str, Dict[str, float]]:
+    """
+    Get the best time of every step over the last `n_runs` runs in the
+    `history` that are comparable to the given `record` (i.e., same
+    machine, same Python version, and corpora of the same size).
+    """
+
+    comparable = [
+        _ for _ in history
+        if all(_.get(k) == record[k] for k in ("machine", "python", "sizes"))
+    ][-n_runs:]
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    for previous in comparable:
+        for corpus, steps in previous["results"].items():
+            for step, value in steps.items():
+                best = baseline.setdefault(corpus, {}).get(step, value)
+                baseline[corpus][step] = min(best, value)
+
+    return baseline
+
+
+# -----------------------------------------------------------------------------
+# MAIN CODE
+# -----------------------------------------------------------------------------
+
+if __name__ == "__main__":
+
+    args = parse_cli_args()
+
+    # Use the default configuration, without the steps that need network
+    with patch.object(Path, "exists", lambda _: False):
+        config = Configuration()
+    config.resolve_adsurl = False
+    config.crossmatch_with_dblp = False
+
+    corpora = make_corpora(args.entries, args.collaborations)
+    record: dict = {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": get_commit(),
+        "machine": f"{platform.node()} ({platform.machine()})",
+        "python": platform.python_version(),
+        "sizes": {name: len(items) for name, items in corpora.items()},
+        "results": {
+            name: run_corpus(items, config, args.repeat)
+            for name, items in corpora.items()
+        },
+    }
+
+    # Compare the results to the previous runs
+    history = load_history(args.history)
+    baseline = get_baseline(history, record, args.baseline_runs)
+    regressions = []
+    for corpus, steps in record["results"].items():
+        print(
+            f"\n{corpus} ({record['sizes'][corpus]} entries)\n"
+            f"  {'step':<26}{'us/entry':>12}{'baseline':>12}{'change':>9}"
+        )
+        for step, value in steps.items():
+            line = f"  {step:<26}{value:>12.2f}"
+            if (best := baseline.get(corpus, {}).get(step)) is not None:
+                change = value / best - 1 if best > 0 else 0.0
+                line += f"{best:>12.2f}{change:>+9.1%}"
+                if (
+                    change > args.threshold
+                    and value - best > args.min_difference
+                ):
+                    regressions.append(f"{corpus}/{step} ({change:+.1%})")
+                    line += "  <-- regression"
+            print(line)
+
+    # Add the results to the history
+    if not args.no_save:
+        args.history.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.history, "a") as jsonl_file:
+            jsonl_file.write(json.dumps(record) + "\n")
+
+    if not baseline:
+        print("\nThere are no comparable previous runs to compare with.")
+    if regressions:
+        print(
+            f"\nSlower than {args.threshold:.0%} of the baseline: "
+            + ", ".join(regressions)
+        )
+        sys.exit(1)
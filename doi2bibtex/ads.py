@@ -7,13 +7,20 @@ Methods that deal with querying the NASA/ADS database system.
 # -----------------------------------------------------------------------------
 
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
 from urllib.parse import urlencode
 
 import json
 import os
+import re
 
-import requests
+from doi2bibtex import network
+from doi2bibtex.config import Configuration
+from doi2bibtex.constants import ADS_SEARCH_MAX_IDENTIFIERS
+from doi2bibtex.identify import classify_identifier
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
 
 
 # -----------------------------------------------------------------------------
@@ -49,7 +56,33 @@ def get_ads_token(raise_on_error: bool = False) -> Optional[str]:
     return None
 
 
-def get_ads_bibcode_for_identifier(identifier: str) -> str:
+def get_ads_headers(token: Optional[str]) -> Dict[str, str]:
+    """
+    Get the headers for requests to the ADS API.
+    """
+
+    return {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json",
+    }
+
+
+def get_ads_search_url(identifier: str) -> str:
+    """
+    Get the URL for an ADS search query for the given `identifier`.
+    """
+
+    q = urlencode({"identifier": identifier})
+    q = q.replace("identifier=", "identifier:")
+    fl = "bibcode,doi,identifier"
+
+    return f"https://api.adsabs.harvard.edu/v1/search/query?q={q}&fl={fl}"
+
+
+def get_ads_bibcode_for_identifier(
+    identifier: str,
+    config: Optional[Configuration] = None,
+) -> str:
     """
     Query ADS for the given `identifier` and return the bibcode of the
     matching result (or an empty string, if no results are found).
@@ -59,17 +92,98 @@ def get_ads_bibcode_for_identifier(identifier: str) -> str:
     token = get_ads_token(raise_on_error=True)
 
     # Query the ADS API manually
-    q = urlencode({"identifier": identifier})
-    q = q.replace("identifier=", "identifier:")
-    fl = "bibcode,identifier"
-    r = requests.get(
-        url=f"https://api.adsabs.harvard.edu/v1/search/query?q={q}&fl={fl}",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
+    r = network.get(
+        url=get_ads_search_url(identifier),
+        backend="ads",
+        config=config,
+        headers=get_ads_headers(token),
     )
 
+    return parse_ads_search_response(r, identifier)
+
+
+def get_ads_bibcodes_for_identifiers(
+    identifiers: List[str],
+    config: Optional[Configuration] = None,
+    chunk_size: int = ADS_SEARCH_MAX_IDENTIFIERS,
+) -> Dict[str, str]:
+    """
+    Query ADS for multiple `identifiers` at once and return a dict that
+    maps each identifier to the bibcode of the matching result (or an
+    empty string, if no result matches). Instead of one search request
+    per identifier, the identifiers are combined into OR-queries with
+    (at most) `chunk_size` identifiers each.
+    """
+
+    # Get the ADS token (and raise an error if we don't have one)
+    token = get_ads_token(raise_on_error=True)
+
+    # Remove duplicates (but keep the order, so that requests are cacheable)
+    identifiers = list(dict.fromkeys(identifiers))
+
+    results: Dict[str, str] = {}
+    for i in range(0, len(identifiers), chunk_size):
+
+        # Combine the identifiers into a single query
+        chunk = identifiers[i:i + chunk_size]
+        q = " OR ".join(f'"{_}"' for _ in chunk)
+        query = urlencode(
+            {
+                "q": f"identifier:({q})",
+                "fl": "bibcode,doi,identifier",
+                "rows": 2000,
+            }
+        )
+        r = network.get(
+            url=f"https://api.adsabs.harvard.edu/v1/search/query?{query}",
+            backend="ads",
+            config=config,
+            headers=get_ads_headers(token),
+        )
+        if (error := r.status_code) != 200:
+            raise RuntimeError(
+                f"Error {error} querying ADS for {len(chunk)} identifiers"
+            )
+
+        # Match the results back to the identifiers (in the same way as in
+        # `parse_ads_search_response()` for a single identifier)
+        docs = json.loads(r.text)["response"]["docs"]
+        for identifier in chunk:
+            results[identifier] = find_ads_bibcode(docs, identifier)
+
+    return results
+
+
+async def get_ads_bibcode_for_identifier_async(
+    identifier: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> str:
+    """
+    Asynchronous version of `get_ads_bibcode_for_identifier()`.
+    """
+
+    # Get the ADS token (and raise an error if we don't have one)
+    token = get_ads_token(raise_on_error=True)
+
+    # Query the ADS API manually
+    r = await network.get_async(
+        url=get_ads_search_url(identifier),
+        backend="ads",
+        client=client,
+        config=config,
+        headers=get_ads_headers(token),
+    )
+
+    return parse_ads_search_response(r, identifier)
+
+
+def parse_ads_search_response(r: network.Response, identifier: str) -> str:
+    """
+    Find the bibcode for the given `identifier` in the response of an
+    ADS search query (or return an empty string, if there is none).
+    """
+
     # Check if we got a 200 response
     if r.status_code != 200:
         return ""
@@ -78,9 +192,38 @@ def get_ads_bibcode_for_identifier(identifier: str) -> str:
     response = json.loads(r.text)["response"]
 
     # Find the result that matches the identifier
-    for result in response["docs"]:
-        if any(identifier.lower() in _.lower() for _ in result["identifier"]):
-            return str(result["bibcode"])
+    return find_ads_bibcode(response["docs"], identifier)
+
+
+def normalize_ads_identifier(identifier: str) -> str:
+    """
+    Normalize the given `identifier` for comparing it with the ones of
+    an ADS document: remove prefixes (e.g., "arXiv:"), the version of
+    arXiv IDs, and convert it to lowercase (like DOIs, the identifiers
+    are case-insensitive).
+    """
+
+    identifier_type, identifier = classify_identifier(identifier)
+    if identifier_type == "arxiv":
+        identifier = re.sub(r"v\d+$", "", identifier)
+
+    return identifier.lower()
+
+
+def find_ads_bibcode(docs: List[dict], identifier: str) -> str:
+    """
+    Find the bibcode of the first of the given ADS documents (i.e., the
+    results of a search query) that has the given `identifier` in its
+    `doi` or `identifier` list (or return an empty string, if there is
+    none). Identifiers must match exactly (after normalization, see
+    `normalize_ads_identifier()`), so that, for example, "2010.0559"
+    does not match "2010.05591".
+    """
+
+    identifier = normalize_ads_identifier(identifier)
+    for doc in docs:
+        identifiers = doc.get("doi", []) + doc.get("identifier", [])
+        if any(normalize_ads_identifier(_) == identifier for _ in identifiers):
+            return str(doc["bibcode"])
 
-    # If we get here, we didn't find a match
     return ""
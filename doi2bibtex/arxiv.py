@@ -0,0 +1,178 @@
+"""
+Resolve arXiv IDs using the arXiv API.
+
+Unlike arxiv2bibtex.org (see `resolve.resolve_arxiv_id()`), the arXiv
+API can return the metadata for many arXiv IDs at once (`id_list=...`)
+as an Atom feed, which we parse incrementally with `iterparse()`.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from io import BytesIO
+from typing import Dict, List, Optional, TYPE_CHECKING
+from urllib.parse import urlencode
+from xml.etree.ElementTree import iterparse
+
+import re
+
+from doi2bibtex import network
+from doi2bibtex.config import Configuration
+from doi2bibtex.constants import ARXIV_MAX_IDS
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+ARXIV = "{http://arxiv.org/schemas/atom}"
+
+
+def get_arxiv_api_url(arxiv_ids: List[str]) -> str:
+    """
+    Get the URL of an arXiv API query for the given `arxiv_ids`.
+    """
+
+    query = urlencode(
+        {"id_list": ",".join(arxiv_ids), "max_results": len(arxiv_ids)},
+        safe=",/",
+    )
+
+    return f"https://export.arxiv.org/api/query?{query}"
+
+
+def parse_arxiv_api_response(
+    r: network.Response,
+    arxiv_ids: List[str],
+) -> Dict[str, dict]:
+    """
+    Parse the Atom feed returned by the arXiv API into a dict that maps
+    the given `arxiv_ids` to BibTeX dicts. The BibTeX dicts have the
+    same format as the ones from arxiv2bibtex.org (including the `doi`,
+    if there is one). IDs that were not found are skipped.
+    """
+
+    if (error := r.status_code) != 200:
+        raise network.ResolveError(
+            f"Error {error} resolving {len(arxiv_ids)} IDs", error
+        )
+
+    # The feed always contains versioned IDs (e.g., "1312.6114v11"), while
+    # the requested IDs may or may not include a version
+    requested = set(arxiv_ids)
+
+    # Go through the feed and process every entry as soon as it is complete
+    results: Dict[str, dict] = {}
+    stream = BytesIO(r.text.encode("utf-8"))
+    for _, element in iterparse(stream, events=("end",)):
+        if element.tag != f"{ATOM}entry":
+            continue
+
+        # Get the arXiv ID (e.g., "http://arxiv.org/abs/1312.6114v11"); errors
+        # (e.g., for malformed IDs) are returned as entries without an ID
+        url = element.findtext(f"{ATOM}id", default="")
+        if "arxiv.org/abs/" not in url:
+            element.clear()
+            continue
+        versioned_id = url.split("arxiv.org/abs/")[-1]
+        unversioned_id = re.sub(r"v\d+$", "", versioned_id)
+
+        # Collect the metadata for the BibTeX entry
+        authors = [
+            _.findtext(f"{ATOM}name", default="").strip()
+            for _ in element.findall(f"{ATOM}author")
+        ]
+        title = element.findtext(f"{ATOM}title", default="")
+        published = element.findtext(f"{ATOM}published", default="")
+        doi = element.findtext(f"{ARXIV}doi")
+        element.clear()
+
+        # Construct a BibTeX entry for every requested ID that matches
+        for arxiv_id in (versioned_id, unversioned_id):
+            if arxiv_id not in requested:
+                continue
+            bibtex_dict = {
+                "ENTRYTYPE": "online",
+                "ID": arxiv_id,
+                "author": " and ".join(authors),
+                "title": re.sub(r"\s+", " ", title).strip(),
+                "year": published[:4],
+                "eprint": arxiv_id,
+                "eprinttype": "arXiv",
+            }
+            if doi:
+                bibtex_dict["doi"] = doi.strip()
+            results[arxiv_id] = bibtex_dict
+
+    return results
+
+
+def resolve_arxiv_ids_with_arxiv_api(
+    arxiv_ids: List[str],
+    config: Optional[Configuration] = None,
+    chunk_size: int = ARXIV_MAX_IDS,
+) -> Dict[str, dict]:
+    """
+    Resolve multiple `arxiv_ids` using the arXiv API, with (at most)
+    `chunk_size` IDs per request. Returns a dict that maps the given
+    IDs to BibTeX dicts; IDs that were not found are skipped.
+    """
+
+    # Remove duplicates (but keep the order, so that requests are cacheable)
+    arxiv_ids = list(dict.fromkeys(arxiv_ids))
+
+    results: Dict[str, dict] = {}
+    for i in range(0, len(arxiv_ids), chunk_size):
+        chunk = arxiv_ids[i:i + chunk_size]
+        r = network.get(
+            url=get_arxiv_api_url(chunk),
+            backend="arxiv",
+            config=config,
+        )
+        results.update(parse_arxiv_api_response(r, chunk))
+
+    return results
+
+
+def resolve_arxiv_id_with_arxiv_api(
+    arxiv_id: str,
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Resolve a single `arxiv_id` using the arXiv API.
+    """
+
+    if (bibtex_dict := resolve_arxiv_ids_with_arxiv_api([arxiv_id], config)):
+        return bibtex_dict[arxiv_id]
+
+    raise network.ResolveError(
+        f'Error resolving "{arxiv_id}": no BibTeX entry found'
+    )
+
+
+async def resolve_arxiv_id_with_arxiv_api_async(
+    arxiv_id: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_arxiv_id_with_arxiv_api()`.
+    """
+
+    r = await network.get_async(
+        url=get_arxiv_api_url([arxiv_id]),
+        backend="arxiv",
+        client=client,
+        config=config,
+    )
+    if (bibtex_dict := parse_arxiv_api_response(r, [arxiv_id])):
+        return bibtex_dict[arxiv_id]
+
+    raise network.ResolveError(
+        f'Error resolving "{arxiv_id}": no BibTeX entry found'
+    )
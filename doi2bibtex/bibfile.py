@@ -0,0 +1,293 @@
+"""
+Methods for working with LaTeX files (.aux / .tex) and BibTeX files,
+for example, to find the citations that are missing from a .bib file.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from typing import List, Optional, Set
+from urllib.parse import unquote
+
+import json
+import os
+import re
+
+from doi2bibtex.identify import classify_identifier
+from doi2bibtex.process import canonicalize_identifier
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+# Citations in .aux files (e.g., "\citation{1312.6114,2010.05591}"), also
+# for biblatex (e.g., "\abx@aux@cite{0}{1312.6114}")
+AUX_CITATION_REGEX = re.compile(
+    r"\\(?:citation|abx@aux@cite(?:\{\d+\})?)\{([^}]*)\}"
+)
+
+# Citations in .tex files, including natbib and biblatex variants with
+# optional arguments (e.g., "\citep[see][p. 3]{1312.6114}")
+TEX_CITATION_REGEX = re.compile(
+    r"\\[a-zA-Z]*cite[a-zA-Z]*\*?\s*(?:\[[^\]]*\]\s*){0,2}\{([^}]*)\}"
+)
+
+# The key of an entry in a .bib file (e.g., "@article{Kingma_2013,")
+BIB_KEY_REGEX = re.compile(r"^\s*@\s*(\w+)\s*[{(]\s*([^,\s]+)\s*,", re.M)
+
+# The fields of an entry in a .bib file that contain an identifier
+BIB_IDENTIFIER_FIELD_REGEX = re.compile(
+    r"\b(doi|eprint|isbn|adsurl)\s*=\s*(?:\{([^{}]*)\}|\"([^\"]*)\")",
+    re.I,
+)
+
+
+def read_citation_keys(file_path: Path) -> List[str]:
+    """
+    Read all citation keys from a .aux file (`\\citation{...}`) or a
+    .tex file (`\\cite{...}`, `\\citep{...}`, ...), without duplicates
+    and in the order of their first appearance.
+    """
+
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+
+    regex = (
+        AUX_CITATION_REGEX if file_path.suffix == ".aux"
+        else TEX_CITATION_REGEX
+    )
+
+    # Remove comments from .tex files (but keep escaped percent signs)
+    if regex is TEX_CITATION_REGEX:
+        text = re.sub(r"(?<!\\)%.*", "", text)
+
+    keys = [
+        key.strip()
+        for match in regex.finditer(text)
+        for key in match.group(1).split(",")
+    ]
+
+    return [
+        key for key in dict.fromkeys(keys)
+        if key and key != "*"
+    ]
+
+
+def read_bib_keys(file_path: Path) -> Set[str]:
+    """
+    Read the keys of all entries in a .bib file (without parsing the
+    entries themselves, which would be much slower for large files).
+    If the file does not exist, an empty set is returned.
+    """
+
+    if not file_path.exists():
+        return set()
+
+    with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+
+    return {
+        match.group(2)
+        for match in BIB_KEY_REGEX.finditer(text)
+        if match.group(1).lower() not in ("comment", "preamble", "string")
+    }
+
+
+def get_missing_identifiers(
+    citation_keys: List[str],
+    bib_keys: Set[str],
+) -> List[str]:
+    """
+    Get the citation keys that are not in `bib_keys` and that can be
+    resolved (i.e., that are a DOI, arXiv ID, ADS bibcode or ISBN).
+    """
+
+    return [
+        key for key in citation_keys
+        if key not in bib_keys and classify_identifier(key)[0] != "unknown"
+    ]
+
+
+def set_citekey(bibtex_string: str, citekey: str) -> str:
+    """
+    Replace the key of the given BibTeX entry (as a string) with the
+    given `citekey`, so that the entry matches the `\\cite{...}` key.
+    """
+
+    return re.sub(
+        r"^(\s*@\s*\w+\s*\{)[^,]*,",
+        lambda match: match.group(1) + citekey + ",",
+        bibtex_string,
+        count=1,
+    )
+
+
+def append_entries(file_path: Path, entries: List[str]) -> None:
+    """
+    Append the given BibTeX `entries` (as strings) to a .bib file. The
+    file is created if it does not exist yet.
+    """
+
+    if not entries:
+        return
+
+    # Make sure that the new entries start on a new line
+    prefix = ""
+    if file_path.exists() and file_path.stat().st_size > 0:
+        with open(file_path, "rb") as f:
+            f.seek(-1, 2)
+            prefix = "\n" if f.read(1) == b"\n" else "\n\n"
+
+    # Write all entries with a single `write()` in append mode, so that the
+    # file is never rewritten and readers never see half an entry
+    content = prefix + "\n\n".join(_.strip() for _ in entries) + "\n"
+    fd = os.open(file_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, content.encode("utf-8"))
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def get_index_key(identifier: str) -> Optional[str]:
+    """
+    Get the key of the given `identifier` in the index of a .bib file
+    (e.g., "doi:10.1000/xyz"), or None if it is not a DOI, arXiv ID,
+    ADS bibcode or ISBN. The key is normalized, so that different ways
+    of writing the same identifier have the same key (see
+    `process.canonicalize_identifier()`).
+    """
+
+    identifier_type, identifier = canonicalize_identifier(identifier)
+    if identifier_type == "unknown":
+        return None
+
+    return f"{identifier_type}:{identifier}"
+
+
+def extract_index_keys(bibtex_string: str) -> Set[str]:
+    """
+    Extract the index keys (see `get_index_key()`) of all identifiers
+    in the given BibTeX string: the `doi`, `eprint`, `isbn` and `adsurl`
+    fields, and the keys of the entries (if they are an identifier).
+    """
+
+    identifiers = [
+        match.group(2) for match in BIB_KEY_REGEX.finditer(bibtex_string)
+    ]
+    for match in BIB_IDENTIFIER_FIELD_REGEX.finditer(bibtex_string):
+        field = match.group(1).lower()
+        value = (match.group(2) or match.group(3) or "").strip()
+        if field == "adsurl":
+            value = unquote(value.rstrip("/").rsplit("/", 1)[-1])
+        identifiers.append(value)
+
+    keys = {get_index_key(_) for _ in identifiers}
+
+    return {_ for _ in keys if _ is not None}
+
+
+def add_identifier_field(bibtex_string: str, identifier: str) -> str:
+    """
+    Make sure that the given BibTeX entry (as a string) contains the
+    given `identifier`, so that `extract_index_keys()` finds it again.
+    This is not the case, for example, if an arXiv ID was resolved to
+    the entry of the published paper (which only has a DOI). In this
+    case, the identifier is added as a field (e.g., `eprint`), unless
+    the entry already has a field of this name.
+    """
+
+    if (key := get_index_key(identifier)) is None:
+        return bibtex_string
+    if key in extract_index_keys(bibtex_string):
+        return bibtex_string
+
+    identifier_type, identifier = key.split(":", 1)
+    fields = {
+        "doi": {"doi": identifier},
+        "arxiv": {"eprint": identifier, "eprinttype": "arXiv"},
+        "ads": {"adsurl": f"https://adsabs.harvard.edu/abs/{identifier}"},
+        "isbn": {"isbn": identifier},
+    }[identifier_type]
+
+    # Do not overwrite (or duplicate) existing fields
+    if re.search(rf"\b{list(fields)[0]}\s*=", bibtex_string, re.I):
+        return bibtex_string
+
+    # Insert the new fields before the closing brace of the entry
+    body = bibtex_string.rstrip()
+    if not body.endswith(("}", ")")):
+        return bibtex_string
+    body = body[:-1].rstrip()
+    if not body.endswith(","):
+        body += ","
+    lines = "".join(
+        f"\n  {name:<13} = {{{value}}}," for name, value in fields.items()
+    )
+
+    return body + lines + "\n" + bibtex_string.rstrip()[-1]
+
+
+def get_index_file_path(bib_path: Path) -> Path:
+    """
+    Get the path of the cached index for the given .bib file (e.g.,
+    `.refs.bib.d2b-index.json` next to `refs.bib`).
+    """
+
+    return bib_path.with_name(f".{bib_path.name}.d2b-index.json")
+
+
+def save_bib_index(bib_path: Path, index: Set[str]) -> None:
+    """
+    Store the `index` of the given .bib file next to it, together with
+    the modification time and size of the .bib file.
+    """
+
+    stat = bib_path.stat()
+    content = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "keys": sorted(index),
+    }
+
+    # Write to a temporary file first, so that the index is never corrupt
+    index_path = get_index_file_path(bib_path)
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as json_file:
+        json.dump(content, json_file)
+    os.replace(tmp_path, index_path)
+
+
+def load_bib_index(bib_path: Path) -> Set[str]:
+    """
+    Get the index of the given .bib file, i.e., the set of the index
+    keys of all identifiers in it (see `extract_index_keys()`). The
+    index is cached next to the .bib file, and it is rebuilt only if
+    the modification time or the size of the .bib file have changed.
+    """
+
+    if not bib_path.exists():
+        return set()
+
+    # Try to use the cached index
+    stat = bib_path.stat()
+    try:
+        with open(get_index_file_path(bib_path), "r") as json_file:
+            content = json.load(json_file)
+        if (
+            content["mtime_ns"] == stat.st_mtime_ns
+            and content["size"] == stat.st_size
+        ):
+            return set(content["keys"])
+    except (OSError, ValueError, KeyError):
+        pass
+
+    # Otherwise, build the index and cache it
+    with open(bib_path, "r", encoding="utf-8", errors="replace") as f:
+        index = extract_index_keys(f.read())
+    save_bib_index(bib_path, index)
+
+    return index
@@ -7,9 +7,9 @@ very thin convencience wrapper around the `bibtexparser` package.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-from bibtexparser.bibdatabase import BibDatabase
-from bibtexparser.bparser import BibTexParser
-from bibtexparser.bwriter import BibTexWriter
+from typing import List
+
+from doi2bibtex.profiling import span
 
 
 # -----------------------------------------------------------------------------
@@ -21,17 +21,39 @@ def bibtex_string_to_dict(bibtex_string: str) -> dict:
     Convert a BibTeX string to a dictionary.
     """
 
-    parser = BibTexParser(ignore_nonstandard_types=False)
-    bibtex_dict = dict(parser.parse(bibtex_string).entries[0])
+    from bibtexparser.bparser import BibTexParser
+
+    with span("bibtex_string_to_dict", "bibtex"):
+        parser = BibTexParser(ignore_nonstandard_types=False)
+        bibtex_dict = dict(parser.parse(bibtex_string).entries[0])
 
     return bibtex_dict
 
 
+def bibtex_string_to_dicts(bibtex_string: str) -> List[dict]:
+    """
+    Convert a BibTeX string with (potentially) multiple entries to a
+    list of dictionaries.
+    """
+
+    from bibtexparser.bparser import BibTexParser
+
+    with span("bibtex_string_to_dicts", "bibtex"):
+        parser = BibTexParser(ignore_nonstandard_types=False)
+        entries = parser.parse(bibtex_string).entries
+        bibtex_dicts = [dict(_) for _ in entries]
+
+    return bibtex_dicts
+
+
 def dict_to_bibtex_string(bibtex_dict: dict) -> str:
     """
     Convert a BibTeX dictionary to a string.
     """
 
+    from bibtexparser.bibdatabase import BibDatabase
+    from bibtexparser.bwriter import BibTexWriter
+
     # Convert the BibTeX dict to a BibDatabase object
     database = BibDatabase()
     database.entries = [bibtex_dict]
@@ -43,6 +65,7 @@ def dict_to_bibtex_string(bibtex_dict: dict) -> str:
     writer.indent = '  '
 
     # Convert the BibDatabase object to a string
-    bibtex_string = str(writer.write(database)).strip()
+    with span("dict_to_bibtex_string", "bibtex"):
+        bibtex_string = str(writer.write(database)).strip()
 
     return bibtex_string
@@ -0,0 +1,343 @@
+"""
+Persistent on-disk cache for HTTP responses from the different backends
+(and for identifiers that could not be resolved).
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+import hashlib
+import sqlite3
+import time
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+class ResponseCache:
+    """
+    A simple cache for HTTP responses that is backed by an SQLite
+    database. Every entry belongs to a `backend` (e.g., "crossref"),
+    which determines its time-to-live (TTL). If the total size of the
+    cache exceeds `max_size` bytes, the least recently used entries
+    are evicted. Identifiers that could not be resolved are stored as
+    failures of a given `kind` ("permanent" or "transient"), which
+    determines their TTL.
+    """
+
+    def __init__(self, file_path: Path, max_size: int) -> None:
+
+        self.file_path = file_path
+        self.max_size = max_size
+
+        # Running total of the size of all responses (in bytes), so that we
+        # do not need to sum over the whole table for every write; this is
+        # initialized lazily and reset to None when it becomes unknown
+        self._total_size: Optional[int] = None
+
+        # Make sure the parent directory exists
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Open the database; the connection is shared between threads, so
+        # we need to use a lock to make sure only one thread uses it at once
+        self._lock = Lock()
+        self._connection = sqlite3.connect(
+            str(self.file_path),
+            timeout=30,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "  key TEXT PRIMARY KEY,"
+                "  backend TEXT NOT NULL,"
+                "  url TEXT NOT NULL,"
+                "  text TEXT NOT NULL,"
+                "  size INTEGER NOT NULL,"
+                "  created REAL NOT NULL,"
+                "  accessed REAL NOT NULL"
+                ")"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed "
+                "ON responses (accessed)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS failures ("
+                "  key TEXT NOT NULL,"
+                "  kind TEXT NOT NULL,"
+                "  message TEXT NOT NULL,"
+                "  status_code INTEGER,"
+                "  created REAL NOT NULL,"
+                "  PRIMARY KEY (key, kind)"
+                ")"
+            )
+
+    @staticmethod
+    def make_key(method: str, url: str, data: Optional[str] = None) -> str:
+        """
+        Compute the cache key for a request. Headers are deliberately
+        not part of the key, so that we never store the ADS token.
+        """
+
+        content = "\n".join([method.upper(), url, data or ""])
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Return the cached response text for the given `key`, or None if
+        there is no entry or the entry is older than `ttl` seconds.
+        """
+
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT text, created, size FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > ttl:
+                self._connection.execute(
+                    "DELETE FROM responses WHERE key = ?", (key,)
+                )
+                if self._total_size is not None:
+                    self._total_size -= row[2]
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+
+        return str(row[0])
+
+    def set(self, key: str, backend: str, url: str, text: str) -> None:
+        """
+        Store the response `text` for the given `key` and evict the
+        least recently used entries if the cache has grown too large.
+        """
+
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, backend, url, text, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, backend, url, text, size, now, now),
+            )
+            if self._total_size is not None:
+                self._total_size += size - (row[0] if row else 0)
+            self._evict_lru()
+
+    def get_failure(
+        self,
+        key: str,
+        ttls: Dict[str, float],
+    ) -> Optional[Tuple[str, Optional[int]]]:
+        """
+        Return the error message and status code of the most recent
+        failure for the given `key`, or None if there is no failure that
+        is younger than the TTL of its kind (given in `ttls`, in seconds).
+        """
+
+        now = time.time()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT kind, message, status_code, created FROM failures "
+                "WHERE key = ? ORDER BY created DESC",
+                (key,),
+            ).fetchall()
+        for kind, message, status_code, created in rows:
+            if now - created <= ttls.get(kind, 0):
+                return str(message), status_code
+
+        return None
+
+    def set_failure(
+        self,
+        key: str,
+        kind: str,
+        message: str,
+        status_code: Optional[int] = None,
+    ) -> None:
+        """
+        Store a failure of the given `kind` for the given `key`.
+        """
+
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO failures "
+                "(key, kind, message, status_code, created) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, kind, message, status_code, time.time()),
+            )
+
+    def _get_total_size(self) -> int:
+        """
+        Compute the total size of all responses in the database. Needs
+        to be called with the lock.
+        """
+
+        return int(
+            self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+        )
+
+    def _evict_lru(self) -> int:
+        """
+        Delete the least recently used entries until the total size of
+        the cache is below `max_size`. Needs to be called with the lock.
+        """
+
+        # Use the running total to check if we need to evict anything
+        if self._total_size is None:
+            self._total_size = self._get_total_size()
+        if self._total_size <= self.max_size:
+            return 0
+
+        # The running total misses writes by other processes that share the
+        # same database file, so we get the exact total before evicting
+        total_size = self._get_total_size()
+        if total_size <= self.max_size:
+            self._total_size = total_size
+            return 0
+
+        # Walk through the entries from oldest to newest access and collect
+        # keys until we have freed enough space
+        keys = []
+        for key, size in self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed ASC"
+        ).fetchall():
+            if total_size <= self.max_size:
+                break
+            keys.append(key)
+            total_size -= size
+        self._connection.executemany(
+            "DELETE FROM responses WHERE key = ?", [(_,) for _ in keys]
+        )
+        self._total_size = total_size
+
+        return len(keys)
+
+    def prune(
+        self,
+        ttls: Dict[str, float],
+        failure_ttls: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """
+        Remove all expired entries (based on the per-backend TTLs given
+        in `ttls`, in seconds) and enforce the size limit. Entries from
+        backends without a TTL are removed. The same applies to failures
+        and the per-kind TTLs in `failure_ttls`. Returns the number of
+        removed entries.
+        """
+
+        now = time.time()
+        with self._lock:
+            n_removed = 0
+            for (backend,) in self._connection.execute(
+                "SELECT DISTINCT backend FROM responses"
+            ).fetchall():
+                cursor = self._connection.execute(
+                    "DELETE FROM responses WHERE backend = ? AND created < ?",
+                    (backend, now - ttls.get(backend, 0)),
+                )
+                n_removed += cursor.rowcount
+            self._total_size = None
+            for (kind,) in self._connection.execute(
+                "SELECT DISTINCT kind FROM failures"
+            ).fetchall():
+                cursor = self._connection.execute(
+                    "DELETE FROM failures WHERE kind = ? AND created < ?",
+                    (kind, now - (failure_ttls or {}).get(kind, 0)),
+                )
+                n_removed += cursor.rowcount
+            n_removed += self._evict_lru()
+
+        return n_removed
+
+    def clear(self) -> int:
+        """
+        Remove all entries from the cache and return how many there were.
+        """
+
+        with self._lock:
+            n_removed = self._connection.execute(
+                "DELETE FROM responses"
+            ).rowcount
+            n_removed += self._connection.execute(
+                "DELETE FROM failures"
+            ).rowcount
+            self._total_size = 0
+            self._connection.execute("VACUUM")
+
+        return int(n_removed)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Return the number of entries and their total size (in bytes)
+        for every backend, and for the failures (if there are any).
+        """
+
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT backend, COUNT(*), SUM(size) FROM responses "
+                "GROUP BY backend ORDER BY backend"
+            ).fetchall()
+            n_failures, failures_size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(message)), 0) "
+                "FROM failures"
+            ).fetchone()
+
+        stats = {
+            backend: {"entries": int(entries), "size": int(size)}
+            for backend, entries, size in rows
+        }
+        if n_failures > 0:
+            stats["failures"] = {
+                "entries": int(n_failures),
+                "size": int(failures_size),
+            }
+
+        return stats
+
+
+def get_cache_file_path() -> Path:
+    """
+    Get the path to the cache database (`~/.doi2bibtex/cache.sqlite`).
+    """
+
+    return Path.home() / ".doi2bibtex" / "cache.sqlite"
+
+
+# Keep one cache instance per database file, so that all threads share
+# the same connection
+_caches: Dict[Path, ResponseCache] = {}
+_caches_lock = Lock()
+
+
+def get_response_cache(max_size: int) -> ResponseCache:
+    """
+    Get the (shared) `ResponseCache` instance for the default location.
+    """
+
+    file_path = get_cache_file_path()
+    with _caches_lock:
+        if file_path not in _caches:
+            _caches[file_path] = ResponseCache(file_path, max_size=max_size)
+        cache = _caches[file_path]
+        cache.max_size = max_size
+
+    return cache
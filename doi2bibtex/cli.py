@@ -7,16 +7,19 @@ Provide a command line interface for doi2bibtex.
 # -----------------------------------------------------------------------------
 
 from argparse import ArgumentParser, Namespace
-from typing import Any
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
 
+import atexit
+import json
 import sys
 
-from rich.console import Console, Text
-from rich.syntax import Syntax
-
 from doi2bibtex import __version__
+from doi2bibtex.cache import get_cache_file_path, get_response_cache
 from doi2bibtex.config import Configuration
-from doi2bibtex.resolve import resolve_identifier
+from doi2bibtex.daemon import resolve_with_daemon, serve
+from doi2bibtex.network import get_failure_ttls, get_ttl
+from doi2bibtex.profiling import start_profiling, stop_profiling
 
 
 # -----------------------------------------------------------------------------
@@ -30,16 +33,95 @@ def parse_cli_args(args: Any = None) -> Namespace:
 
     parser = ArgumentParser()
     parser.add_argument(
-        "identifier",
+        "identifiers",
         metavar="IDENTIFIER",
-        nargs='?',
-        help="Identifier to resolve (DOI or arXiv ID).",
+        nargs='*',
+        help=(
+            "Identifier(s) to resolve (DOI or arXiv ID). If more than one "
+            "identifier is given, they are resolved in batch mode."
+        ),
+    )
+    parser.add_argument(
+        "--file",
+        "-f",
+        type=Path,
+        help=(
+            "File with identifiers to resolve in batch mode (one per line; "
+            "empty lines and lines starting with '#' are ignored)."
+        ),
+    )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help=(
+            "Read identifiers line by line from stdin and print every "
+            "result as soon as it is available (streaming mode)."
+        ),
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=4,
+        help="Number of identifiers to resolve concurrently in batch mode.",
+    )
+    parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help=(
+            "In streaming mode, print the results in the order in which they "
+            "are finished instead of the order of the input."
+        ),
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help=(
+            "In streaming mode, print one JSON record per line instead of "
+            "BibTeX entries."
+        ),
     )
     parser.add_argument(
         "--plain",
         action="store_true",
         help="Print result plain text. Useful for piping to other programs.",
     )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help=(
+            "Send the identifiers to a running `d2b serve` daemon and print "
+            "the result as plain text. If no daemon is running, resolve "
+            "them in this process instead."
+        ),
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Print a breakdown of where the time was spent (requests to the "
+            "backends, parsing, post-processing steps, ...) to stderr. In "
+            "batch and streaming mode, also report the peak memory usage."
+        ),
+    )
+    parser.add_argument(
+        "--profile-trace",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "Write the timeline of the run to FILE in the Chrome trace "
+            "format (for chrome://tracing or Perfetto). Implies --profile."
+        ),
+    )
+    parser.add_argument(
+        "--profile-json",
+        type=Path,
+        metavar="FILE",
+        help=(
+            "Write the timeline and the breakdown of the run to FILE as "
+            "JSON. Implies --profile."
+        ),
+    )
     parser.add_argument(
         "--version",
         action="store_true",
@@ -49,11 +131,435 @@ def parse_cli_args(args: Any = None) -> Namespace:
     return parsed_args
 
 
+def parse_cache_args(args: Any = None) -> Namespace:
+    """
+    Parse the command line arguments for `d2b cache`.
+    """
+
+    parser = ArgumentParser(prog="d2b cache")
+    parser.add_argument(
+        "action",
+        choices=["stats", "prune", "clear"],
+        help=(
+            "Show cache statistics, remove expired entries, or remove all "
+            "entries from the cache."
+        ),
+    )
+    parsed_args = parser.parse_args(args)
+    return parsed_args
+
+
+def parse_serve_args(args: Any = None) -> Namespace:
+    """
+    Parse the command line arguments for `d2b serve`.
+    """
+
+    parser = ArgumentParser(
+        prog="d2b serve",
+        description=(
+            "Run a resident daemon that resolves identifiers for `d2b "
+            "--daemon` over a Unix socket (~/.doi2bibtex/d2b.sock)."
+        ),
+    )
+    parsed_args = parser.parse_args(args)
+    return parsed_args
+
+
+def parse_http_args(args: Any = None) -> Namespace:
+    """
+    Parse the command line arguments for `d2b http`.
+    """
+
+    parser = ArgumentParser(
+        prog="d2b http",
+        description=(
+            "Run an HTTP server with a JSON API for resolving identifiers "
+            "(endpoints: /health, /resolve, /batch)."
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on.",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8080,
+        help="Port to listen on.",
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=16,
+        help=(
+            "Maximum number of identifiers of a batch request to resolve "
+            "concurrently (the `jobs` of a request are limited to this)."
+        ),
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every request to stderr.",
+    )
+    parsed_args = parser.parse_args(args)
+    return parsed_args
+
+
+def parse_aux_args(args: Any = None) -> Namespace:
+    """
+    Parse the command line arguments for `d2b aux`.
+    """
+
+    parser = ArgumentParser(
+        prog="d2b aux",
+        description=(
+            "Resolve all citations in a LaTeX file whose keys are DOIs, "
+            "arXiv IDs, ADS bibcodes or ISBNs and that are not yet in the "
+            "given .bib file, and append them to it."
+        ),
+    )
+    parser.add_argument(
+        "file",
+        type=Path,
+        help="LaTeX file with the citations (.aux or .tex).",
+    )
+    parser.add_argument(
+        "--bib",
+        type=Path,
+        required=True,
+        help="BibTeX file to which the missing entries are appended.",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=4,
+        help="Number of identifiers to resolve concurrently.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the missing citations, do not resolve them.",
+    )
+    parsed_args = parser.parse_args(args)
+    return parsed_args
+
+
+def aux_command(
+    file_path: Path,
+    bib_path: Path,
+    config: Configuration,
+    n_jobs: int,
+    dry_run: bool = False,
+) -> int:
+    """
+    Run the `d2b aux` command: find the citations in the given LaTeX
+    file that are missing from the .bib file, resolve them (using the
+    citation key as the key of the BibTeX entry), and append them to
+    the .bib file. Returns the number of failures.
+    """
+
+    from doi2bibtex.bibfile import (
+        append_entries,
+        get_missing_identifiers,
+        read_bib_keys,
+        read_citation_keys,
+        set_citekey,
+    )
+    from doi2bibtex.resolve import make_result, resolve_identifiers
+
+    # Find the citations that are not in the .bib file yet
+    citation_keys = read_citation_keys(file_path)
+    bib_keys = read_bib_keys(bib_path)
+    missing = get_missing_identifiers(citation_keys, bib_keys)
+    n_unknown = sum(
+        1 for _ in citation_keys if _ not in bib_keys and _ not in missing
+    )
+    sys.stderr.write(
+        f"Found {len(citation_keys)} citations, {len(missing)} of them need "
+        f"to be resolved.\n"
+    )
+    if n_unknown:
+        sys.stderr.write(
+            f"Skipping {n_unknown} missing citations that are not a DOI, "
+            f"arXiv ID, ADS bibcode or ISBN.\n"
+        )
+
+    if dry_run:
+        for key in missing:
+            sys.stdout.write(key + "\n")
+        return 0
+
+    # Resolve the missing citations and append them to the .bib file
+    results = resolve_identifiers(missing, config, n_jobs=n_jobs)
+    entries = []
+    n_failed = 0
+    for key, result in zip(missing, results):
+        record = make_result(key, result)
+        if "bibtex" in record:
+            entries.append(set_citekey(record["bibtex"], key))
+        else:
+            n_failed += 1
+            sys.stderr.write(f'Failed to resolve "{key}": {record["error"]}\n')
+    append_entries(bib_path, entries)
+    sys.stderr.write(f"Added {len(entries)} entries to {bib_path}.\n")
+
+    return n_failed
+
+
+def parse_sync_args(args: Any = None) -> Namespace:
+    """
+    Parse the command line arguments for `d2b sync`.
+    """
+
+    parser = ArgumentParser(
+        prog="d2b sync",
+        description=(
+            "Resolve all identifiers from a file that are not yet in the "
+            "given .bib file (by DOI, arXiv ID, ADS bibcode or ISBN), and "
+            "append them to it."
+        ),
+    )
+    parser.add_argument(
+        "bib",
+        type=Path,
+        help="BibTeX file to which the missing entries are appended.",
+    )
+    parser.add_argument(
+        "file",
+        type=Path,
+        help="File with identifiers (one per line).",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=4,
+        help="Number of identifiers to resolve concurrently.",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only print the missing identifiers, do not resolve them.",
+    )
+    parsed_args = parser.parse_args(args)
+    return parsed_args
+
+
+def sync_command(
+    bib_path: Path,
+    file_path: Path,
+    config: Configuration,
+    n_jobs: int,
+    dry_run: bool = False,
+) -> int:
+    """
+    Run the `d2b sync` command: find the identifiers in the given file
+    that are not yet in the .bib file (using a cached index, see
+    `load_bib_index()`), resolve them, and append them to the .bib
+    file. Returns the number of failures.
+    """
+
+    from doi2bibtex.bibfile import (
+        add_identifier_field,
+        append_entries,
+        extract_index_keys,
+        get_index_key,
+        load_bib_index,
+        save_bib_index,
+    )
+    from doi2bibtex.resolve import make_result, resolve_identifiers
+
+    # Find the identifiers that are not in the .bib file yet (without
+    # duplicates, e.g., the same DOI in upper and lower case)
+    identifiers = read_identifiers_file(file_path)
+    index = load_bib_index(bib_path)
+    missing = []
+    n_failed = 0
+    for identifier in identifiers:
+        if (key := get_index_key(identifier)) is None:
+            n_failed += 1
+            sys.stderr.write(
+                f'Failed to resolve "{identifier}": '
+                f"Unrecognized identifier: {identifier}\n"
+            )
+        elif key not in index:
+            index.add(key)
+            missing.append(identifier)
+    sys.stderr.write(
+        f"Found {len(identifiers)} identifiers, {len(missing)} of them need "
+        f"to be resolved.\n"
+    )
+
+    if dry_run:
+        for identifier in missing:
+            sys.stdout.write(identifier + "\n")
+        return n_failed
+
+    # Resolve the missing identifiers and append them to the .bib file
+    results = resolve_identifiers(missing, config, n_jobs=n_jobs)
+    entries = []
+    for identifier, result in zip(missing, results):
+        record = make_result(identifier, result)
+        if "bibtex" in record:
+            # Keep the identifier in the entry, so that it is found again
+            # when the index is rebuilt (e.g., after the file was edited)
+            entry = add_identifier_field(record["bibtex"], identifier)
+            entries.append(entry)
+            index |= extract_index_keys(entry)
+        else:
+            n_failed += 1
+            index.discard(str(get_index_key(identifier)))
+            sys.stderr.write(
+                f'Failed to resolve "{identifier}": {record["error"]}\n'
+            )
+    append_entries(bib_path, entries)
+    sys.stderr.write(f"Added {len(entries)} entries to {bib_path}.\n")
+
+    # Update the cached index, so that it does not need to be rebuilt
+    if bib_path.exists():
+        save_bib_index(bib_path, index)
+
+    return n_failed
+
+
+def cache_command(action: str, config: Configuration) -> None:
+    """
+    Run the `d2b cache` command: show statistics about the on-disk
+    response cache, remove expired entries, or clear it completely.
+    """
+
+    cache = get_response_cache(
+        max_size=int(config.cache_max_size_mb * 1024 * 1024)
+    )
+
+    if action == "stats":
+        stats = cache.stats()
+        total_entries = sum(_["entries"] for _ in stats.values())
+        total_size = sum(_["size"] for _ in stats.values())
+        sys.stdout.write(f"Cache file: {get_cache_file_path()}\n")
+        for backend, backend_stats in stats.items():
+            sys.stdout.write(
+                f"  {backend:<14}{backend_stats['entries']:>8} entries"
+                f"{backend_stats['size'] / 1024:>12.1f} KiB\n"
+            )
+        sys.stdout.write(
+            f"  {'total':<14}{total_entries:>8} entries"
+            f"{total_size / 1024:>12.1f} KiB\n"
+        )
+
+    elif action == "prune":
+        ttls = {_: get_ttl(_, config) for _ in config.cache_ttl_days}
+        n_removed = cache.prune(
+            ttls=ttls, failure_ttls=get_failure_ttls(config)
+        )
+        sys.stdout.write(f"Removed {n_removed} entries from the cache.\n")
+
+    elif action == "clear":
+        n_removed = cache.clear()
+        sys.stdout.write(f"Removed {n_removed} entries from the cache.\n")
+
+
+def read_identifiers_file(file_path: Path) -> List[str]:
+    """
+    Read a list of identifiers from the given file (one per line).
+    Empty lines and lines starting with "#" are ignored.
+    """
+
+    with open(file_path, "r") as text_file:
+        lines = [line.strip() for line in text_file]
+
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def batch(identifiers: List[str], config: Configuration, n_jobs: int) -> int:
+    """
+    Resolve multiple identifiers concurrently and print the results as
+    plain text (in the order of the input). Identifiers that could not
+    be resolved are reported on stderr. Returns the number of failures.
+    """
+
+    from doi2bibtex.resolve import resolve_identifiers
+
+    # Resolve all identifiers using a pool of `n_jobs` workers
+    results = resolve_identifiers(identifiers, config, n_jobs=n_jobs)
+
+    return print_results(identifiers, results)
+
+
+def print_results(identifiers: List[str], results: List[str]) -> int:
+    """
+    Print the `results` for the given `identifiers` as plain text (see
+    `batch()`) and return the number of failures.
+    """
+
+    from doi2bibtex.resolve import make_result
+
+    n_failed = 0
+    for identifier, result in zip(identifiers, results):
+        record = make_result(identifier, result)
+        if "bibtex" in record:
+            sys.stdout.write(record["bibtex"] + "\n\n")
+        else:
+            n_failed += 1
+            sys.stderr.write(
+                f'Failed to resolve "{identifier}": {record["error"]}\n'
+            )
+
+    return n_failed
+
+
+def stream(
+    lines: Iterable[str],
+    config: Configuration,
+    n_jobs: int,
+    ordered: bool = True,
+    as_json: bool = False,
+) -> int:
+    """
+    Resolve the identifiers from the given `lines` (e.g., `sys.stdin`)
+    and print every result as soon as it is available: either as plain
+    text (see `batch()`), or as one JSON record per line. Empty lines
+    and lines starting with "#" are skipped. The input is consumed
+    lazily, so it can be arbitrarily large. Returns the number of
+    failures.
+    """
+
+    from doi2bibtex.resolve import make_result, resolve_stream
+
+    identifiers = (
+        line.strip()
+        for line in lines
+        if line.strip() and not line.strip().startswith("#")
+    )
+
+    n_failed = 0
+    for identifier, result in resolve_stream(
+        identifiers, config, n_jobs=n_jobs, ordered=ordered
+    ):
+        record = make_result(identifier, result)
+        n_failed += "error" in record
+        if as_json:
+            sys.stdout.write(json.dumps(record) + "\n")
+        elif "bibtex" in record:
+            sys.stdout.write(record["bibtex"] + "\n\n")
+        else:
+            sys.stderr.write(
+                f'Failed to resolve "{identifier}": {record["error"]}\n'
+            )
+        sys.stdout.flush()
+
+    return n_failed
+
+
 def plain(identifier: str, config: Configuration) -> None:
     """
     Print the result plain text.
     """
 
+    from doi2bibtex.resolve import resolve_identifier
+
     # Get the BibTeX entry from the identifier
     bibtex = resolve_identifier(identifier=identifier, config=config)
 
@@ -66,6 +572,11 @@ def fancy(identifier: str, config: Configuration) -> None:
     Print the result as a fancy rich console output.
     """
 
+    from rich.console import Console, Text
+    from rich.syntax import Syntax
+
+    from doi2bibtex.resolve import resolve_identifier
+
     # Set up a rich Console for some fancy output
     console = Console()
     text = Text("\nd2b: Resolve DOIs and arXiv IDs to BibTeX\n", style="bold")
@@ -90,22 +601,143 @@ def fancy(identifier: str, config: Configuration) -> None:
     console.print("\n")
 
 
+def report_profile(
+    trace_path: Optional[Path] = None,
+    json_path: Optional[Path] = None,
+) -> None:
+    """
+    Stop the profiler (see `--profile`), print the breakdown to stderr,
+    and write the timeline to `trace_path` (Chrome trace format) and /
+    or `json_path` (plain JSON), if given.
+    """
+
+    if (profiler := stop_profiling()) is None:
+        return
+
+    sys.stderr.write(profiler.format_summary() + "\n")
+    if trace_path is not None:
+        with open(trace_path, "w") as json_file:
+            json.dump(profiler.to_chrome_trace(), json_file)
+    if json_path is not None:
+        with open(json_path, "w") as json_file:
+            json.dump(profiler.to_timeline(), json_file, indent=2)
+
+
 def main() -> None:  # pragma: no cover
     """
     Get identifier from the command line and resolve it.
     """
 
-    # Get command line arguments and load the configuration
+    # Handle the `d2b cache ...` command
+    if sys.argv[1:2] == ["cache"]:
+        cache_args = parse_cache_args(sys.argv[2:])
+        cache_command(action=cache_args.action, config=Configuration())
+        sys.exit(0)
+
+    # Handle the `d2b serve` command
+    if sys.argv[1:2] == ["serve"]:
+        parse_serve_args(sys.argv[2:])
+        serve(config=Configuration())
+        sys.exit(0)
+
+    # Handle the `d2b aux ...` command
+    if sys.argv[1:2] == ["aux"]:
+        aux_args = parse_aux_args(sys.argv[2:])
+        n_failed = aux_command(
+            file_path=aux_args.file,
+            bib_path=aux_args.bib,
+            config=Configuration(),
+            n_jobs=aux_args.jobs,
+            dry_run=aux_args.dry_run,
+        )
+        sys.exit(1 if n_failed else 0)
+
+    # Handle the `d2b sync ...` command
+    if sys.argv[1:2] == ["sync"]:
+        sync_args = parse_sync_args(sys.argv[2:])
+        n_failed = sync_command(
+            bib_path=sync_args.bib,
+            file_path=sync_args.file,
+            config=Configuration(),
+            n_jobs=sync_args.jobs,
+            dry_run=sync_args.dry_run,
+        )
+        sys.exit(1 if n_failed else 0)
+
+    # Handle the `d2b http` command
+    if sys.argv[1:2] == ["http"]:
+        from doi2bibtex.server import serve_http
+        http_args = parse_http_args(sys.argv[2:])
+        serve_http(
+            config=Configuration(),
+            host=http_args.host,
+            port=http_args.port,
+            verbose=http_args.verbose,
+            max_jobs=http_args.max_jobs,
+        )
+        sys.exit(0)
+
+    # Get command line arguments
     args = parse_cli_args(sys.argv[1:])
-    config = Configuration()
 
-    # Print the version number and exit if requested
+    # Print the version number and exit if requested (before loading the
+    # configuration, so that this is as fast as possible)
     if args.version:
         print(__version__)
         sys.exit(0)
 
-    # Either print the result as plain text, or make it fancy
+    # If requested, profile the run and report the results at exit (the
+    # peak memory is only measured for batch runs, because it is slow)
+    if args.profile or args.profile_trace or args.profile_json:
+        start_profiling(
+            trace_memory=(
+                args.stdin
+                or args.file is not None
+                or len(args.identifiers) > 1
+            )
+        )
+        atexit.register(report_profile, args.profile_trace, args.profile_json)
+
+    # In streaming mode, read the identifiers from stdin one by one
+    if args.stdin:
+        n_failed = stream(
+            lines=sys.stdin,
+            config=Configuration(),
+            n_jobs=args.jobs,
+            ordered=not args.unordered,
+            as_json=args.json,
+        )
+        sys.exit(1 if n_failed else 0)
+
+    # Collect the identifiers from the command line and the input file
+    identifiers = list(args.identifiers)
+    if args.file is not None:
+        identifiers += read_identifiers_file(args.file)
+    is_batch = len(identifiers) > 1 or args.file is not None
+
+    # If requested, let the daemon resolve the identifiers (this does not
+    # even need to load the configuration)
+    if args.daemon:
+        results = resolve_with_daemon(identifiers or [""], n_jobs=args.jobs)
+        if results is not None and is_batch:
+            n_failed = print_results(identifiers, results)
+            sys.exit(1 if n_failed else 0)
+        if results is not None:
+            sys.stdout.write(results[0] + "\n")
+            sys.exit(0)
+        args.plain = True
+
+    # Load the configuration
+    config = Configuration()
+
+    # If we have more than one identifier (or an input file), use batch mode
+    if is_batch:
+        n_failed = batch(identifiers, config=config, n_jobs=args.jobs)
+        sys.exit(1 if n_failed else 0)
+
+    # Otherwise, either print the result as plain text, or make it fancy
+    identifier = identifiers[0] if identifiers else ""
     if args.plain:
-        plain(identifier=args.identifier, config=config)
+        plain(identifier=identifier, config=config)
     else:
-        fancy(identifier=args.identifier, config=config)
+        fancy(identifier=identifier, config=config)
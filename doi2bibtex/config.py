@@ -7,11 +7,10 @@ Handle configuration.
 # -----------------------------------------------------------------------------
 
 from pathlib import Path
-from typing import Dict, List
+from threading import Lock
+from typing import Dict, List, Optional
 from warnings import warn
 
-import yaml
-
 
 # -----------------------------------------------------------------------------
 # DEFINITIONS
@@ -23,22 +22,59 @@ class Configuration:
 
         # Define the default configuration
         self.abbreviate_journal_names: bool = True
+        self.arxiv_backend: str = "arxiv2bibtex"
+        self.base_urls: Dict[str, str] = {}
+        self.cache_max_size_mb: float = 256
+        self.cache_ttl_days: Dict[str, float] = {
+            "ads": 7,
+            "arxiv": 7,
+            "crossref": 30,
+            "dblp": 7,
+            "google_books": 30,
+            "open_library": 30,
+        }
         self.citekey_delimiter: str = "_"
         self.convert_latex_chars: bool = True
         self.convert_month_to_number: bool = True
         self.crossmatch_with_dblp: bool = False
+        self.crossref_mailto: str = ""
+        self.doi_backend: str = "crossref-bibtex"
         self.fix_arxiv_entrytype: bool = True
         self.format_author_names: bool = True
         self.generate_citekey: bool = True
+        self.hedge_requests: bool = False
+        self.isbn_backends: List[str] = ["google-books"]
         self.limit_authors: int = 1000
+        self.max_connections_per_host: int = 8
+        self.max_retries: int = 2
+        self.negative_cache_ttl_hours: Dict[str, float] = {
+            "permanent": 24,
+            "transient": 0,
+        }
+        self.proxies: Dict[str, str] = {}
         self.pygments_theme: str = "dracula"
+        self.rate_limit_retries: int = 3
+        self.rate_limits: Dict[str, float] = {
+            "api.adsabs.harvard.edu": 5,
+            "api.crossref.org": 10,
+            "arxiv2bibtex.org": 5,
+            "dblp.org": 1,
+            "export.arxiv.org": 0.34,
+            "openlibrary.org": 1,
+            "www.googleapis.com": 5,
+        }
         self.remove_fields: Dict[str, List[str]] = {
             "all": ["abstract"],
             "article": ["publisher"]
         }
         self.remove_url_if_doi: bool = True
         self.resolve_adsurl: bool = True
+        self.timeouts: Dict[str, List[float]] = {
+            "all": [5, 30],
+            "dblp": [5, 10],
+        }
         self.update_arxiv_if_doi: bool = True
+        self.use_cache: bool = True
 
         # Load the configuration from the config file
         self.load_from_yaml_file()
@@ -57,6 +93,7 @@ class Configuration:
             return
 
         # Load the configuration from the file
+        import yaml
         with open(file_path, "r") as yaml_file:
             config = yaml.safe_load(yaml_file)
 
@@ -70,3 +107,23 @@ class Configuration:
                 setattr(self, key, value)
             else:
                 warn(f'Warning: Ignoring unknown configuration key "{key}"!')
+
+
+# The default configuration (see `get_default_config()`)
+_default_config: Optional[Configuration] = None
+_default_config_lock = Lock()
+
+
+def get_default_config() -> Configuration:
+    """
+    Get the configuration that is used when no configuration is given
+    (e.g., for `network.request()`). It is loaded from the config file
+    only once, instead of for every call.
+    """
+
+    global _default_config
+
+    with _default_config_lock:
+        if _default_config is None:
+            _default_config = Configuration()
+        return _default_config
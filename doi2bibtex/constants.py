@@ -6,6 +6,25 @@ Define constants.
 # DEFINITIONS
 # -----------------------------------------------------------------------------
 
+# Maximum number of bibcodes per request to the ADS export API
+ADS_EXPORT_MAX_BIBCODES = 2000
+
+# Maximum number of identifiers that are combined into one ADS search query
+ADS_SEARCH_MAX_IDENTIFIERS = 50
+
+# Maximum number of arXiv IDs per request to the arXiv API (`id_list`)
+ARXIV_MAX_IDS = 100
+
+# Maximum number of DOIs that are combined into one Crossref `/works` query
+CROSSREF_MAX_DOIS = 50
+
+# Maximum number of ISBNs that are combined into one Google Books query (the
+# API returns at most 40 volumes, and some ISBNs match more than one)
+GOOGLE_BOOKS_MAX_ISBNS = 20
+
+# Maximum number of ISBNs per request to the Open Library API (`bibkeys`)
+OPEN_LIBRARY_MAX_ISBNS = 50
+
 JOURNAL_ABBREVIATIONS = {
     r"American Institute of Physics Conference Proceedings": r"\aipconf",
     r"Annual Review of Astronomy & Astrophysics": r"\araa",
@@ -0,0 +1,306 @@
+"""
+Resolve DOIs using the JSON metadata from the Crossref `/works` API.
+
+Unlike the BibTeX transform that is used by `resolve.resolve_doi()`,
+the `/works` API allows us to request only the fields that we actually
+need (`select=...`) and to query many DOIs at once (`filter=doi:...`).
+The BibTeX entries are then constructed locally. DOIs that contain a
+comma cannot be used in a filter (which is a comma-separated list), so
+they are requested one by one (`/works/{doi}`).
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from html import unescape
+from typing import Dict, List, Optional, TYPE_CHECKING
+from urllib.parse import quote, urlencode
+
+import json
+import re
+
+from doi2bibtex import network
+from doi2bibtex.config import Configuration
+from doi2bibtex.constants import CROSSREF_MAX_DOIS
+from doi2bibtex.utils import doi_to_url
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+# Fields of the Crossref metadata that we need to construct a BibTeX entry
+CROSSREF_SELECT = [
+    "DOI",
+    "author",
+    "container-title",
+    "issue",
+    "issued",
+    "page",
+    "published",
+    "publisher",
+    "title",
+    "type",
+    "volume",
+]
+
+# Map the Crossref work types to BibTeX entry types
+CROSSREF_ENTRYTYPES = {
+    "book": "book",
+    "book-chapter": "incollection",
+    "book-part": "incollection",
+    "book-section": "incollection",
+    "dissertation": "phdthesis",
+    "edited-book": "book",
+    "journal-article": "article",
+    "monograph": "book",
+    "proceedings-article": "inproceedings",
+    "reference-book": "book",
+    "report": "techreport",
+}
+
+MONTHS = [
+    "jan", "feb", "mar", "apr", "may", "jun",
+    "jul", "aug", "sep", "oct", "nov", "dec",
+]
+
+
+def get_crossref_works_url(dois: List[str]) -> str:
+    """
+    Get the URL of a `/works` query for the given `dois`.
+    """
+
+    query = urlencode(
+        {
+            "filter": ",".join(f"doi:{_}" for _ in dois),
+            "select": ",".join(CROSSREF_SELECT),
+            "rows": len(dois),
+        }
+    )
+
+    return f"https://api.crossref.org/works?{query}"
+
+
+def get_crossref_work_url(doi: str) -> str:
+    """
+    Get the URL of the `/works/{doi}` query for a single `doi` (which is
+    needed for DOIs that cannot be part of a filter, see above).
+    """
+
+    return f"https://api.crossref.org/works/{quote(doi)}"
+
+
+def escape_latex(text: str) -> str:
+    """
+    Convert a string from the Crossref metadata (which may contain HTML
+    entities and tags) to something that we can put in a BibTeX field.
+    """
+
+    text = re.sub(r"<[^>]+>", "", unescape(text))
+    text = re.sub(r"(?<!\\)([&%#])", r"\\\1", text)
+    text = re.sub(r"\s+", " ", text)
+
+    return text.strip()
+
+
+def crossref_work_to_bibtex_dict(work: dict) -> dict:
+    """
+    Construct a BibTeX dict from the Crossref metadata of a `work`.
+    The result mimics the output of the Crossref BibTeX transform, so
+    that it can be passed to `postprocess_bibtex()` in the same way.
+    """
+
+    entrytype = CROSSREF_ENTRYTYPES.get(work.get("type", ""), "misc")
+    bibtex_dict = {"ENTRYTYPE": entrytype}
+
+    # Authors are given as "Firstname Lastname"; organizations only have
+    # a `name`, which we protect with braces
+    authors = []
+    for author in work.get("author", []):
+        if "family" in author:
+            name = (author.get("given", "") + " " + author["family"]).strip()
+        else:
+            name = "{" + author.get("name", "") + "}"
+        authors.append(escape_latex(name))
+    if authors:
+        bibtex_dict["author"] = " and ".join(authors)
+
+    # Add the title and the journal / book title
+    if title := work.get("title"):
+        bibtex_dict["title"] = escape_latex(title[0])
+    if container_title := work.get("container-title"):
+        field = "journal" if entrytype == "article" else "booktitle"
+        bibtex_dict[field] = escape_latex(container_title[0])
+
+    # Add the simple fields
+    for source, target in (
+        ("volume", "volume"),
+        ("issue", "number"),
+        ("page", "pages"),
+        ("publisher", "publisher"),
+    ):
+        if value := work.get(source):
+            bibtex_dict[target] = escape_latex(str(value))
+
+    # Add the publication date (year and month)
+    date = (work.get("published") or work.get("issued") or {})
+    date_parts = (date.get("date-parts") or [[]])[0]
+    if date_parts and date_parts[0] is not None:
+        bibtex_dict["year"] = str(date_parts[0])
+    if (
+        len(date_parts) > 1
+        and date_parts[1] is not None
+        and 1 <= int(date_parts[1]) <= 12
+    ):
+        bibtex_dict["month"] = MONTHS[int(date_parts[1]) - 1]
+
+    # Add the DOI and the corresponding URL
+    bibtex_dict["doi"] = work["DOI"]
+    bibtex_dict["url"] = doi_to_url(work["DOI"])
+
+    # Use the same citekey format as the Crossref BibTeX transform
+    family = (work.get("author") or [{}])[0].get("family", "")
+    bibtex_dict["ID"] = (
+        f"{family}_{bibtex_dict['year']}"
+        if family and "year" in bibtex_dict
+        else work["DOI"]
+    )
+
+    return bibtex_dict
+
+
+def parse_crossref_works_response(
+    r: network.Response,
+    dois: List[str],
+) -> Dict[str, dict]:
+    """
+    Parse the response of a `/works` query into a dict that maps the
+    given `dois` to BibTeX dicts. DOIs that were not found are skipped.
+    """
+
+    if (error := r.status_code) != 200:
+        raise network.ResolveError(
+            f"Error {error} resolving {len(dois)} DOIs", error
+        )
+
+    # DOIs are case-insensitive, so we need to match them in lowercase
+    works = {
+        work["DOI"].lower(): work
+        for work in json.loads(r.text)["message"]["items"]
+    }
+
+    return {
+        doi: crossref_work_to_bibtex_dict(works[doi.lower()])
+        for doi in dois
+        if doi.lower() in works
+    }
+
+
+def parse_crossref_work_response(
+    r: network.Response,
+    doi: str,
+) -> Dict[str, dict]:
+    """
+    Parse the response of a `/works/{doi}` query in the same way as
+    `parse_crossref_works_response()`, i.e., into a dict that maps the
+    given `doi` to a BibTeX dict (or an empty dict, if it was not found).
+    """
+
+    if (error := r.status_code) == 404:
+        return {}
+    if error != 200:
+        raise network.ResolveError(
+            f'Error {error} resolving DOI "{doi}"', error
+        )
+
+    return {doi: crossref_work_to_bibtex_dict(json.loads(r.text)["message"])}
+
+
+def resolve_dois_with_crossref_json(
+    dois: List[str],
+    config: Optional[Configuration] = None,
+    chunk_size: int = CROSSREF_MAX_DOIS,
+) -> Dict[str, dict]:
+    """
+    Resolve multiple `dois` using the Crossref `/works` API, with (at
+    most) `chunk_size` DOIs per request. Returns a dict that maps the
+    given DOIs to BibTeX dicts; DOIs that were not found are skipped.
+    DOIs that contain a comma are requested one by one.
+    """
+
+    # Remove duplicates (but keep the order, so that requests are cacheable)
+    dois = list(dict.fromkeys(dois))
+
+    # DOIs with a comma are requested one by one
+    results: Dict[str, dict] = {}
+    for doi in [_ for _ in dois if "," in _]:
+        r = network.get(
+            url=get_crossref_work_url(doi),
+            backend="crossref",
+            config=config,
+        )
+        results.update(parse_crossref_work_response(r, doi))
+
+    dois = [_ for _ in dois if "," not in _]
+    for i in range(0, len(dois), chunk_size):
+        chunk = dois[i:i + chunk_size]
+        r = network.get(
+            url=get_crossref_works_url(chunk),
+            backend="crossref",
+            config=config,
+        )
+        results.update(parse_crossref_works_response(r, chunk))
+
+    return results
+
+
+def resolve_doi_with_crossref_json(
+    doi: str,
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Resolve a single `doi` using the Crossref `/works` API.
+    """
+
+    if (bibtex_dict := resolve_dois_with_crossref_json([doi], config)):
+        return bibtex_dict[doi]
+
+    raise network.ResolveError(
+        f'Error resolving DOI "{doi}": no BibTeX entry found'
+    )
+
+
+async def resolve_doi_with_crossref_json_async(
+    doi: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_doi_with_crossref_json()`.
+    """
+
+    # DOIs with a comma cannot be used in a filter (see above)
+    has_comma = "," in doi
+    r = await network.get_async(
+        url=(
+            get_crossref_work_url(doi) if has_comma
+            else get_crossref_works_url([doi])
+        ),
+        backend="crossref",
+        client=client,
+        config=config,
+    )
+    bibtex_dict = (
+        parse_crossref_work_response(r, doi) if has_comma
+        else parse_crossref_works_response(r, [doi])
+    )
+    if bibtex_dict:
+        return bibtex_dict[doi]
+
+    raise network.ResolveError(
+        f'Error resolving DOI "{doi}": no BibTeX entry found'
+    )
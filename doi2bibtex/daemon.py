@@ -0,0 +1,186 @@
+"""
+Keep a resident `d2b serve` process that resolves identifiers for
+(thin) clients over a Unix socket.
+
+Every call of `d2b` needs to start an interpreter, import modules,
+load the configuration and open new HTTP connections. The daemon does
+all of this only once and then keeps the configuration, the shared
+HTTP sessions and the response cache warm. The protocol is very simple:
+the client sends one JSON object per line (`{"identifiers": [...]}`),
+and the daemon answers with one JSON object per line (`{"results":
+[...]}`, where every result is the same as for `resolve_identifier()`).
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+
+from doi2bibtex.config import Configuration
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+def get_socket_path() -> Path:
+    """
+    Get the path to the socket of the daemon (`~/.doi2bibtex/d2b.sock`).
+    """
+
+    return Path.home() / ".doi2bibtex" / "d2b.sock"
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handle a client connection: every line that the client sends is a
+    request, and every request is answered with exactly one line.
+    """
+
+    server: "DaemonServer"
+
+    def handle(self) -> None:
+
+        from doi2bibtex.resolve import resolve_identifiers
+
+        for line in self.rfile:
+            response: Dict[str, Any]
+            try:
+                request = json.loads(line)
+                results = resolve_identifiers(
+                    identifiers=[str(_) for _ in request["identifiers"]],
+                    config=self.server.config,
+                    n_jobs=int(request.get("jobs", 4)),
+                )
+                response = {"results": results}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """
+    A Unix socket server that handles every client in its own thread
+    and holds the `config` that is used for all requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, config: Configuration) -> None:
+
+        self.config = config
+
+        # Only the current user should be able to connect to the socket
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), DaemonRequestHandler)
+        finally:
+            os.umask(umask)
+
+
+def is_daemon_running(socket_path: Optional[Path] = None) -> bool:
+    """
+    Check if a daemon is listening on the given `socket_path`.
+    """
+
+    socket_path = socket_path if socket_path is not None else get_socket_path()
+
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        return False
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(1.0)
+            client.connect(str(socket_path))
+    except OSError:
+        return False
+
+    return True
+
+
+def serve(
+    config: Configuration,
+    socket_path: Optional[Path] = None,
+) -> None:
+    """
+    Run the daemon on the given `socket_path` until it is interrupted.
+    """
+
+    socket_path = socket_path if socket_path is not None else get_socket_path()
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise RuntimeError("The daemon requires support for Unix sockets!")
+
+    # Import everything that is needed for resolving identifiers now, so
+    # that the first request does not need to wait for it
+    import doi2bibtex.resolve  # noqa: F401
+
+    # Remove the socket of a daemon that was not shut down cleanly
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        if is_daemon_running(socket_path):
+            raise RuntimeError(f"A daemon is already running on {socket_path}")
+        socket_path.unlink()
+
+    # Make sure the socket is also removed when the daemon is terminated
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    with DaemonServer(socket_path, config) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if socket_path.exists():
+                socket_path.unlink()
+
+
+def resolve_with_daemon(
+    identifiers: List[str],
+    n_jobs: int = 4,
+    socket_path: Optional[Path] = None,
+) -> Optional[List[str]]:
+    """
+    Send the `identifiers` to the daemon and return the results, or
+    None if no daemon is running (or the request failed), in which case
+    the caller should resolve the identifiers in-process instead.
+    """
+
+    socket_path = socket_path if socket_path is not None else get_socket_path()
+
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        return None
+
+    request = {"identifiers": identifiers, "jobs": n_jobs}
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+
+            # Only use a timeout for connecting: resolving can take a while
+            client.settimeout(1.0)
+            client.connect(str(socket_path))
+            client.settimeout(None)
+
+            client.sendall((json.dumps(request) + "\n").encode("utf-8"))
+            with client.makefile("rb") as socket_file:
+                line = socket_file.readline()
+
+    except OSError:
+        return None
+
+    try:
+        results = json.loads(line)["results"]
+    except (ValueError, KeyError):
+        return None
+
+    return [str(_) for _ in results]
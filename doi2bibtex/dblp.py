@@ -6,45 +6,101 @@ Handle interactions with dlbp.org.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-import requests
+from typing import Optional, TYPE_CHECKING
+
 import json
 
-from bibtexparser.customization import splitname
+from doi2bibtex import network
+from doi2bibtex.config import Configuration
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
 
 
 # -----------------------------------------------------------------------------
 # DEFINITIONS
 # -----------------------------------------------------------------------------
 
-def crossmatch_with_dblp(
-    bibtex_dict: dict,
-    identifier: str,
-) -> dict:
+def get_dblp_search_url(bibtex_dict: dict) -> Optional[str]:
     """
-    Cross-match the given BibTeX entry with the dblp database to check
-    if there is a matching conference paper. If so, add the venue and
-    year of the conference paper to the BibTeX entry.
-    Note: This function usually only makes sense for arXiv preprints.
+    Get the URL of the dblp search query for the given BibTeX entry, or
+    None if the entry does not have the information that we need.
     """
 
     # If we do not have a title and author, we cannot cross-match with dblp
     if "title" not in bibtex_dict or "author" not in bibtex_dict:
-        return bibtex_dict
+        return None
 
     # Extract the title and first author from the BibTeX entry
     # We are not adding the year because the year of the arXiv preprint does
     # not necessarily match the year of the conference paper.
+    from bibtexparser.customization import splitname
     title = bibtex_dict["title"]
     author = splitname(bibtex_dict["author"].split(" and ")[0])
 
-    # Construct query and make request to the dblp API
+    # Construct query for the dblp API
     # Unfortunately, the dblp API does not allow to search for a specific
     # arXiv identifier, so we have to search for the title and first author
     query = "+".join(author["last"]) + "+" + title.replace(" ", "+")
-    url = f"https://dblp.org/search/publ/api?q={query}&format=json&h=1000"
+
+    return f"https://dblp.org/search/publ/api?q={query}&format=json&h=1000"
+
+
+def crossmatch_with_dblp(
+    bibtex_dict: dict,
+    identifier: str,
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Cross-match the given BibTeX entry with the dblp database to check
+    if there is a matching conference paper. If so, add the venue and
+    year of the conference paper to the BibTeX entry.
+    Note: This function usually only makes sense for arXiv preprints.
+    """
+
+    # If we do not have a title and author, we cannot cross-match with dblp
+    if (url := get_dblp_search_url(bibtex_dict)) is None:
+        return bibtex_dict
+
+    # Make request to the dblp API
+    r = network.get(url, backend="dblp", config=config)
+
+    return parse_dblp_response(r, bibtex_dict, identifier)
+
+
+async def crossmatch_with_dblp_async(
+    bibtex_dict: dict,
+    identifier: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `crossmatch_with_dblp()`.
+    """
+
+    # If we do not have a title and author, we cannot cross-match with dblp
+    if (url := get_dblp_search_url(bibtex_dict)) is None:
+        return bibtex_dict
+
+    # Make request to the dblp API
+    r = await network.get_async(
+        url, backend="dblp", client=client, config=config
+    )
+
+    return parse_dblp_response(r, bibtex_dict, identifier)
+
+
+def parse_dblp_response(
+    r: network.Response,
+    bibtex_dict: dict,
+    identifier: str,
+) -> dict:
+    """
+    Find the matching conference paper in the response of a dblp search
+    query and add its venue and year to the `addendum` of the BibTeX entry.
+    """
 
     # Check if the request was successful
-    r = requests.get(url)
     if not r.status_code == 200:
         raise RuntimeError(
             f"Could not get data from dblp. Status code: {r.status_code}."
@@ -62,6 +118,7 @@ def crossmatch_with_dblp(
     # paper and (2) the title or the identifier needs to match the one from
     # the BibTeX entry. The `[:-1]` is used to remove the trailing dot from
     # the title that seems present in all dlbp entries.
+    title = bibtex_dict["title"]
     for paper in papers:
         info = dict(paper["info"])
         if (
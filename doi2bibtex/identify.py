@@ -6,34 +6,79 @@ Methods for identifying the type of identifier (DOI or arXiv ID).
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-import re
+from typing import Iterable, Iterator, Tuple
 
-from isbnlib import is_isbn10, is_isbn13
+import re
 
 
 # -----------------------------------------------------------------------------
 # DEFINTIONS
 # -----------------------------------------------------------------------------
 
+# Pattern for ADS bibcodes (basic format: "YYYYJJJJJVVVVMPPPPA")
+# For details, see: https://ui.adsabs.harvard.edu/help/actions/bibcode
+ADS_BIBCODE_PATTERN = (
+    r"(?:\d{4})"  # YYYY
+    r"(?:[\w\.\&]{5})"  # JJJJJ
+    r"(?:[\w\.]{4})"  # VVVV
+    r"(?:\S)"  # M
+    r"(?:[\d\.]{4})"  # PPPP
+    r"(?:[A-Z])"  # A
+)
+
+# Patterns for arXiv IDs
+# See: https://info.arxiv.org/help/arxiv_identifier.html
+ARXIV_ID_PATTERNS = [
+    r"\d{4}.\d{4,5}(?:v\d+)?",
+    r"[a-z\-]+(?:\.[A-Z]{2})?\/\d{7}(?:v\d+)?",
+]
+
+# Patterns for DOIs
+# See: https://www.crossref.org/blog/dois-and-matching-regular-expressions
+DOI_PATTERNS = [
+    r"10.\d{4,9}/[-.;()/:\w]+",
+    r"10.1002/[^\s]+",
+    r"10.\d{4}/\d+-\d+X?(?:\d+)\d+<[\d\w]+:[\d\w]*>\d+.\d+.\w+;\d",
+    r"10.1021/\w\w\d+",
+    r"10.1207/[\w\d]+\&\d+_\d+",
+]
+
+
+def _compile(*patterns: str) -> "re.Pattern[str]":
+    """
+    Combine the given `patterns` into a single anchored regex.
+    """
+
+    return re.compile("^(?:" + "|".join(patterns) + ")$")
+
+
+ADS_BIBCODE_REGEX = _compile(ADS_BIBCODE_PATTERN)
+ARXIV_ID_REGEX = _compile(*ARXIV_ID_PATTERNS)
+DOI_REGEX = _compile(*DOI_PATTERNS)
+
+# All patterns in one regex; since the alternatives are tried in order, the
+# name of the group that matched is the type of the identifier, and the order
+# (DOI, arXiv ID, ADS bibcode) is the same as in `classify_identifier()`
+IDENTIFIER_REGEX = _compile(
+    "(?P<doi>" + "|".join(DOI_PATTERNS) + ")",
+    "(?P<arxiv>" + "|".join(ARXIV_ID_PATTERNS) + ")",
+    "(?P<ads>" + ADS_BIBCODE_PATTERN + ")",
+)
+
+# Characters that `isbnlib` ignores when validating an ISBN
+NON_ISBN_CHARS_REGEX = re.compile(r"[^0-9Xx]")
+
+# Prefixes that are removed by `normalize_identifier()`
+DOI_PREFIXES = ("doi:", "DOI:")
+ARXIV_PREFIXES = ("arXiv:", "arxiv:")
+
+
 def is_ads_bibcode(identifier: str) -> bool:
     """
     Check if the given `identifier` is an ADS bibcode.
     """
 
-    # Define a pattern for ADS bibcodes (basic format: "YYYYJJJJJVVVVMPPPPA")
-    # For details, see: https://ui.adsabs.harvard.edu/help/actions/bibcode
-    pattern = (
-        r"^"
-        r"(?P<YYYY>\d{4})"
-        r"(?P<JJJJJ>[\w\.\&]{5})"
-        r"(?P<VVVV>[\w\.]{4})"
-        r"(?P<M>\S)"
-        r"(?P<PPPP>[\d\.]{4})"
-        r"(?P<A>[A-Z])"
-        r"$"
-    )
-
-    return re.match(pattern, identifier) is not None
+    return ADS_BIBCODE_REGEX.match(identifier) is not None
 
 
 def is_arxiv_id(identifier: str) -> bool:
@@ -41,14 +86,7 @@ def is_arxiv_id(identifier: str) -> bool:
     Check if the given `identifier` is an arXiv ID.
     """
 
-    # Define a list of arXiv ID patterns
-    # See: https://info.arxiv.org/help/arxiv_identifier.html
-    patterns = [
-        r"^\d{4}.\d{4,5}(v\d+)?$",
-        r"^[a-z\-]+(\.[A-Z]{2})?\/\d{7}(v\d+)?$",
-    ]
-
-    return any(re.match(pattern, identifier) for pattern in patterns)
+    return ARXIV_ID_REGEX.match(identifier) is not None
 
 
 def is_doi(identifier: str) -> bool:
@@ -56,17 +94,7 @@ def is_doi(identifier: str) -> bool:
     Check if the given `identifier` is a DOI.
     """
 
-    # Define a list of DOI patterns
-    # See: https://www.crossref.org/blog/dois-and-matching-regular-expressions
-    patterns = [
-        r"^10.\d{4,9}/[-.;()/:\w]+$",
-        r"^10.1002/[^\s]+$",
-        r"^10.\d{4}/\d+-\d+X?(\d+)\d+<[\d\w]+:[\d\w]*>\d+.\d+.\w+;\d$",
-        r"^10.1021/\w\w\d+$",
-        r"^10.1207/[\w\d]+\&\d+_\d+$",
-    ]
-
-    return any(re.match(pattern, identifier) for pattern in patterns)
+    return DOI_REGEX.match(identifier) is not None
 
 
 def is_isbn(identifier: str) -> bool:
@@ -74,7 +102,70 @@ def is_isbn(identifier: str) -> bool:
     Check if the given `identifier` is an ISBN.
 
     This is just a super thin wrapper around `isbnlib.is_isbn10()` and
-    `isbnlib.is_isbn13()`.
+    `isbnlib.is_isbn13()`, which skips them for strings that cannot be
+    an ISBN because they do not have 10 or 13 digits.
     """
 
+    if len(NON_ISBN_CHARS_REGEX.sub("", identifier)) not in (10, 13):
+        return False
+
+    from isbnlib import is_isbn10, is_isbn13
+
     return bool(is_isbn10(identifier)) or bool(is_isbn13(identifier))
+
+
+def normalize_identifier(identifier: str) -> str:
+    """
+    Normalize the given `identifier`: Remove any leading or trailing
+    whitespace, and remove the "doi:" or "arXiv:" prefix.
+    """
+
+    identifier = identifier.strip()
+    if identifier.startswith(DOI_PREFIXES):
+        identifier = identifier[4:]
+    if identifier.startswith(ARXIV_PREFIXES):
+        identifier = identifier[6:]
+
+    return identifier
+
+
+def classify_identifier(identifier: str) -> Tuple[str, str]:
+    """
+    Determine the type of the given `identifier` in a single pass.
+    Returns the type ("doi", "arxiv", "ads", "isbn", or "unknown") and
+    the normalized identifier (see `normalize_identifier()`). If an
+    identifier matches multiple types, the first one in the above list
+    wins, which is consistent with the `is_*()` functions.
+    """
+
+    identifier = normalize_identifier(identifier)
+
+    if (match := IDENTIFIER_REGEX.match(identifier)) is not None:
+        return str(match.lastgroup), identifier
+    if is_isbn(identifier):
+        return "isbn", identifier
+
+    return "unknown", identifier
+
+
+def classify_identifiers(
+    identifiers: Iterable[str],
+) -> Iterator[Tuple[str, str]]:
+    """
+    Bulk version of `classify_identifier()`: lazily classify all given
+    `identifiers`, so that even very large inputs (e.g., all lines of
+    a file) never need to be held in memory at once.
+    """
+
+    # Bind everything to local names to avoid repeated global lookups
+    normalize = normalize_identifier
+    match = IDENTIFIER_REGEX.match
+
+    for identifier in identifiers:
+        identifier = normalize(identifier)
+        if (m := match(identifier)) is not None:
+            yield str(m.lastgroup), identifier
+        elif is_isbn(identifier):
+            yield "isbn", identifier
+        else:
+            yield "unknown", identifier
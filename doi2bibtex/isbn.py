@@ -1,41 +1,148 @@
 """
 Resolve ISBN numbers to BibTeX entries.
+
+There are two backends: the Google Books API, and the Books API of
+Open Library. Both allow us to query many ISBNs at once, and to only
+download the fields that we actually need. The BibTeX entries are then
+constructed locally.
 """
 
 # -----------------------------------------------------------------------------
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-import json
+from typing import Dict, List, Optional, TYPE_CHECKING
+from urllib.parse import urlencode
 
-import requests
+import json
+import re
 
+from doi2bibtex import network
+from doi2bibtex.config import Configuration
+from doi2bibtex.constants import GOOGLE_BOOKS_MAX_ISBNS, OPEN_LIBRARY_MAX_ISBNS
 from doi2bibtex.process import generate_citekey
 
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+
 
 # -----------------------------------------------------------------------------
 # DEFINITIONS
 # -----------------------------------------------------------------------------
 
-def resolve_isbn_with_google_api(isbn: str) -> dict:
+# Fields of the Google Books volumes that we need to construct a BibTeX entry
+GOOGLE_BOOKS_FIELDS = (
+    "items/volumeInfo("
+    "title,subtitle,authors,publisher,publishedDate,industryIdentifiers"
+    ")"
+)
+
+
+def get_isbn13(isbn: str) -> str:
+    """
+    Convert the given `isbn` to an ISBN-13 without dashes, which is how
+    the backends identify books.
+    """
+
+    from isbnlib import to_isbn13
+
+    return str(to_isbn13(isbn) or isbn.replace("-", ""))
+
+
+def get_google_books_url(isbns: List[str]) -> str:
+    """
+    Get the URL of the Google Books API query for the given `isbns`.
+    """
+
+    # Remove all dashes from the ISBNs; this seems to work more reliably?
+    query = urlencode(
+        {
+            "q": " OR ".join(f"isbn:{_.replace('-', '')}" for _ in isbns),
+            "fields": GOOGLE_BOOKS_FIELDS,
+            "maxResults": 40,
+        }
+    )
+
+    return f"https://www.googleapis.com/books/v1/volumes?{query}"
+
+
+def google_books_volume_to_bibtex_dict(volume_info: dict, isbn: str) -> dict:
+    """
+    Construct a BibTeX entry (as a dictionary) for the given `isbn` from
+    the `volumeInfo` of a Google Books volume.
+    """
+
+    title = volume_info.get("title", "")
+    subtitle = volume_info.get("subtitle", "")
+
+    # Manually construct a BibTeX entry
+    bibtex_dict = {
+        "ENTRYTYPE": "book",
+        "ID": isbn,
+        "author": " and ".join(volume_info.get("authors", [])),
+        "title": title + ((": " + subtitle) if subtitle else ""),
+        "publisher": volume_info.get("publisher", ""),
+        "year": volume_info.get("publishedDate", "")[:4],
+        "isbn": isbn,
+    }
+
+    # Construct the citekey
+    bibtex_dict = generate_citekey(bibtex_dict)
+
+    return bibtex_dict
+
+
+def resolve_isbn_with_google_api(
+    isbn: str,
+    config: Optional[Configuration] = None,
+) -> dict:
     """
     Resolve a given `isbn` number using the Google Books API and return
     the BibTeX entry as a dictionary.
     """
 
-    # Remove all dashes from the ISBN; this seems to work more reliably?
-    query = isbn.replace("-", "")
+    # Query the Google Books API
+    r = network.get(
+        url=get_google_books_url([isbn]),
+        backend="google_books",
+        config=config,
+        headers={"Accept": "application/json"},
+    )
+
+    return parse_google_books_response(r, isbn)
+
+
+async def resolve_isbn_with_google_api_async(
+    isbn: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_isbn_with_google_api()`.
+    """
 
     # Query the Google Books API
-    r = requests.get(
-        url=f"https://www.googleapis.com/books/v1/volumes?q=isbn:{query}",
+    r = await network.get_async(
+        url=get_google_books_url([isbn]),
+        backend="google_books",
+        client=client,
+        config=config,
         headers={"Accept": "application/json"},
     )
 
+    return parse_google_books_response(r, isbn)
+
+
+def parse_google_books_response(r: network.Response, isbn: str) -> dict:
+    """
+    Construct a BibTeX entry (as a dictionary) from the response of a
+    Google Books API query for the given `isbn`.
+    """
+
     # Check if we got a 200 response; if not, raise an error
     if (error := r.status_code) != 200:
-        raise RuntimeError(
-            f'Error {error} resolving "{isbn}": no BibTeX entry found'
+        raise network.ResolveError(
+            f'Error {error} resolving "{isbn}": no BibTeX entry found', error
         )
 
     # Parse the response using JSON
@@ -43,23 +150,113 @@ def resolve_isbn_with_google_api(isbn: str) -> dict:
 
     # Check if we got any results; if not, raise an error
     if not (items := response.get("items", [])):
-        raise RuntimeError(
+        raise network.ResolveError(
             f'Error resolving "{isbn}": no BibTeX entry found'
         )
 
-    # Get the first item; define shortcuts
-    item = items[0]
-    title = item["volumeInfo"].get("title", "")
-    subtitle = item["volumeInfo"].get("subtitle", "")
+    # Use the first item
+    return google_books_volume_to_bibtex_dict(items[0]["volumeInfo"], isbn)
 
-    # Manually construct a BibTeX entry
+
+def parse_google_books_volumes_response(
+    r: network.Response,
+    isbns: List[str],
+) -> Dict[str, dict]:
+    """
+    Parse the response of a Google Books API query for multiple `isbns`
+    into a dict that maps the given ISBNs to BibTeX dicts. The volumes
+    are matched to the ISBNs by their `industryIdentifiers`; ISBNs that
+    were not found are skipped.
+    """
+
+    if (error := r.status_code) != 200:
+        raise network.ResolveError(
+            f"Error {error} resolving {len(isbns)} ISBNs", error
+        )
+
+    # Collect the volumes by their ISBN-13 (the first match wins, like for
+    # a single ISBN in `parse_google_books_response()`)
+    volumes: Dict[str, dict] = {}
+    for item in json.loads(r.text).get("items", []):
+        volume_info = item.get("volumeInfo", {})
+        for identifier in volume_info.get("industryIdentifiers", []):
+            if identifier.get("type") in ("ISBN_10", "ISBN_13"):
+                isbn13 = get_isbn13(identifier["identifier"])
+                volumes.setdefault(isbn13, volume_info)
+
+    return {
+        isbn: google_books_volume_to_bibtex_dict(volumes[isbn13], isbn)
+        for isbn in isbns
+        if (isbn13 := get_isbn13(isbn)) in volumes
+    }
+
+
+def resolve_isbns_with_google_api(
+    isbns: List[str],
+    config: Optional[Configuration] = None,
+    chunk_size: int = GOOGLE_BOOKS_MAX_ISBNS,
+) -> Dict[str, dict]:
+    """
+    Resolve multiple `isbns` using the Google Books API, with (at most)
+    `chunk_size` ISBNs per request. Returns a dict that maps the given
+    ISBNs to BibTeX dicts; ISBNs that were not found are skipped.
+    """
+
+    # Remove duplicates (but keep the order, so that requests are cacheable)
+    isbns = list(dict.fromkeys(isbns))
+
+    results: Dict[str, dict] = {}
+    for i in range(0, len(isbns), chunk_size):
+        chunk = isbns[i:i + chunk_size]
+        r = network.get(
+            url=get_google_books_url(chunk),
+            backend="google_books",
+            config=config,
+            headers={"Accept": "application/json"},
+        )
+        results.update(parse_google_books_volumes_response(r, chunk))
+
+    return results
+
+
+def get_open_library_url(isbns: List[str]) -> str:
+    """
+    Get the URL of the Open Library Books API query for the given
+    `isbns` (see https://openlibrary.org/dev/docs/api/books).
+    """
+
+    query = urlencode(
+        {
+            "bibkeys": ",".join(f"ISBN:{_.replace('-', '')}" for _ in isbns),
+            "format": "json",
+            "jscmd": "data",
+        }
+    )
+
+    return f"https://openlibrary.org/api/books?{query}"
+
+
+def open_library_book_to_bibtex_dict(book: dict, isbn: str) -> dict:
+    """
+    Construct a BibTeX entry (as a dictionary) for the given `isbn` from
+    the data of an Open Library book.
+    """
+
+    title = book.get("title", "")
+    subtitle = book.get("subtitle", "")
+    publishers = book.get("publishers", [])
+
+    # The publication date is free text (e.g., "March 2010" or "2010")
+    year = re.search(r"\d{4}", book.get("publish_date", ""))
+
+    # Manually construct a BibTeX entry (in the same way as for Google Books)
     bibtex_dict = {
         "ENTRYTYPE": "book",
         "ID": isbn,
-        "author": " and ".join(item["volumeInfo"].get("authors", [])),
+        "author": " and ".join(_["name"] for _ in book.get("authors", [])),
         "title": title + ((": " + subtitle) if subtitle else ""),
-        "publisher": item["volumeInfo"].get("publisher", ""),
-        "year": item["volumeInfo"].get("publishedDate", "")[:4],
+        "publisher": publishers[0]["name"] if publishers else "",
+        "year": year.group(0) if year else "",
         "isbn": isbn,
     }
 
@@ -67,3 +264,96 @@ def resolve_isbn_with_google_api(isbn: str) -> dict:
     bibtex_dict = generate_citekey(bibtex_dict)
 
     return bibtex_dict
+
+
+def parse_open_library_response(
+    r: network.Response,
+    isbns: List[str],
+) -> Dict[str, dict]:
+    """
+    Parse the response of an Open Library Books API query into a dict
+    that maps the given `isbns` to BibTeX dicts. ISBNs that were not
+    found are skipped.
+    """
+
+    if (error := r.status_code) != 200:
+        raise network.ResolveError(
+            f"Error {error} resolving {len(isbns)} ISBNs", error
+        )
+
+    # The books are returned under the `bibkeys` that we asked for
+    books = json.loads(r.text)
+
+    return {
+        isbn: open_library_book_to_bibtex_dict(books[key], isbn)
+        for isbn in isbns
+        if (key := f"ISBN:{isbn.replace('-', '')}") in books
+    }
+
+
+def resolve_isbns_with_open_library(
+    isbns: List[str],
+    config: Optional[Configuration] = None,
+    chunk_size: int = OPEN_LIBRARY_MAX_ISBNS,
+) -> Dict[str, dict]:
+    """
+    Resolve multiple `isbns` using the Open Library Books API, with (at
+    most) `chunk_size` ISBNs per request. Returns a dict that maps the
+    given ISBNs to BibTeX dicts; ISBNs that were not found are skipped.
+    """
+
+    # Remove duplicates (but keep the order, so that requests are cacheable)
+    isbns = list(dict.fromkeys(isbns))
+
+    results: Dict[str, dict] = {}
+    for i in range(0, len(isbns), chunk_size):
+        chunk = isbns[i:i + chunk_size]
+        r = network.get(
+            url=get_open_library_url(chunk),
+            backend="open_library",
+            config=config,
+            headers={"Accept": "application/json"},
+        )
+        results.update(parse_open_library_response(r, chunk))
+
+    return results
+
+
+def resolve_isbn_with_open_library(
+    isbn: str,
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Resolve a single `isbn` using the Open Library Books API.
+    """
+
+    if (bibtex_dict := resolve_isbns_with_open_library([isbn], config)):
+        return bibtex_dict[isbn]
+
+    raise network.ResolveError(
+        f'Error resolving "{isbn}": no BibTeX entry found'
+    )
+
+
+async def resolve_isbn_with_open_library_async(
+    isbn: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_isbn_with_open_library()`.
+    """
+
+    r = await network.get_async(
+        url=get_open_library_url([isbn]),
+        backend="open_library",
+        client=client,
+        config=config,
+        headers={"Accept": "application/json"},
+    )
+    if (bibtex_dict := parse_open_library_response(r, [isbn])):
+        return bibtex_dict[isbn]
+
+    raise network.ResolveError(
+        f'Error resolving "{isbn}": no BibTeX entry found'
+    )
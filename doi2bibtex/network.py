@@ -0,0 +1,842 @@
+"""
+Send HTTP requests to the different backends (Crossref, arXiv, ADS, ...).
+All backends should go through the functions in this module, so that
+responses can be cached, connections can be re-used, the rate limits of
+the different APIs are respected, and no request can block forever.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from threading import Lock
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    TYPE_CHECKING,
+)
+from urllib.parse import urlparse
+
+import time
+
+from doi2bibtex import __version__
+from doi2bibtex.cache import ResponseCache, get_response_cache
+from doi2bibtex.config import Configuration, get_default_config
+from doi2bibtex.profiling import span
+from doi2bibtex.ratelimit import (
+    get_rate_limiter,
+    get_retry_delay,
+    is_rate_limited,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
+    import requests
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+class Response(NamedTuple):
+    """
+    The parts of an HTTP response that the backends actually use.
+    """
+
+    status_code: int
+    text: str
+    headers: Dict[str, str] = {}
+
+
+class ResolveError(RuntimeError):
+    """
+    A backend could not resolve an identifier: either it responded with
+    an error (`status_code`), or its response did not contain an entry
+    for the identifier (`status_code` is None).
+    """
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+
+        super().__init__(message)
+        self.status_code = status_code
+
+
+# Requests that can safely be sent more than once (i.e., be retried or
+# hedged); POST requests are never sent twice
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Status codes of (probably) transient server errors that are retried
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# Status codes that mean that an identifier does not exist (or is invalid),
+# so that there is no point in asking again any time soon
+PERMANENT_FAILURE_STATUS_CODES = (400, 404, 410)
+
+# Number of latencies that are kept (and required) for every backend to
+# estimate the delay after which a request is hedged
+MAX_LATENCY_SAMPLES = 200
+MIN_LATENCY_SAMPLES = 20
+
+# Requests are hedged when they take longer than this quantile of the
+# latencies of their backend
+HEDGE_QUANTILE = 0.95
+
+
+# Keep one session per combination of connection settings, so that all
+# backends (and all threads) share the same connection pools
+_sessions: Dict[
+    Tuple[int, Tuple[Tuple[str, str], ...]], "requests.Session"
+] = {}
+_sessions_lock = Lock()
+
+
+def get_session(config: Configuration) -> "requests.Session":
+    """
+    Get the shared `requests.Session` for the given configuration.
+    The session keeps connections alive between requests (so that we
+    do not need a new TCP and TLS handshake for every request), opens
+    at most `config.max_connections_per_host` connections to the same
+    host, and uses the proxies from `config.proxies` (if any).
+    """
+
+    key = (
+        config.max_connections_per_host,
+        tuple(sorted(config.proxies.items())),
+    )
+
+    with _sessions_lock:
+        if key not in _sessions:
+
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            # If all connections to a host are in use, `pool_block=True`
+            # makes other threads wait instead of opening new connections
+            adapter = HTTPAdapter(
+                pool_connections=16,
+                pool_maxsize=config.max_connections_per_host,
+                pool_block=True,
+            )
+
+            session = requests.Session()
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.proxies.update(config.proxies)
+            session.headers["User-Agent"] = f"doi2bibtex/{__version__}"
+
+            _sessions[key] = session
+
+        return _sessions[key]
+
+
+def get_ttl(backend: str, config: Configuration) -> float:
+    """
+    Get the time-to-live (in seconds) of cached responses for the given
+    `backend`. Backends without a TTL in the configuration are not cached.
+    """
+
+    return float(config.cache_ttl_days.get(backend, 0)) * 24 * 60 * 60
+
+
+def get_cache(
+    backend: str,
+    config: Configuration,
+) -> Tuple[Optional[ResponseCache], float]:
+    """
+    Get the response cache and the TTL for the given `backend`, or
+    (None, 0) if responses from this backend should not be cached.
+    """
+
+    if not config.use_cache or (ttl := get_ttl(backend, config)) <= 0:
+        return None, 0
+
+    cache = get_response_cache(
+        max_size=int(config.cache_max_size_mb * 1024 * 1024)
+    )
+
+    return cache, ttl
+
+
+def classify_failure(error: Exception) -> Optional[str]:
+    """
+    Classify the `error` that resolving an identifier failed with as
+    "permanent" (the identifier does not exist, or the backend has no
+    entry for it), "transient" (timeouts, connection errors and server
+    errors), or None (anything else, e.g., a missing ADS token or a bug,
+    which are not remembered). Rate limits (429) are not remembered
+    either: they say nothing about the identifier, and the requests are
+    already retried once the server allows it.
+    """
+
+    import requests
+
+    if isinstance(error, ResolveError):
+        if (status_code := error.status_code) is None:
+            return "permanent"
+        if status_code in PERMANENT_FAILURE_STATUS_CODES:
+            return "permanent"
+        if status_code >= 500:
+            return "transient"
+        return None
+
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return "transient"
+
+    # `httpx` is an optional dependency (only needed for the async code)
+    try:
+        import httpx
+    except ImportError:
+        return None
+    if isinstance(error, httpx.TransportError):
+        return "transient"
+
+    return None
+
+
+def get_failure_ttls(config: Configuration) -> Dict[str, float]:
+    """
+    Get the time-to-live (in seconds) of remembered failures for each
+    kind of failure ("permanent" and "transient").
+    """
+
+    return {
+        kind: float(hours) * 60 * 60
+        for kind, hours in config.negative_cache_ttl_hours.items()
+    }
+
+
+def get_failure_cache(config: Configuration) -> Optional[ResponseCache]:
+    """
+    Get the cache for failures, or None if failures are not remembered.
+    """
+
+    ttls = get_failure_ttls(config)
+    if not config.use_cache or not any(_ > 0 for _ in ttls.values()):
+        return None
+
+    return get_response_cache(
+        max_size=int(config.cache_max_size_mb * 1024 * 1024)
+    )
+
+
+def check_failure_cache(key: Optional[str], config: Configuration) -> None:
+    """
+    Raise a `ResolveError` if resolving the identifier with the given
+    (normalized) `key` has recently failed (see `record_failure()`).
+    """
+
+    if key is None or (cache := get_failure_cache(config)) is None:
+        return
+
+    with span("failures", "cache"):
+        failure = cache.get_failure(key, ttls=get_failure_ttls(config))
+    if failure is not None:
+        message, status_code = failure
+        raise ResolveError(f"{message} (cached)", status_code)
+
+
+def record_failure(
+    key: Optional[str],
+    error: Exception,
+    config: Configuration,
+) -> None:
+    """
+    Remember that resolving the identifier with the given (normalized)
+    `key` failed with the given `error`, if it is a permanent or a
+    transient failure (see `classify_failure()`) with a TTL.
+    """
+
+    if key is None or (cache := get_failure_cache(config)) is None:
+        return
+
+    kind = classify_failure(error)
+    if kind is None or get_failure_ttls(config).get(kind, 0) <= 0:
+        return
+
+    status_code = getattr(error, "status_code", None)
+    cache.set_failure(key, kind, str(error), status_code)
+
+
+def rewrite_url(url: str, config: Configuration) -> str:
+    """
+    Replace the base URL of the given `url` according to
+    `config.base_urls` (e.g., to send all requests for Crossref to a
+    local server that replays recorded responses for benchmarks).
+    """
+
+    for base_url, replacement in config.base_urls.items():
+        if url.startswith(base_url):
+            return replacement + url[len(base_url):]
+
+    return url
+
+
+def get_host(url: str) -> str:
+    """
+    Get the host of the given `url` (e.g., "api.crossref.org"), which
+    determines the rate limit of a request.
+    """
+
+    return (urlparse(url).hostname or "").lower()
+
+
+def get_rate_limit(host: str, config: Configuration) -> Optional[float]:
+    """
+    Get the maximum number of requests per second to the given `host`,
+    or None if the requests to this host are not limited.
+    """
+
+    rate = config.rate_limits.get(host)
+
+    return float(rate) if rate else None
+
+
+def add_mailto(
+    url: str,
+    config: Configuration,
+    kwargs: Dict[str, Any],
+) -> None:
+    """
+    Add the email address from `config.crossref_mailto` (if any) to the
+    `User-Agent` of requests to Crossref, so that they are routed to the
+    (faster) "polite" pool of the Crossref API. We use the header instead
+    of the `mailto` parameter, so that the cache keys do not change.
+    """
+
+    if not config.crossref_mailto or get_host(url) != "api.crossref.org":
+        return
+
+    headers = dict(kwargs.get("headers") or {})
+    headers["User-Agent"] = (
+        f"doi2bibtex/{__version__} (mailto:{config.crossref_mailto})"
+    )
+    kwargs["headers"] = headers
+
+
+def get_timeout(
+    backend: str,
+    config: Configuration,
+) -> Optional[Tuple[float, float]]:
+    """
+    Get the (connect, read) timeout in seconds for requests to the given
+    `backend` from `config.timeouts`, where the timeout for "all" is used
+    for backends without their own timeout.
+    """
+
+    timeout = config.timeouts.get(backend, config.timeouts.get("all"))
+    if not timeout:
+        return None
+
+    return float(timeout[0]), float(timeout[1])
+
+
+class LatencyTracker:
+    """
+    Keep track of the latencies of the most recent requests to every
+    backend, so that we know when a request is unusually slow.
+    """
+
+    def __init__(self, max_samples: int = MAX_LATENCY_SAMPLES) -> None:
+
+        self.max_samples = max_samples
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._lock = Lock()
+
+    def add(self, backend: str, latency: float) -> None:
+        """
+        Add the `latency` (in seconds) of a request to the `backend`.
+        """
+
+        with self._lock:
+            if backend not in self._latencies:
+                self._latencies[backend] = deque(maxlen=self.max_samples)
+            self._latencies[backend].append(latency)
+
+    def get_quantile(
+        self,
+        backend: str,
+        quantile: float,
+        min_samples: int = MIN_LATENCY_SAMPLES,
+    ) -> Optional[float]:
+        """
+        Get the given `quantile` of the latencies of the `backend`, or
+        None if there are fewer than `min_samples` latencies.
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies.get(backend, ()))
+
+        if not latencies or len(latencies) < min_samples:
+            return None
+
+        index = min(len(latencies) - 1, int(quantile * len(latencies)))
+
+        return latencies[index]
+
+
+# One latency tracker that is shared by all backends and all threads
+_latency_tracker = LatencyTracker()
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """
+    Get the shared latency tracker.
+    """
+
+    return _latency_tracker
+
+
+def get_hedge_delay(
+    method: str,
+    backend: str,
+    config: Configuration,
+) -> Optional[float]:
+    """
+    Get the number of seconds after which a second (hedged) request is
+    sent if the first one has not been answered yet, or None if the
+    request should not be hedged.
+    """
+
+    if not config.hedge_requests or method.upper() not in IDEMPOTENT_METHODS:
+        return None
+
+    return get_latency_tracker().get_quantile(backend, HEDGE_QUANTILE)
+
+
+class RetryPolicy:
+    """
+    Decide whether (and when) a request is retried: requests that are
+    throttled by the server are retried up to `config.rate_limit_retries`
+    times; idempotent requests that fail with a connection error, a
+    timeout or a transient server error are retried up to
+    `config.max_retries` times, with exponential backoff.
+    """
+
+    def __init__(self, method: str, config: Configuration) -> None:
+
+        self.max_retries = (
+            config.max_retries if method.upper() in IDEMPOTENT_METHODS else 0
+        )
+        self.max_rate_limit_retries = config.rate_limit_retries
+        self.retries = 0
+        self.rate_limit_retries = 0
+
+    def retry_after_error(self) -> Optional[float]:
+        """
+        Get the delay before retrying a request that failed with an
+        exception, or None if it should not be retried.
+        """
+
+        if self.retries >= self.max_retries:
+            return None
+
+        self.retries += 1
+
+        return get_retry_delay({}, self.retries - 1)
+
+    def retry_after_response(
+        self,
+        host: str,
+        response: Response,
+    ) -> Optional[float]:
+        """
+        Get the delay before retrying a request that received the given
+        `response`, or None if it should not be retried.
+        """
+
+        # Throttled requests wait via the rate limiter of their host
+        if is_rate_limited(response.status_code, response.headers):
+            if self.rate_limit_retries >= self.max_rate_limit_retries:
+                return None
+            delay = get_retry_delay(response.headers, self.rate_limit_retries)
+            get_rate_limiter().block(host, delay)
+            self.rate_limit_retries += 1
+            return 0.0
+
+        if response.status_code in RETRY_STATUS_CODES:
+            if self.retries >= self.max_retries:
+                return None
+            self.retries += 1
+            return get_retry_delay(response.headers, self.retries - 1)
+
+        return None
+
+
+# Threads for sending hedged requests (created when they are first needed)
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that is used for sending hedged requests.
+    """
+
+    global _hedge_executor
+
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(
+                max_workers=32,
+                thread_name_prefix="d2b-hedge",
+            )
+        return _hedge_executor
+
+
+def send_request(
+    method: str,
+    url: str,
+    backend: str,
+    config: Configuration,
+    kwargs: Dict[str, Any],
+) -> Response:
+    """
+    Send a single request, once the rate limit of its host allows it.
+    """
+
+    host = get_host(url)
+    rate = get_rate_limit(host, config)
+    if delay := get_rate_limiter().reserve(host, rate):
+        with span(host, "ratelimit"):
+            time.sleep(delay)
+
+    start = time.monotonic()
+    with span(backend, "http"):
+        r = get_session(config).request(method, url, **kwargs)
+        response = Response(
+            status_code=r.status_code,
+            text=r.text,
+            headers=dict(r.headers),
+        )
+    get_latency_tracker().add(backend, time.monotonic() - start)
+    get_rate_limiter().update(host, response.headers)
+
+    return response
+
+
+def send_hedged_request(
+    method: str,
+    url: str,
+    backend: str,
+    config: Configuration,
+    kwargs: Dict[str, Any],
+) -> Response:
+    """
+    Send a request, and if it has not been answered after the typical
+    (p95) latency of the backend, send a second one and use whichever
+    response arrives first. This cuts the tail latency caused by single
+    slow requests, at the cost of (a few percent) additional requests.
+    """
+
+    if (hedge_delay := get_hedge_delay(method, backend, config)) is None:
+        return send_request(method, url, backend, config, kwargs)
+
+    executor = get_hedge_executor()
+    args = (method, url, backend, config, kwargs)
+    pending: Set["Future[Response]"] = {executor.submit(send_request, *args)}
+    done, pending = wait(pending, timeout=hedge_delay)
+    if not done:
+        pending.add(executor.submit(send_request, *args))
+
+    # Use the first successful response; only fail if both requests failed
+    while True:
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+        if not pending:
+            return future.result()  # Raises the exception of the request
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+
+def request(
+    method: str,
+    url: str,
+    backend: str,
+    config: Optional[Configuration] = None,
+    **kwargs: Any,
+) -> Response:
+    """
+    Send an HTTP request to the given `backend` and return the response.
+    Successful responses are stored in the on-disk cache, and if there
+    is a (non-expired) cached response, no request is sent at all.
+    Requests wait for the rate limit of their host, use the timeouts in
+    `config.timeouts`, and are retried or hedged (see `RetryPolicy` and
+    `send_hedged_request()`).
+    The `kwargs` are passed on to `requests.Session.request()`.
+    """
+
+    import requests
+
+    config = config if config is not None else get_default_config()
+    url = rewrite_url(url, config)
+
+    # Check if there is a cached response for this request
+    key = ResponseCache.make_key(method, url, kwargs.get("data"))
+    cache, ttl = get_cache(backend, config)
+    if cache is not None:
+        with span(backend, "cache"):
+            text = cache.get(key, ttl=ttl)
+        if text is not None:
+            return Response(status_code=200, text=text)
+
+    # Otherwise, actually send the request (and retry it if necessary)
+    host = get_host(url)
+    add_mailto(url, config, kwargs)
+    kwargs.setdefault("timeout", get_timeout(backend, config))
+    retry_policy = RetryPolicy(method, config)
+    while True:
+        try:
+            response = send_hedged_request(
+                method, url, backend, config, kwargs
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if (delay := retry_policy.retry_after_error()) is None:
+                raise
+        else:
+            delay = retry_policy.retry_after_response(host, response)
+            if delay is None:
+                break
+        if delay:
+            with span(backend, "backoff"):
+                time.sleep(delay)
+
+    # Only cache successful responses
+    if cache is not None and response.status_code == 200:
+        cache.set(key, backend=backend, url=url, text=response.text)
+
+    return response
+
+
+def get(
+    url: str,
+    backend: str,
+    config: Optional[Configuration] = None,
+    **kwargs: Any,
+) -> Response:
+    """
+    Send a GET request (see `request()`).
+    """
+
+    return request("GET", url, backend=backend, config=config, **kwargs)
+
+
+def post(
+    url: str,
+    backend: str,
+    config: Optional[Configuration] = None,
+    **kwargs: Any,
+) -> Response:
+    """
+    Send a POST request (see `request()`).
+    """
+
+    return request("POST", url, backend=backend, config=config, **kwargs)
+
+
+def make_async_client(config: Configuration) -> "httpx.AsyncClient":
+    """
+    Create an `httpx.AsyncClient` for `request_async()` that uses the
+    same settings as the (synchronous) shared session. This requires
+    the optional `httpx` dependency (`pip install doi2bibtex[async]`).
+    """
+
+    import httpx
+
+    # Convert the proxies from the `requests` format ({"https": "..."})
+    mounts = {
+        (scheme if "://" in scheme else f"{scheme}://"): (
+            httpx.AsyncHTTPTransport(proxy=proxy)
+        )
+        for scheme, proxy in config.proxies.items()
+    }
+
+    return httpx.AsyncClient(
+        headers={"User-Agent": f"doi2bibtex/{__version__}"},
+        limits=httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=config.max_connections_per_host,
+        ),
+        mounts=mounts,
+        follow_redirects=True,
+        timeout=None,
+    )
+
+
+async def send_request_async(
+    method: str,
+    url: str,
+    backend: str,
+    client: "httpx.AsyncClient",
+    config: Configuration,
+    kwargs: Dict[str, Any],
+) -> Response:
+    """
+    Asynchronous version of `send_request()`.
+    """
+
+    import asyncio
+
+    host = get_host(url)
+    rate = get_rate_limit(host, config)
+    if delay := get_rate_limiter().reserve(host, rate):
+        with span(host, "ratelimit"):
+            await asyncio.sleep(delay)
+
+    start = time.monotonic()
+    with span(backend, "http"):
+        r = await client.request(method, url, **kwargs)
+        response = Response(
+            status_code=r.status_code,
+            text=r.text,
+            headers=dict(r.headers),
+        )
+    get_latency_tracker().add(backend, time.monotonic() - start)
+    get_rate_limiter().update(host, response.headers)
+
+    return response
+
+
+async def send_hedged_request_async(
+    method: str,
+    url: str,
+    backend: str,
+    client: "httpx.AsyncClient",
+    config: Configuration,
+    kwargs: Dict[str, Any],
+) -> Response:
+    """
+    Asynchronous version of `send_hedged_request()`. Unlike threads, the
+    request that loses the race is cancelled.
+    """
+
+    import asyncio
+
+    args = (method, url, backend, client, config, kwargs)
+    if (hedge_delay := get_hedge_delay(method, backend, config)) is None:
+        return await send_request_async(*args)
+
+    pending = {asyncio.ensure_future(send_request_async(*args))}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=hedge_delay)
+        if not done:
+            pending.add(asyncio.ensure_future(send_request_async(*args)))
+
+        # Use the first successful response; only fail if both failed
+        while True:
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+            if not pending:
+                return task.result()  # Raises the exception of the request
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def request_async(
+    method: str,
+    url: str,
+    backend: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+    **kwargs: Any,
+) -> Response:
+    """
+    Asynchronous version of `request()` that uses the given `client`
+    (see `make_async_client()`). Shares the on-disk cache, the rate
+    limits and the latencies with the synchronous version.
+    """
+
+    import asyncio
+
+    import httpx
+
+    config = config if config is not None else get_default_config()
+    url = rewrite_url(url, config)
+
+    # Check if there is a cached response for this request
+    key = ResponseCache.make_key(method, url, kwargs.get("data"))
+    cache, ttl = get_cache(backend, config)
+    if cache is not None:
+        with span(backend, "cache"):
+            text = cache.get(key, ttl=ttl)
+        if text is not None:
+            return Response(status_code=200, text=text)
+
+    # Otherwise, actually send the request; `httpx` expects a raw request
+    # body as `content` instead of `data`
+    if "data" in kwargs:
+        kwargs["content"] = kwargs.pop("data")
+    host = get_host(url)
+    add_mailto(url, config, kwargs)
+    if "timeout" not in kwargs and (timeout := get_timeout(backend, config)):
+        kwargs["timeout"] = httpx.Timeout(timeout[1], connect=timeout[0])
+    retry_policy = RetryPolicy(method, config)
+    while True:
+        try:
+            response = await send_hedged_request_async(
+                method, url, backend, client, config, kwargs
+            )
+        except httpx.TransportError:
+            if (delay := retry_policy.retry_after_error()) is None:
+                raise
+        else:
+            delay = retry_policy.retry_after_response(host, response)
+            if delay is None:
+                break
+        if delay:
+            with span(backend, "backoff"):
+                await asyncio.sleep(delay)
+
+    # Only cache successful responses
+    if cache is not None and response.status_code == 200:
+        cache.set(key, backend=backend, url=url, text=response.text)
+
+    return response
+
+
+async def get_async(
+    url: str,
+    backend: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+    **kwargs: Any,
+) -> Response:
+    """
+    Send a GET request (see `request_async()`).
+    """
+
+    return await request_async(
+        "GET", url, backend=backend, client=client, config=config, **kwargs
+    )
+
+
+async def post_async(
+    url: str,
+    backend: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+    **kwargs: Any,
+) -> Response:
+    """
+    Send a POST request (see `request_async()`).
+    """
+
+    return await request_async(
+        "POST", url, backend=backend, client=client, config=config, **kwargs
+    )
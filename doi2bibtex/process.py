@@ -6,13 +6,20 @@ Look up a BibTeX entry based on a DOI or arXiv ID.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-from bibtexparser.customization import splitname
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+import re
 
 from doi2bibtex.ads import get_ads_bibcode_for_identifier
 from doi2bibtex.config import Configuration
 from doi2bibtex.constants import JOURNAL_ABBREVIATIONS
 from doi2bibtex.dblp import crossmatch_with_dblp
-from doi2bibtex.identify import is_arxiv_id
+from doi2bibtex.identify import (
+    classify_identifier,
+    is_arxiv_id,
+    normalize_identifier,
+)
+from doi2bibtex.profiling import Timer, get_profiler
 from doi2bibtex.utils import (
     doi_to_url,
     latex_to_unicode,
@@ -30,78 +37,293 @@ def preprocess_identifier(identifier: str) -> str:
     whitespace, and remove the "doi:" or "arXiv:" prefix.
     """
 
-    # Remove leading and trailing whitespace
-    identifier = identifier.strip()
+    return normalize_identifier(identifier)
 
-    # Remove the "doi:" prefix
-    if identifier.startswith("doi:") or identifier.startswith("DOI:"):
-        identifier = identifier[4:]
 
-    # Remove the "arXiv:" prefix
-    if identifier.startswith("arXiv:") or identifier.startswith("arxiv:"):
-        identifier = identifier[6:]
+def canonicalize_identifier(identifier: str) -> Tuple[str, str]:
+    """
+    Pre-process the given `identifier` (see `preprocess_identifier()`)
+    and convert it to a canonical form, so that different ways of writing
+    the same identifier become equal: DOIs are case-insensitive (and are
+    lowercased), the version of an arXiv ID is removed, and ISBN-10s are
+    converted to ISBN-13s (without hyphens). Returns the type of the
+    identifier (see `classify_identifier()`) and its canonical form.
+    """
 
-    return identifier
+    identifier_type, identifier = classify_identifier(
+        preprocess_identifier(identifier)
+    )
 
+    if identifier_type == "doi":
+        identifier = identifier.lower()
+    elif identifier_type == "arxiv":
+        identifier = re.sub(r"v\d+$", "", identifier)
+    elif identifier_type == "isbn":
+        from isbnlib import to_isbn13
+        identifier = to_isbn13(identifier) or identifier
 
-def postprocess_bibtex(
-    bibtex_dict: dict,
-    identifier: str,
+    return identifier_type, identifier
+
+
+def get_canonical_key(identifier: str) -> str:
+    """
+    Get a key for the given `identifier` that is the same for all ways
+    of writing it (see `canonicalize_identifier()`), e.g., for finding
+    duplicates: "doi:10.1000/xyz", "arxiv:1312.6114", "isbn:978...".
+    """
+
+    return ":".join(canonicalize_identifier(identifier))
+
+
+# The signature of a step of the post-processing pipeline: every step gets
+# the BibTeX entry, the identifier, the configuration and the ADS bibcode
+# (if known), and returns the updated BibTeX entry
+PostprocessingStep = Callable[
+    [dict, str, Configuration, Optional[str]], dict
+]
+
+# The signature of custom steps (see `register_step()`)
+CustomStep = Callable[[dict, str, Configuration], dict]
+
+# The configuration options that determine the post-processing pipeline
+PIPELINE_OPTIONS = (
+    "abbreviate_journal_names",
+    "convert_latex_chars",
+    "convert_month_to_number",
+    "crossmatch_with_dblp",
+    "fix_arxiv_entrytype",
+    "format_author_names",
+    "generate_citekey",
+    "limit_authors",
+    "remove_fields",
+    "remove_url_if_doi",
+    "resolve_adsurl",
+)
+
+# Custom steps (name -> (step, name of the built-in step to run before))
+_custom_steps: Dict[str, Tuple[CustomStep, Optional[str]]] = {}
+
+# Compiled pipelines (see `get_pipeline()`), and how many of them are kept
+# (e.g., the server may get requests with many different combinations)
+MAX_PIPELINES = 64
+_pipelines: Dict[Tuple[Any, ...], List[Tuple[str, PostprocessingStep]]] = {}
+
+
+def register_step(
+    name: str,
+    step: CustomStep,
+    before: Optional[str] = None,
+) -> None:
+    """
+    Register a custom post-processing `step`, which is called with the
+    BibTeX entry (as a dict), the identifier and the configuration, and
+    returns the updated BibTeX entry. The step runs before the built-in
+    step with the name `before` (e.g., "remove_fields"), or after all
+    other steps if `before` is None. Registering a step with an existing
+    name replaces it.
+    """
+
+    _custom_steps[name] = (step, before)
+    _pipelines.clear()
+
+
+def unregister_step(name: str) -> None:
+    """
+    Remove the custom post-processing step with the given `name`.
+    """
+
+    _custom_steps.pop(name, None)
+    _pipelines.clear()
+
+
+def wrap_custom_step(custom_step: CustomStep) -> PostprocessingStep:
+    """
+    Wrap a custom step so that it has the signature of the built-in ones.
+    """
+
+    return lambda d, i, c, _: custom_step(d, i, c)
+
+
+def compile_pipeline(
     config: Configuration,
-) -> dict:
+) -> List[Tuple[str, PostprocessingStep]]:
     """
-    Post-process a BibTeX entry and apply a series of fixes and tweaks.
+    Compile the given `config` into the (ordered) list of the steps of
+    the post-processing pipeline as (name, step) tuples. Options are
+    only checked once here instead of for every entry, and steps that
+    depend on the configuration get their data precomputed (e.g., the
+    fields to remove for every entry type).
     """
 
+    steps: List[Tuple[str, PostprocessingStep]] = []
+
     # Fix broken ampersand in A&A journal name
-    bibtex_dict = fix_broken_ampersand(bibtex_dict)
+    steps.append(
+        ("fix_broken_ampersand", lambda d, *_: fix_broken_ampersand(d))
+    )
 
     # Fix broken page numbers (e.g., "160â€“175" instead of "160--175")
-    bibtex_dict = fix_broken_pagenumbers(bibtex_dict)
+    steps.append(
+        ("fix_broken_pagenumbers", lambda d, *_: fix_broken_pagenumbers(d))
+    )
 
     # Convert escaped LaTeX character to proper Unicode
     if config.convert_latex_chars:
-        bibtex_dict = convert_latex_chars(bibtex_dict)
+        steps.append(
+            ("convert_latex_chars", lambda d, *_: convert_latex_chars(d))
+        )
 
     # Fix entry type and journal name for arXiv preprints
     if config.fix_arxiv_entrytype:
-        bibtex_dict = fix_arxiv_entrytype(bibtex_dict, identifier)
+        steps.append(
+            ("fix_arxiv_entrytype", lambda d, i, *_: fix_arxiv_entrytype(d, i))
+        )
 
     # Replace journal name with standard abbreviations
     if config.abbreviate_journal_names:
-        bibtex_dict = abbreviate_journal_name(bibtex_dict)
+        steps.append(
+            (
+                "abbreviate_journal_name",
+                lambda d, *_: abbreviate_journal_name(d),
+            )
+        )
 
     # Generate a citekey
     if config.generate_citekey:
-        bibtex_dict = generate_citekey(bibtex_dict)
+        steps.append(("generate_citekey", lambda d, *_: generate_citekey(d)))
 
     # Truncate the author list
-    bibtex_dict = truncate_author_list(bibtex_dict, config)
+    steps.append(
+        (
+            "truncate_author_list",
+            lambda d, _, c, __: truncate_author_list(d, c),
+        )
+    )
 
     # Convert author names to a standard format
     if config.format_author_names:
-        bibtex_dict = format_author_names(bibtex_dict)
+        steps.append(
+            ("format_author_names", lambda d, *_: format_author_names(d))
+        )
 
     # Convert the month to a number
     if config.convert_month_to_number:
-        bibtex_dict = convert_month_to_number(bibtex_dict)
+        steps.append(
+            (
+                "convert_month_to_number",
+                lambda d, *_: convert_month_to_number(d),
+            )
+        )
 
     # Resolve and add the ADS bibcode
     # This is not unit tested, because it requires an ADS API token
     if config.resolve_adsurl:  # pragma: no cover
-        bibtex_dict = resolve_adsurl(bibtex_dict, identifier)
+        steps.append(
+            (
+                "resolve_adsurl",
+                lambda d, i, c, b: resolve_adsurl(d, i, c, bibcode=b),
+            )
+        )
 
     # Remove fields based on the entry type
     if config.remove_fields:
-        bibtex_dict = remove_fields(bibtex_dict, config)
+        fields_by_type = get_fields_to_remove(config)
+        default_fields = fields_by_type.get("all", frozenset())
+        steps.append(
+            (
+                "remove_fields",
+                lambda d, *_: remove_fields_from_dict(
+                    d, fields_by_type.get(d["ENTRYTYPE"], default_fields)
+                ),
+            )
+        )
 
     # Remove the URL if it contains the same information as the DOI
     if config.remove_url_if_doi:
-        bibtex_dict = remove_url_if_doi(bibtex_dict)
+        steps.append(("remove_url_if_doi", lambda d, *_: remove_url_if_doi(d)))
 
     # Try to crossmatch the entry with dblp to get venue information
     if config.crossmatch_with_dblp:  # pragma: no cover
-        bibtex_dict = crossmatch_with_dblp(bibtex_dict, identifier)
+        steps.append(
+            (
+                "crossmatch_with_dblp",
+                lambda d, i, c, _: crossmatch_with_dblp(d, i, c),
+            )
+        )
+
+    # Add the custom steps
+    for name, (custom_step, before) in _custom_steps.items():
+        names = [_[0] for _ in steps]
+        index = names.index(before) if before in names else len(steps)
+        steps.insert(index, (name, wrap_custom_step(custom_step)))
+
+    return steps
+
+
+def get_pipeline(
+    config: Configuration,
+) -> List[Tuple[str, PostprocessingStep]]:
+    """
+    Get the compiled post-processing pipeline for the given `config`.
+    Pipelines are cached, so every combination of options is compiled
+    only once (and changing an option gives a new pipeline); at most
+    `MAX_PIPELINES` of them are kept.
+    """
+
+    key = tuple(
+        repr(value) if isinstance(value := getattr(config, _), dict) else value
+        for _ in PIPELINE_OPTIONS
+    )
+
+    if (pipeline := _pipelines.get(key)) is None:
+        if len(_pipelines) >= MAX_PIPELINES:
+            _pipelines.clear()
+        pipeline = _pipelines[key] = compile_pipeline(config)
+
+    return pipeline
+
+
+def postprocess_bibtex(
+    bibtex_dict: dict,
+    identifier: str,
+    config: Configuration,
+    ads_bibcode: Optional[str] = None,
+) -> dict:
+    """
+    Post-process a BibTeX entry and apply a series of fixes and tweaks
+    (see `compile_pipeline()` for the steps and their order).
+    If the ADS bibcode for the `identifier` is already known, it can be
+    passed as `ads_bibcode` to skip the ADS query for the `adsurl`.
+    """
+
+    return apply_steps(
+        get_pipeline(config), bibtex_dict, identifier, config, ads_bibcode
+    )
+
+
+def apply_steps(
+    steps: List[Tuple[str, PostprocessingStep]],
+    bibtex_dict: dict,
+    identifier: str,
+    config: Configuration,
+    ads_bibcode: Optional[str] = None,
+) -> dict:
+    """
+    Apply the given `steps` (e.g., a part of the pipeline that is
+    returned by `get_pipeline()`) to a BibTeX entry, in order.
+    """
+
+    # If profiling is enabled, time every step (see `d2b --profile`)
+    if (profiler := get_profiler()) is not None:
+        for name, step in steps:
+            with Timer(profiler, name, "postprocess"):
+                bibtex_dict = step(
+                    bibtex_dict, identifier, config, ads_bibcode
+                )
+        return bibtex_dict
+
+    for _, step in steps:
+        bibtex_dict = step(bibtex_dict, identifier, config, ads_bibcode)
 
     return bibtex_dict
 
@@ -232,6 +454,8 @@ def format_author_names(bibtex_dict: dict) -> dict:
     if "author" not in bibtex_dict:
         return bibtex_dict
 
+    from bibtexparser.customization import splitname
+
     # Otherwise, split the author string into a list of individual authors
     authors_list = bibtex_dict["author"].split(" and ")
 
@@ -262,6 +486,8 @@ def generate_citekey(bibtex_dict: dict, delim: str = "_") -> dict:
     citekey would be "DeLaMuellerMarquez_2023".
     """
 
+    from bibtexparser.customization import splitname
+
     # Get the first author's name and split it into parts
     first_author = splitname(bibtex_dict["author"].split(" and ")[0])
 
@@ -283,6 +509,31 @@ def generate_citekey(bibtex_dict: dict, delim: str = "_") -> dict:
     return bibtex_dict
 
 
+def get_fields_to_remove(config: Configuration) -> Dict[str, FrozenSet[str]]:
+    """
+    Get the fields to remove for every entry type in `remove_fields`,
+    which includes the fields for "all" entry types.
+    """
+
+    all_fields = frozenset(config.remove_fields.get("all", []))
+
+    return {
+        entrytype: all_fields | frozenset(fields)
+        for entrytype, fields in config.remove_fields.items()
+    }
+
+
+def remove_fields_from_dict(bibtex_dict: dict, fields: FrozenSet[str]) -> dict:
+    """
+    Remove the given `fields` from a BibTeX entry (if present).
+    """
+
+    for field in fields:
+        bibtex_dict.pop(field, None)
+
+    return bibtex_dict
+
+
 def remove_fields(bibtex_dict: dict, config: Configuration) -> dict:
     """
     Remove fields from a BibTeX entry based on the `entrytype`.
@@ -290,17 +541,12 @@ def remove_fields(bibtex_dict: dict, config: Configuration) -> dict:
     more sense than removing it from `book`.
     """
 
-    # Remove fields that are not entry type specific
-    for field in config.remove_fields.get('all', []):
-        if field in bibtex_dict:
-            del bibtex_dict[field]
-
-    # Remove entry type specific fields
-    for field in config.remove_fields.get(bibtex_dict["ENTRYTYPE"], []):
-        if field in bibtex_dict:
-            del bibtex_dict[field]
+    fields_by_type = get_fields_to_remove(config)
+    fields = fields_by_type.get(
+        bibtex_dict["ENTRYTYPE"], fields_by_type.get("all", frozenset())
+    )
 
-    return bibtex_dict
+    return remove_fields_from_dict(bibtex_dict, fields)
 
 
 def remove_url_if_doi(bibtex_dict: dict) -> dict:
@@ -318,9 +564,15 @@ def remove_url_if_doi(bibtex_dict: dict) -> dict:
     return bibtex_dict
 
 
-def resolve_adsurl(bibtex_dict: dict, identifier: str) -> dict:
+def resolve_adsurl(
+    bibtex_dict: dict,
+    identifier: str,
+    config: Optional[Configuration] = None,
+    bibcode: Optional[str] = None,
+) -> dict:
     """
-    Resolve the `adsurl` field for a given BibTeX entry.
+    Resolve the `adsurl` field for a given BibTeX entry. If `bibcode`
+    is given, it is used instead of querying ADS for the `identifier`.
     """
 
     # If the entry already has an `adsurl` field, return the original dict
@@ -328,7 +580,8 @@ def resolve_adsurl(bibtex_dict: dict, identifier: str) -> dict:
         return bibtex_dict
 
     # Resolve the ADS bibcode
-    bibcode = get_ads_bibcode_for_identifier(identifier)
+    if bibcode is None:
+        bibcode = get_ads_bibcode_for_identifier(identifier, config)
 
     # If we found a bibcode, construct the ADS URL and add it to the dict
     if bibcode:
@@ -347,6 +600,10 @@ def truncate_author_list(bibtex_entry: dict, config: Configuration) -> dict:
     if "author" not in bibtex_entry:
         return bibtex_entry
 
+    # If there are not too many authors, there is nothing to do
+    if bibtex_entry["author"].count(" and ") < config.limit_authors:
+        return bibtex_entry
+
     # Split the author list into individual authors
     authors_list = bibtex_entry['author'].split(" and ")
 
@@ -0,0 +1,263 @@
+"""
+Measure where the time of a `d2b` run is spent (see `d2b --profile`):
+the requests to the different backends, parsing their responses, every
+step of the post-processing pipeline, and writing the BibTeX entries.
+If profiling is not enabled, the timers do (almost) nothing.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from contextlib import nullcontext
+from types import TracebackType
+from typing import (
+    Any,
+    ContextManager,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+
+import os
+import threading
+import time
+import tracemalloc
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+class Span(NamedTuple):
+    """
+    A single timed section of the code. The `start` is given in seconds
+    since the profiler was started, the `duration` in seconds.
+    """
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread_id: int
+
+
+class Profiler:
+    """
+    Collect the spans of all threads (and coroutines) of a run, and
+    summarize them. Optionally, the peak memory usage of the run is
+    measured with `tracemalloc` (which makes everything a bit slower).
+    """
+
+    def __init__(self, trace_memory: bool = False) -> None:
+
+        self.spans: List[Span] = []
+        self.trace_memory = trace_memory
+        self.wall_time: Optional[float] = None
+        self.peak_memory: Optional[int] = None
+
+        if trace_memory:
+            tracemalloc.start()
+        self.start = time.perf_counter()
+
+    def record(self, name: str, category: str, start: float) -> None:
+        """
+        Record a span that started at `start` (`time.perf_counter()`)
+        and ends now. (Appending to a list is thread-safe.)
+        """
+
+        end = time.perf_counter()
+        self.spans.append(
+            Span(
+                name=name,
+                category=category,
+                start=start - self.start,
+                duration=end - start,
+                thread_id=threading.get_ident(),
+            )
+        )
+
+    def stop(self) -> None:
+        """
+        Stop the profiler: store the wall time and the peak memory.
+        """
+
+        self.wall_time = time.perf_counter() - self.start
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    def get_summary(self) -> List[Dict[str, Any]]:
+        """
+        Get the number of calls, and the total, mean and maximum time of
+        all spans with the same category and name, sorted by total time.
+        """
+
+        groups: Dict[Tuple[str, str], List[float]] = {}
+        for span in list(self.spans):
+            key = (span.category, span.name)
+            groups.setdefault(key, []).append(span.duration)
+
+        summary = [
+            {
+                "category": category,
+                "name": name,
+                "calls": len(durations),
+                "total": sum(durations),
+                "mean": sum(durations) / len(durations),
+                "max": max(durations),
+            }
+            for (category, name), durations in groups.items()
+        ]
+
+        return sorted(summary, key=lambda _: -float(_["total"]))
+
+    def format_summary(self) -> str:
+        """
+        Format the summary (see `get_summary()`) as a table.
+        """
+
+        header = "Profile"
+        if self.wall_time is not None:
+            header += f" (wall time: {self.wall_time:.3f} s"
+            if self.peak_memory is not None:
+                header += f", peak memory: {self.peak_memory / 2**20:.1f} MiB"
+            header += ")"
+
+        lines = [
+            header + ":",
+            f"  {'category':<12}{'name':<26}{'calls':>7}"
+            f"{'total [s]':>11}{'mean [ms]':>11}{'max [ms]':>11}",
+        ]
+        for row in self.get_summary():
+            lines.append(
+                f"  {row['category']:<12}{row['name']:<26}{row['calls']:>7}"
+                f"{row['total']:>11.3f}{1000 * row['mean']:>11.1f}"
+                f"{1000 * row['max']:>11.1f}"
+            )
+        lines.append(
+            "Spans are nested (e.g., `resolve` contains `http`) and run in\n"
+            "parallel, so the totals do not add up to the wall time."
+        )
+
+        return "\n".join(lines)
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Convert the spans to the Chrome trace event format, which can be
+        opened in `chrome://tracing` or https://ui.perfetto.dev.
+        """
+
+        pid = os.getpid()
+
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round(span.start * 1e6, 3),
+                    "dur": round(span.duration * 1e6, 3),
+                    "pid": pid,
+                    "tid": span.thread_id,
+                }
+                for span in list(self.spans)
+            ],
+            "displayTimeUnit": "ms",
+        }
+
+    def to_timeline(self) -> dict:
+        """
+        Convert the spans (in the order in which they started) and the
+        summary to a plain JSON timeline.
+        """
+
+        return {
+            "wall_time": self.wall_time,
+            "peak_memory": self.peak_memory,
+            "summary": self.get_summary(),
+            "spans": [
+                span._asdict()
+                for span in sorted(self.spans, key=lambda _: _.start)
+            ],
+        }
+
+
+class Timer:
+    """
+    Context manager that records a span with the given profiler.
+    """
+
+    __slots__ = ("profiler", "name", "category", "start")
+
+    def __init__(self, profiler: Profiler, name: str, category: str) -> None:
+
+        self.profiler = profiler
+        self.name = name
+        self.category = category
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+
+        self.start = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+
+        self.profiler.record(self.name, self.category, self.start)
+
+
+# The profiler of the current run (None if profiling is disabled), and a
+# context manager that does nothing (and can be re-used)
+_profiler: Optional[Profiler] = None
+_no_timer: ContextManager[None] = nullcontext()
+
+
+def get_profiler() -> Optional[Profiler]:
+    """
+    Get the current profiler, or None if profiling is disabled.
+    """
+
+    return _profiler
+
+
+def start_profiling(trace_memory: bool = False) -> Profiler:
+    """
+    Enable profiling for all following `span()`s.
+    """
+
+    global _profiler
+    _profiler = Profiler(trace_memory=trace_memory)
+
+    return _profiler
+
+
+def stop_profiling() -> Optional[Profiler]:
+    """
+    Disable profiling, and return the (stopped) profiler, if any.
+    """
+
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler is not None:
+        profiler.stop()
+
+    return profiler
+
+
+def span(name: str, category: str) -> ContextManager[None]:
+    """
+    Time the code in a `with span(...):` block, if profiling is enabled.
+    """
+
+    if _profiler is None:
+        return _no_timer
+
+    return Timer(_profiler, name, category)
@@ -0,0 +1,238 @@
+"""
+Rate limiting for the requests to the different backends, so that we
+stay within the limits of the APIs when resolving in parallel instead
+of being throttled (HTTP 429) by them.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Dict, Mapping, Optional
+
+import random
+import re
+import time
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+# Never wait longer than this for a single request (in seconds), even if
+# the server asks us to (e.g., ADS resets its rate limit only once a day)
+MAX_DELAY = 60.0
+
+# Base delay (in seconds) for the exponential backoff when a server does
+# not tell us how long to wait (i.e., a 429 without `Retry-After`)
+BACKOFF_BASE = 1.0
+
+# Interval of Crossref's rate limit (e.g., "1s" in `X-Rate-Limit-Interval`)
+INTERVAL_REGEX = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$")
+INTERVAL_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def get_header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    """
+    Get the value of the header with the given `name` (case-insensitive),
+    or None if the header is not present.
+    """
+
+    name = name.lower()
+    for key, value in headers.items():
+        if key.lower() == name:
+            return value
+
+    return None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse the value of a `Retry-After` header, which is either a number
+    of seconds or an HTTP date, into the number of seconds to wait. If
+    the value is missing or invalid, None is returned.
+    """
+
+    if value is None:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_interval(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an interval like "1s" or "500ms" into a number of seconds, or
+    return None if the value is missing or invalid.
+    """
+
+    if value is None or (match := INTERVAL_REGEX.match(value)) is None:
+        return None
+
+    return float(match.group(1)) * INTERVAL_UNITS[match.group(2) or "s"]
+
+
+def is_rate_limited(status_code: int, headers: Mapping[str, str]) -> bool:
+    """
+    Check if a response means that we are sending too many requests.
+    """
+
+    return status_code == 429 or (
+        status_code == 503 and get_header(headers, "Retry-After") is not None
+    )
+
+
+def get_retry_delay(headers: Mapping[str, str], attempt: int) -> float:
+    """
+    Get the number of seconds to wait before retrying a request that was
+    rate-limited: the `Retry-After` of the server (if any), otherwise an
+    exponential backoff. A random jitter is added so that many threads
+    that were throttled at the same time do not all retry at once.
+    """
+
+    retry_after = parse_retry_after(get_header(headers, "Retry-After"))
+    if retry_after is None:
+        retry_after = BACKOFF_BASE * 2 ** attempt
+
+    return min(retry_after, MAX_DELAY) * random.uniform(1.0, 1.25)
+
+
+class TokenBucket:
+    """
+    The state of the rate limit for a single host. This is a token
+    bucket that holds up to `rate` tokens (i.e., it allows bursts of up
+    to one second worth of requests), implemented via the theoretical
+    arrival time of the next request, so that no refilling is needed.
+    """
+
+    def __init__(self) -> None:
+
+        # Time (`time.monotonic()`) at which the bucket is full again
+        self.full_at = 0.0
+
+        # Rate (in requests per second) that was used for the last request
+        self.rate: Optional[float] = None
+
+        # Time before which no request must be sent at all
+        self.blocked_until = 0.0
+
+        # Rate limit that the server announced (e.g., Crossref)
+        self.announced_rate: Optional[float] = None
+
+
+class RateLimiter:
+    """
+    Limit the number of requests per second to every host. The limiter
+    is shared by all threads (and coroutines): `reserve()` returns how
+    long the caller needs to wait before sending its request, so that
+    it can either use `time.sleep()` or `asyncio.sleep()`.
+    """
+
+    def __init__(self) -> None:
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = Lock()
+
+    def _get_bucket(self, host: str) -> TokenBucket:
+
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket()
+
+        return self._buckets[host]
+
+    def reserve(self, host: str, rate: Optional[float] = None) -> float:
+        """
+        Reserve a request to the given `host`, which must not receive
+        more than `rate` requests per second (None means no limit), and
+        return the number of seconds until the request may be sent.
+        """
+
+        with self._lock:
+
+            now = time.monotonic()
+            bucket = self._get_bucket(host)
+            start = max(now, bucket.blocked_until)
+
+            # Use the stricter of our limit and the limit of the server
+            if bucket.announced_rate is not None:
+                rate = min(rate or float("inf"), bucket.announced_rate)
+            if not rate or rate <= 0:
+                bucket.rate = None
+                return start - now
+            bucket.rate = rate
+
+            # Every request takes one token; each token is refilled after
+            # `interval` seconds, and the bucket holds `capacity` tokens
+            interval = 1.0 / rate
+            capacity = max(1.0, rate)
+            full_at = max(bucket.full_at, start)
+            send_at = max(start, full_at - (capacity - 1) * interval)
+            bucket.full_at = full_at + interval
+
+            return send_at - now
+
+    def block(self, host: str, delay: float) -> None:
+        """
+        Do not send any requests to the given `host` for `delay` seconds
+        (e.g., because the server asked us to wait). Afterwards, the
+        bucket starts empty, so that the requests that were waiting are
+        not all sent at once.
+        """
+
+        with self._lock:
+            bucket = self._get_bucket(host)
+            blocked_until = time.monotonic() + min(delay, MAX_DELAY)
+            bucket.blocked_until = max(bucket.blocked_until, blocked_until)
+            full_at = bucket.blocked_until
+            if bucket.rate is not None:
+                full_at += (max(1.0, bucket.rate) - 1) / bucket.rate
+            bucket.full_at = max(bucket.full_at, full_at)
+
+    def update(self, host: str, headers: Mapping[str, str]) -> None:
+        """
+        Update the rate limit for the given `host` from the headers of a
+        response: Crossref announces its limit via `X-Rate-Limit-Limit`
+        and `X-Rate-Limit-Interval`, ADS reports the remaining requests
+        via `X-RateLimit-Remaining` and `X-RateLimit-Reset`.
+        """
+
+        # Crossref: limit the rate to what the server announced
+        limit = get_header(headers, "X-Rate-Limit-Limit")
+        interval = parse_interval(get_header(headers, "X-Rate-Limit-Interval"))
+        if limit is not None and interval:
+            try:
+                announced_rate: Optional[float] = float(limit) / interval
+            except ValueError:
+                announced_rate = None
+            with self._lock:
+                self._get_bucket(host).announced_rate = announced_rate
+
+        # ADS: if there are no requests left, wait until the limit is reset
+        remaining = get_header(headers, "X-RateLimit-Remaining")
+        if remaining is not None and remaining.strip() == "0":
+            try:
+                reset = float(get_header(headers, "X-RateLimit-Reset") or "")
+            except ValueError:
+                return
+            self.block(host, reset - time.time())
+
+
+# One limiter that is shared by all backends and all threads
+_rate_limiter = RateLimiter()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the shared rate limiter.
+    """
+
+    return _rate_limiter
@@ -6,25 +6,88 @@ Methods for resolving identifiers to BibTeX entries.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-from bs4 import BeautifulSoup
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from threading import Lock
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TYPE_CHECKING,
+    Union,
+)
 
 import json
 
-import requests
-
-from doi2bibtex.ads import get_ads_token
-from doi2bibtex.bibtex import bibtex_string_to_dict, dict_to_bibtex_string
+from doi2bibtex import network
+from doi2bibtex.ads import (
+    get_ads_bibcode_for_identifier,
+    get_ads_bibcode_for_identifier_async,
+    get_ads_bibcodes_for_identifiers,
+    get_ads_headers,
+    get_ads_token,
+)
+from doi2bibtex.arxiv import (
+    resolve_arxiv_id_with_arxiv_api,
+    resolve_arxiv_id_with_arxiv_api_async,
+    resolve_arxiv_ids_with_arxiv_api,
+)
+from doi2bibtex.bibtex import (
+    bibtex_string_to_dict,
+    bibtex_string_to_dicts,
+    dict_to_bibtex_string,
+)
 from doi2bibtex.config import Configuration
-from doi2bibtex.identify import is_ads_bibcode, is_arxiv_id, is_doi, is_isbn
-from doi2bibtex.isbn import resolve_isbn_with_google_api
-from doi2bibtex.process import preprocess_identifier, postprocess_bibtex
+from doi2bibtex.constants import ADS_EXPORT_MAX_BIBCODES
+from doi2bibtex.crossref import (
+    resolve_doi_with_crossref_json,
+    resolve_doi_with_crossref_json_async,
+    resolve_dois_with_crossref_json,
+)
+from doi2bibtex.dblp import crossmatch_with_dblp, crossmatch_with_dblp_async
+from doi2bibtex.identify import classify_identifier, classify_identifiers
+from doi2bibtex.isbn import (
+    resolve_isbn_with_google_api,
+    resolve_isbn_with_google_api_async,
+    resolve_isbn_with_open_library,
+    resolve_isbn_with_open_library_async,
+    resolve_isbns_with_google_api,
+    resolve_isbns_with_open_library,
+)
+from doi2bibtex.process import (
+    PostprocessingStep,
+    apply_steps,
+    get_canonical_key,
+    get_pipeline,
+)
+from doi2bibtex.profiling import span
+from doi2bibtex.singleflight import AsyncSingleFlight, SingleFlight
+
+if TYPE_CHECKING:  # pragma: no cover
+    import httpx
 
 
 # -----------------------------------------------------------------------------
 # DEFINITIONS
 # -----------------------------------------------------------------------------
 
-def resolve_ads_bibcode(ads_bibcode: str) -> dict:
+def resolve_ads_bibcode(
+    ads_bibcode: str,
+    config: Optional[Configuration] = None,
+) -> dict:
     """
     Resolve an ADS bibcode using the ADS API and return the BibTeX.
     """
@@ -33,19 +96,99 @@ def resolve_ads_bibcode(ads_bibcode: str) -> dict:
     token = get_ads_token(raise_on_error=True)
 
     # Query the ADS API manually
-    r = requests.post(
+    r = network.post(
         url="https://api.adsabs.harvard.edu/v1/export/bibtex",
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        },
+        backend="ads",
+        config=config,
+        headers=get_ads_headers(token),
         data=json.dumps({"bibcode": [ads_bibcode]}),
     )
 
+    return parse_ads_export_response(r, ads_bibcode)
+
+
+async def resolve_ads_bibcode_async(
+    ads_bibcode: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_ads_bibcode()`.
+    """
+
+    # Get the ADS token (and raise an error if we don't have one)
+    token = get_ads_token(raise_on_error=True)
+
+    # Query the ADS API manually
+    r = await network.post_async(
+        url="https://api.adsabs.harvard.edu/v1/export/bibtex",
+        backend="ads",
+        client=client,
+        config=config,
+        headers=get_ads_headers(token),
+        data=json.dumps({"bibcode": [ads_bibcode]}),
+    )
+
+    return parse_ads_export_response(r, ads_bibcode)
+
+
+def resolve_ads_bibcodes(
+    ads_bibcodes: List[str],
+    config: Optional[Configuration] = None,
+    chunk_size: int = ADS_EXPORT_MAX_BIBCODES,
+) -> Dict[str, dict]:
+    """
+    Resolve multiple ADS bibcodes at once: The bibcodes are sent to the
+    ADS export API in chunks of (at most) `chunk_size` bibcodes, which
+    needs much fewer requests (and thus, much less of the ADS rate limit)
+    than resolving them one by one. Returns a dict that maps the given
+    bibcodes to their BibTeX dicts; bibcodes for which ADS did not return
+    an entry are not included.
+    """
+
+    # Get the ADS token (and raise an error if we don't have one)
+    token = get_ads_token(raise_on_error=True)
+
+    # Remove duplicates (but keep the order, so that requests are cacheable)
+    ads_bibcodes = list(dict.fromkeys(ads_bibcodes))
+
+    results: Dict[str, dict] = {}
+    for i in range(0, len(ads_bibcodes), chunk_size):
+
+        # Query the ADS API for the current chunk of bibcodes
+        chunk = ads_bibcodes[i:i + chunk_size]
+        r = network.post(
+            url="https://api.adsabs.harvard.edu/v1/export/bibtex",
+            backend="ads",
+            config=config,
+            headers=get_ads_headers(token),
+            data=json.dumps({"bibcode": chunk}),
+        )
+        if (error := r.status_code) != 200:
+            raise network.ResolveError(
+                f"Error {error} resolving {len(chunk)} ADS bibcodes", error
+            )
+
+        # The ADS export uses the bibcode as the citekey, so we can use it
+        # to split the response back out to the individual bibcodes
+        bibtex_string = json.loads(r.text)["export"]
+        for bibtex_dict in bibtex_string_to_dicts(bibtex_string):
+            if bibtex_dict["ID"] in chunk:
+                results[bibtex_dict["ID"]] = bibtex_dict
+
+    return results
+
+
+def parse_ads_export_response(r: network.Response, ads_bibcode: str) -> dict:
+    """
+    Parse the response of the ADS export API into a BibTeX dict.
+    """
+
     # Check if we got a 200 response; if not, raise an error
     if (error := r.status_code) != 200:
-        raise RuntimeError(
-            f'Error {error} resolving "{ads_bibcode}": no BibTeX entry found'
+        raise network.ResolveError(
+            f'Error {error} resolving "{ads_bibcode}": no BibTeX entry found',
+            error,
         )
 
     # Parse the response using JSON
@@ -57,24 +200,192 @@ def resolve_ads_bibcode(ads_bibcode: str) -> dict:
     return bibtex_dict
 
 
-def resolve_arxiv_id(arxiv_id: str) -> dict:
+def resolve_arxiv_id(
+    arxiv_id: str,
+    config: Optional[Configuration] = None,
+) -> dict:
     """
     Resolve an arXiv ID using arxiv2bibtex.org and return the BibTeX
     entry.
     """
 
-    # Send a request to arxiv2bibtex.org
-    # We could also use the arXiv API instead, but it's a bit more complicated
-    # and would require us to parse the XML response ourselves...
-    r = requests.get(f"https://arxiv2bibtex.org/?q={arxiv_id}&format=biblatex")
+    # Send a request to arxiv2bibtex.org (see `arxiv.py` for the arXiv API)
+    r = network.get(
+        url=f"https://arxiv2bibtex.org/?q={arxiv_id}&format=biblatex",
+        backend="arxiv",
+        config=config,
+    )
+
+    return parse_arxiv2bibtex_response(r, arxiv_id)
+
+
+async def resolve_arxiv_id_async(
+    arxiv_id: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_arxiv_id()`.
+    """
+
+    r = await network.get_async(
+        url=f"https://arxiv2bibtex.org/?q={arxiv_id}&format=biblatex",
+        backend="arxiv",
+        client=client,
+        config=config,
+    )
+
+    return parse_arxiv2bibtex_response(r, arxiv_id)
+
+
+def resolve_arxiv_id_with_backend(
+    arxiv_id: str,
+    config: Configuration,
+) -> dict:
+    """
+    Resolve an arXiv ID with the backend that is selected by
+    `arxiv_backend`: either arxiv2bibtex.org ("arxiv2bibtex"), or the
+    Atom feed of the arXiv API ("arxiv-api").
+    """
+
+    if config.arxiv_backend == "arxiv-api":
+        return resolve_arxiv_id_with_arxiv_api(arxiv_id, config)
+    if config.arxiv_backend == "arxiv2bibtex":
+        return resolve_arxiv_id(arxiv_id, config)
+
+    raise ValueError(f'Unknown arXiv backend: "{config.arxiv_backend}"')
+
+
+async def resolve_arxiv_id_with_backend_async(
+    arxiv_id: str,
+    client: "httpx.AsyncClient",
+    config: Configuration,
+) -> dict:
+    """
+    Asynchronous version of `resolve_arxiv_id_with_backend()`.
+    """
+
+    if config.arxiv_backend == "arxiv-api":
+        return await resolve_arxiv_id_with_arxiv_api_async(
+            arxiv_id, client, config
+        )
+    if config.arxiv_backend == "arxiv2bibtex":
+        return await resolve_arxiv_id_async(arxiv_id, client, config)
+
+    raise ValueError(f'Unknown arXiv backend: "{config.arxiv_backend}"')
+
+
+def get_isbn_backends(config: Configuration) -> List[str]:
+    """
+    Get the ISBN backends that are selected by `isbn_backends` (the
+    Google Books API, "google-books", and / or the Books API of Open
+    Library, "open-library"). Raises a `ValueError` if there are none,
+    or if any of them is unknown.
+    """
+
+    for backend in config.isbn_backends:
+        if backend not in ("google-books", "open-library"):
+            raise ValueError(f'Unknown ISBN backend: "{backend}"')
+    if not config.isbn_backends:
+        raise ValueError("No ISBN backend selected!")
+
+    return list(config.isbn_backends)
+
+
+def resolve_isbn_with_backend(isbn: str, config: Configuration) -> dict:
+    """
+    Resolve an ISBN with the backends that are selected by `isbn_backends`
+    (see `get_isbn_backends()`): if a backend fails (e.g., because it
+    does not know the book), the next one is tried. If all of them fail,
+    the error of the first one is raised.
+    """
+
+    errors: List[Exception] = []
+    for backend in get_isbn_backends(config):
+        try:
+            if backend == "google-books":
+                return resolve_isbn_with_google_api(isbn, config)
+            return resolve_isbn_with_open_library(isbn, config)
+        except Exception as e:
+            errors.append(e)
+
+    raise errors[0]
+
+
+async def resolve_isbn_with_backend_async(
+    isbn: str,
+    client: "httpx.AsyncClient",
+    config: Configuration,
+) -> dict:
+    """
+    Asynchronous version of `resolve_isbn_with_backend()`.
+    """
+
+    errors: List[Exception] = []
+    for backend in get_isbn_backends(config):
+        try:
+            if backend == "google-books":
+                return await resolve_isbn_with_google_api_async(
+                    isbn, client, config
+                )
+            return await resolve_isbn_with_open_library_async(
+                isbn, client, config
+            )
+        except Exception as e:
+            errors.append(e)
+
+    raise errors[0]
+
+
+def resolve_isbns_with_backend(
+    isbns: List[str],
+    config: Configuration,
+) -> Dict[str, dict]:
+    """
+    Resolve multiple `isbns` with the backends that are selected by
+    `isbn_backends` (see `get_isbn_backends()`), with as few requests as
+    possible: every backend is only asked for the ISBNs that the previous
+    ones did not find. ISBNs that were not found (or for which a request
+    failed) are skipped.
+    """
+
+    import requests
+
+    results: Dict[str, dict] = {}
+    for backend in get_isbn_backends(config):
+        if not (missing := [_ for _ in isbns if _ not in results]):
+            break
+        try:
+            if backend == "google-books":
+                results.update(resolve_isbns_with_google_api(missing, config))
+            else:
+                results.update(
+                    resolve_isbns_with_open_library(missing, config)
+                )
+        except (network.ResolveError, requests.RequestException):
+            continue
+
+    return results
+
+
+def parse_arxiv2bibtex_response(r: network.Response, arxiv_id: str) -> dict:
+    """
+    Extract the BibLaTeX entry from the HTML page of arxiv2bibtex.org
+    and parse it into a BibTeX dict.
+    """
+
     if (error := r.status_code) != 200:
-        raise RuntimeError(f"Error {error} resolving {arxiv_id}")
+        raise network.ResolveError(
+            f"Error {error} resolving {arxiv_id}", error
+        )
 
     # Find the BibLaTeX entry using BeautifulSoup
-    soup = BeautifulSoup(r.text, "html.parser")
-    textarea = soup.select_one("#biblatex textarea.wikiinfo")
+    from bs4 import BeautifulSoup
+    with span("arxiv2bibtex", "html"):
+        soup = BeautifulSoup(r.text, "html.parser")
+        textarea = soup.select_one("#biblatex textarea.wikiinfo")
     if textarea is None:
-        raise RuntimeError(
+        raise network.ResolveError(
             f'Error resolving "{arxiv_id}": no BibTeX entry found'
         )
     bibtex_string = textarea.get_text()
@@ -85,18 +396,92 @@ def resolve_arxiv_id(arxiv_id: str) -> dict:
     return bibtex_dict
 
 
-def resolve_doi(doi: str) -> dict:
+def get_crossref_bibtex_url(doi: str) -> str:
+    """
+    Get the URL of the Crossref API that returns the BibTeX for a DOI.
+    """
+
+    return (
+        f"https://api.crossref.org/works/{doi}/transform/application/x-bibtex"
+    )
+
+
+def resolve_doi(doi: str, config: Optional[Configuration] = None) -> dict:
     """
     Resolve a DOI using the Crossref API and return the BibTeX entry.
     """
 
     # Send a request to the Crossref API to get the BibTeX entry
-    r = requests.get(
-        f"https://api.crossref.org/works/{doi}/transform/application/x-bibtex"
+    r = network.get(
+        url=get_crossref_bibtex_url(doi),
+        backend="crossref",
+        config=config,
     )
+
+    return parse_crossref_bibtex_response(r, doi)
+
+
+async def resolve_doi_async(
+    doi: str,
+    client: "httpx.AsyncClient",
+    config: Optional[Configuration] = None,
+) -> dict:
+    """
+    Asynchronous version of `resolve_doi()`.
+    """
+
+    # Send a request to the Crossref API to get the BibTeX entry
+    r = await network.get_async(
+        url=get_crossref_bibtex_url(doi),
+        backend="crossref",
+        client=client,
+        config=config,
+    )
+
+    return parse_crossref_bibtex_response(r, doi)
+
+
+def resolve_doi_with_backend(doi: str, config: Configuration) -> dict:
+    """
+    Resolve a DOI with the backend that is selected by `doi_backend`:
+    either the BibTeX transform of the Crossref API ("crossref-bibtex"),
+    or the Crossref JSON metadata ("crossref-json").
+    """
+
+    if config.doi_backend == "crossref-json":
+        return resolve_doi_with_crossref_json(doi, config)
+    if config.doi_backend == "crossref-bibtex":
+        return resolve_doi(doi, config)
+
+    raise ValueError(f'Unknown DOI backend: "{config.doi_backend}"')
+
+
+async def resolve_doi_with_backend_async(
+    doi: str,
+    client: "httpx.AsyncClient",
+    config: Configuration,
+) -> dict:
+    """
+    Asynchronous version of `resolve_doi_with_backend()`.
+    """
+
+    if config.doi_backend == "crossref-json":
+        return await resolve_doi_with_crossref_json_async(doi, client, config)
+    if config.doi_backend == "crossref-bibtex":
+        return await resolve_doi_async(doi, client, config)
+
+    raise ValueError(f'Unknown DOI backend: "{config.doi_backend}"')
+
+
+def parse_crossref_bibtex_response(r: network.Response, doi: str) -> dict:
+    """
+    Parse the BibTeX returned by the Crossref API into a dict.
+    """
+
     if (error := r.status_code) != 200:
-        raise RuntimeError(
-            f'Error {error} resolving DOI "{doi}": no BibTeX entry found'
+        raise network.ResolveError(
+            f'Error {error} resolving DOI "{doi}": no BibTeX entry found',
+            error,
         )
 
     # Parse the response into a dict
@@ -105,46 +490,698 @@ def resolve_doi(doi: str) -> dict:
     return bibtex
 
 
-def resolve_identifier(identifier: str, config: Configuration) -> str:
+def format_error(error: Exception) -> str:
+    """
+    Format an `error` that occurred while resolving an identifier as
+    the message that is returned instead of a BibTeX entry.
+    """
+
+    return "\n" + "  There was an error:\n  " + str(error) + "\n"
+
+
+def make_result(identifier: str, result: str) -> Dict[str, str]:
+    """
+    Convert the `result` of `resolve_identifier()` for the given
+    `identifier` to a JSON object with either a `bibtex` or an `error`.
+    """
+
+    # BibTeX entries always start with an "@", so everything else is an
+    # error message from `resolve_identifier()`
+    if result.startswith("@"):
+        return {"identifier": identifier, "bibtex": result}
+
+    message = result.strip().split("\n", 1)[-1].strip()
+    return {"identifier": identifier, "error": message}
+
+
+# Requests to the backends that are currently in flight, so that concurrent
+# requests for the same identifier are only sent once
+_flights = SingleFlight()
+_async_flights = AsyncSingleFlight()
+
+
+def get_flight_key(identifier: str, config: Configuration) -> Hashable:
+    """
+    Get the key under which concurrent fetches of the given `identifier`
+    are coalesced (see `fetch_from_backend()`): the canonical identifier
+    and the options that select the backends, so that fetches with
+    different copies of the same configuration (e.g., for the requests to
+    the server) share a single request.
+    """
+
+    return (
+        get_canonical_key(identifier),
+        config.doi_backend,
+        config.arxiv_backend,
+        tuple(config.isbn_backends),
+        get_ads_token() is not None,
+    )
+
+
+def fetch_from_backend(
+    identifier_type: str,
+    identifier: str,
+    config: Configuration,
+) -> dict:
+    """
+    Resolve the `identifier` (of the given type, without a prefix) with
+    the appropriate backend. Identifiers that have recently failed to
+    resolve fail right away (see `network.check_failure_cache()`), and
+    new failures are remembered (see `network.record_failure()`).
+    Concurrent calls for the same identifier (or a different way of
+    writing it, see `get_canonical_key()`) share a single request.
+    """
+
+    resolver: Callable[[str, Configuration], dict]
+    if identifier_type == "doi":
+        resolver = resolve_doi_with_backend
+    elif identifier_type == "arxiv":
+        resolver = resolve_arxiv_id_with_backend
+    elif identifier_type == "ads":
+        resolver = resolve_ads_bibcode
+    elif identifier_type == "isbn":
+        resolver = resolve_isbn_with_backend
+    else:
+        raise RuntimeError(f"Unrecognized identifier: {identifier}")
+
+    key = get_canonical_key(identifier)
+
+    def fetch() -> dict:
+        network.check_failure_cache(key, config)
+        try:
+            return resolver(identifier, config)
+        except Exception as e:
+            network.record_failure(key, e, config)
+            raise
+
+    # Every caller gets its own copy, because the post-processing modifies it
+    return dict(_flights.do(get_flight_key(identifier, config), fetch))
+
+
+async def fetch_from_backend_async(
+    identifier_type: str,
+    identifier: str,
+    client: "httpx.AsyncClient",
+    config: Configuration,
+) -> dict:
+    """
+    Asynchronous version of `fetch_from_backend()`.
+    """
+
+    resolver: Callable[
+        [str, "httpx.AsyncClient", Configuration], Awaitable[dict]
+    ]
+    if identifier_type == "doi":
+        resolver = resolve_doi_with_backend_async
+    elif identifier_type == "arxiv":
+        resolver = resolve_arxiv_id_with_backend_async
+    elif identifier_type == "ads":
+        resolver = resolve_ads_bibcode_async
+    elif identifier_type == "isbn":
+        resolver = resolve_isbn_with_backend_async
+    else:
+        raise RuntimeError(f"Unrecognized identifier: {identifier}")
+
+    key = get_canonical_key(identifier)
+
+    async def fetch() -> dict:
+        network.check_failure_cache(key, config)
+        try:
+            return await resolver(identifier, client, config)
+        except Exception as e:
+            network.record_failure(key, e, config)
+            raise
+
+    return dict(
+        await _async_flights.do(get_flight_key(identifier, config), fetch)
+    )
+
+
+def fetch_bibtex_dict(
+    identifier: str,
+    config: Configuration,
+    prefetched: Optional[Dict[str, dict]] = None,
+    on_final_identifier: Optional[Callable[[str], Any]] = None,
+) -> Tuple[str, dict]:
+    """
+    Fetch the (not yet post-processed) BibTeX dict for the given
+    `identifier`: determine the type of the identifier and call the
+    appropriate resolver function. If the BibTeX dict has already been
+    fetched (e.g., as part of a batch request), it can be passed via
+    `prefetched`, which maps identifiers to BibTeX dicts.
+    Returns the identifier that the BibTeX dict belongs to (which is
+    the DOI if an arXiv ID was updated) and the BibTeX dict.
+    The (optional) `on_final_identifier` is called with this identifier
+    as soon as it is known (i.e., before the last request is sent), so
+    that the caller can start other lookups for it at the same time.
+    ADS bibcodes are not passed to `on_final_identifier`, because their
+    entries already come with an `adsurl`.
+    """
+
+    prefetched = prefetched if prefetched is not None else {}
+
+    # Determine the type of the identifier and remove the "doi:" or "arXiv:"
+    # prefix, if present
+    identifier_type, identifier = classify_identifier(identifier)
+
+    # Unless an arXiv ID might get updated to a DOI, we already know the
+    # identifier that the BibTeX dict will belong to
+    may_update = config.update_arxiv_if_doi and identifier_type == "arxiv"
+    if on_final_identifier is not None and not may_update:
+        if identifier_type not in ("ads", "unknown"):
+            on_final_identifier(identifier)
+
+    # Resolve the identifier to a BibTeX entry (as a dict); we copy
+    # pre-fetched entries because the post-processing modifies them
+    if identifier in prefetched:
+        bibtex_dict = dict(prefetched[identifier])
+    else:
+        bibtex_dict = fetch_from_backend(identifier_type, identifier, config)
+
+    # If we resolved an arXiv ID and we got a BibTeX entry with a DOI,
+    # we can update the identifier to the DOI and resolve that one to
+    # get a better BibTeX entry (published paper instead of preprint)
+    if may_update and "doi" in bibtex_dict:
+        identifier = bibtex_dict["doi"]
+        if on_final_identifier is not None:
+            on_final_identifier(identifier)
+        if identifier in prefetched:
+            bibtex_dict = dict(prefetched[identifier])
+        else:
+            bibtex_dict = fetch_from_backend("doi", identifier, config)
+    elif may_update and on_final_identifier is not None:
+        on_final_identifier(identifier)
+
+    return identifier, bibtex_dict
+
+
+# Threads for the enrichment lookups (created when they are first needed)
+_enrichment_executor: Optional[ThreadPoolExecutor] = None
+_enrichment_executor_lock = Lock()
+
+
+def get_enrichment_executor() -> ThreadPoolExecutor:
+    """
+    Get the thread pool that is used for the enrichment lookups (i.e.,
+    the ADS bibcode for the `adsurl` and the cross-match with dblp),
+    which run concurrently with the other requests for an identifier.
+    """
+
+    global _enrichment_executor
+
+    with _enrichment_executor_lock:
+        if _enrichment_executor is None:
+            _enrichment_executor = ThreadPoolExecutor(
+                max_workers=32,
+                thread_name_prefix="d2b-enrich",
+            )
+        return _enrichment_executor
+
+
+def merge_enrichment(bibtex_dict: dict, before: dict, after: dict) -> dict:
+    """
+    Merge the result of an enrichment step (e.g., the cross-match with
+    dblp) that was run on a copy of the BibTeX dict into `bibtex_dict`:
+    all fields that are different in `after` than in `before` (i.e., that
+    the step added or changed) are copied, everything else is kept.
+    """
+
+    for key, value in after.items():
+        if before.get(key) != value:
+            bibtex_dict[key] = value
+
+    return bibtex_dict
+
+
+def split_pipeline(
+    config: Configuration,
+) -> Tuple[List[Tuple[str, PostprocessingStep]], ...]:
+    """
+    Split the post-processing pipeline for the given `config` (see
+    `process.get_pipeline()`) into the parts before and after the two
+    steps that send requests, so that these requests can run at the same
+    time: (1) the steps before the `adsurl` is added, after which the
+    title and the authors are final (so the cross-match with dblp can
+    start), (2) the steps up to the cross-match with dblp (including the
+    one that adds the `adsurl`), and (3) the steps after the cross-match.
+    """
+
+    pipeline = get_pipeline(config)
+    names = [name for name, _ in pipeline]
+
+    end = len(names)
+    if "crossmatch_with_dblp" in names:
+        end = names.index("crossmatch_with_dblp")
+    start = end
+    if "resolve_adsurl" in names:
+        start = names.index("resolve_adsurl")
+
+    return pipeline[:start], pipeline[start:end], pipeline[end + 1:]
+
+
+def finalize_bibtex_dict(
+    bibtex_dict: dict,
+    identifier: str,
+    config: Configuration,
+    ads_bibcode: Union[None, str, "Future[str]"] = None,
+) -> str:
+    """
+    Post-process the given BibTeX dict and convert it to a string.
+    The ADS bibcode for the `adsurl` can be passed as `ads_bibcode` if it
+    is already known (or as a `Future` if it is already being looked up).
+    The lookup for the `adsurl` and the cross-match with dblp run at the
+    same time, while the entry is post-processed (in a single pass, see
+    `split_pipeline()`): dblp gets a copy of the entry once its title and
+    authors are final, and the fields that it adds are merged into the
+    entry at the position of the cross-match in the pipeline.
+    """
+
+    executor = get_enrichment_executor()
+
+    # Start looking up the ADS bibcode (unless this is not needed, or the
+    # caller has already done that)
+    needs_adsurl = config.resolve_adsurl and "adsurl" not in bibtex_dict
+    if needs_adsurl and ads_bibcode is None:
+        ads_bibcode = executor.submit(
+            get_ads_bibcode_for_identifier, identifier, config
+        )
+
+    before_adsurl, before_dblp, after_dblp = split_pipeline(config)
+    bibtex_dict = apply_steps(before_adsurl, bibtex_dict, identifier, config)
+
+    # Start the cross-match with dblp on a copy of the entry
+    dblp_future: Optional["Future[dict]"] = None
+    if config.crossmatch_with_dblp:
+        before = dict(bibtex_dict)
+        dblp_future = executor.submit(
+            crossmatch_with_dblp, dict(before), identifier, config
+        )
+
+    # Add the `adsurl` (once we know the ADS bibcode), and merge the result
+    # of the cross-match with dblp
+    if isinstance(ads_bibcode, Future):
+        ads_bibcode = ads_bibcode.result() if needs_adsurl else None
+    bibtex_dict = apply_steps(
+        before_dblp, bibtex_dict, identifier, config, ads_bibcode
+    )
+    if dblp_future is not None:
+        bibtex_dict = merge_enrichment(
+            bibtex_dict, before, dblp_future.result()
+        )
+    bibtex_dict = apply_steps(after_dblp, bibtex_dict, identifier, config)
+
+    # Convert the BibTeX dict to a string
+    return dict_to_bibtex_string(bibtex_dict).strip()
+
+
+def resolve_identifier(
+    identifier: str,
+    config: Configuration,
+    prefetched: Optional[Dict[str, dict]] = None,
+) -> str:
     """
     Resolve the given `identifier` to a BibTeX entry. This function
     basically just determines the type of the identifier, calls the
     appropriate resolver function, and post-processes the result.
+    See `fetch_bibtex_dict()` for the `prefetched` argument.
+    The lookups for the `adsurl` and the cross-match with dblp run at
+    the same time as the other requests (see `finalize_bibtex_dict()`),
+    so the latency is (roughly) that of the slowest backend instead of
+    the sum of all of them.
     """
 
+    # Start looking up the ADS bibcode for the `adsurl` as soon as we know
+    # the identifier, so that it runs at the same time as the other requests
+    ads_bibcode: Optional["Future[str]"] = None
+
+    def start_ads_lookup(identifier: str) -> None:
+        nonlocal ads_bibcode
+        if config.resolve_adsurl:
+            ads_bibcode = get_enrichment_executor().submit(
+                get_ads_bibcode_for_identifier, identifier, config
+            )
+
     try:
+        with span("resolve_identifier", "resolve"):
+            with span("fetch_bibtex_dict", "resolve"):
+                identifier, bibtex_dict = fetch_bibtex_dict(
+                    identifier, config, prefetched, start_ads_lookup
+                )
+            with span("finalize_bibtex_dict", "resolve"):
+                return finalize_bibtex_dict(
+                    bibtex_dict, identifier, config, ads_bibcode=ads_bibcode
+                )
+    except Exception as e:
+        return format_error(e)
 
-        # Remove the "doi:" or "arXiv:" prefix, if present
-        identifier = preprocess_identifier(identifier)
 
-        # Resolve the identifier to a BibTeX entry (as a dict)
-        if is_doi(identifier):
-            bibtex_dict = resolve_doi(identifier)
-        elif is_arxiv_id(identifier):
-            bibtex_dict = resolve_arxiv_id(identifier)
-        elif is_ads_bibcode(identifier):
-            bibtex_dict = resolve_ads_bibcode(identifier)
-        elif is_isbn(identifier):
-            bibtex_dict = resolve_isbn_with_google_api(identifier)
-        else:
-            raise RuntimeError(f"Unrecognized identifier: {identifier}")
+async def resolve_identifier_async(
+    identifier: str,
+    config: Configuration,
+    client: Optional["httpx.AsyncClient"] = None,
+) -> str:
+    """
+    Asynchronous version of `resolve_identifier()`: all requests to the
+    backends (including the ones for the `adsurl` and the cross-match
+    with dblp) are sent with the given `client`. If no `client` is
+    given, a new one is created (see `network.make_async_client()`).
+    The result is the same as for `resolve_identifier()`.
+    """
+
+    # Create a new client, if needed
+    if client is None:
+        async with network.make_async_client(config) as client:
+            return await resolve_identifier_async(identifier, config, client)
+
+    import asyncio
+
+    # Lookups that run at the same time as the other requests
+    ads_bibcode: Optional["asyncio.Future[str]"] = None
+    dblp_task: Optional["asyncio.Future[dict]"] = None
 
-        # If we resolved an arXiv ID and we got a BibTeX entry with a DOI,
-        # we can update the identifier to the DOI and resolve that one to
-        # get a better BibTeX entry (published paper instead of preprint)
+    def start_ads_lookup(identifier: str) -> "asyncio.Future[str]":
+        return asyncio.ensure_future(
+            get_ads_bibcode_for_identifier_async(identifier, client, config)
+        )
+
+    try:
+
+        # Determine the type of the identifier and remove the "doi:" or
+        # "arXiv:" prefix, if present
+        identifier_type, identifier = classify_identifier(identifier)
+
+        # Start looking up the ADS bibcode right away, unless the identifier
+        # might still change (see `fetch_bibtex_dict()`)
+        may_update = config.update_arxiv_if_doi and identifier_type == "arxiv"
         if (
-            config.update_arxiv_if_doi and
-            is_arxiv_id(identifier) and
-            "doi" in bibtex_dict
+            config.resolve_adsurl
+            and not may_update
+            and identifier_type not in ("ads", "unknown")
         ):
-            identifier = bibtex_dict["doi"]
-            bibtex_dict = resolve_doi(identifier)
+            ads_bibcode = start_ads_lookup(identifier)
+
+        # Resolve the identifier to a BibTeX entry (as a dict)
+        bibtex_dict = await fetch_from_backend_async(
+            identifier_type, identifier, client, config
+        )
 
-        # Post-process the BibTeX dict
-        bibtex_dict = postprocess_bibtex(bibtex_dict, identifier, config)
+        # Update arXiv entries with a DOI (see `fetch_bibtex_dict()`); the
+        # ADS bibcode is looked up for the DOI at the same time
+        if may_update:
+            if "doi" in bibtex_dict:
+                identifier = bibtex_dict["doi"]
+            if config.resolve_adsurl:
+                ads_bibcode = start_ads_lookup(identifier)
+            if "doi" in bibtex_dict:
+                bibtex_dict = await fetch_from_backend_async(
+                    "doi", identifier, client, config
+                )
+
+        # Post-process the BibTeX dict in a single pass, and start the
+        # cross-match with dblp once the title and authors are final (see
+        # `finalize_bibtex_dict()`)
+        before_adsurl, before_dblp, after_dblp = split_pipeline(config)
+        bibtex_dict = apply_steps(
+            before_adsurl, bibtex_dict, identifier, config
+        )
+        if config.crossmatch_with_dblp:
+            before = dict(bibtex_dict)
+            dblp_task = asyncio.ensure_future(
+                crossmatch_with_dblp_async(
+                    dict(before), identifier, client, config
+                )
+            )
+
+        # Add the `adsurl` (once we know the ADS bibcode), and merge the
+        # result of the cross-match with dblp
+        bibcode = None
+        if config.resolve_adsurl and "adsurl" not in bibtex_dict:
+            if ads_bibcode is None:
+                ads_bibcode = start_ads_lookup(identifier)
+            bibcode = await ads_bibcode
+        bibtex_dict = apply_steps(
+            before_dblp, bibtex_dict, identifier, config, bibcode
+        )
+        if dblp_task is not None:
+            bibtex_dict = merge_enrichment(
+                bibtex_dict, before, await dblp_task
+            )
+        bibtex_dict = apply_steps(after_dblp, bibtex_dict, identifier, config)
 
         # Convert the BibTeX dict to a string
         return dict_to_bibtex_string(bibtex_dict).strip()
 
     except Exception as e:
-        return "\n" + "  There was an error:\n  " + str(e) + "\n"
+        return format_error(e)
+
+    finally:
+        for task in (ads_bibcode, dblp_task):
+            if task is not None and not task.done():
+                task.cancel()
+
+
+def resolve_identifiers(
+    identifiers: List[str],
+    config: Configuration,
+    n_jobs: int = 1,
+) -> List[str]:
+    """
+    Resolve a list of `identifiers` to BibTeX entries, using a pool of
+    (at most) `n_jobs` worker threads. The result for every identifier
+    is the same as for `resolve_identifier()`, that is, failures are
+    returned as an error message instead of raising. The results are
+    returned in the same order as the input identifiers.
+    To reduce the number of requests, ADS bibcodes are resolved in bulk
+    (see `resolve_ads_bibcodes()`), and so are DOIs if the Crossref JSON
+    backend is used (see `resolve_dois_with_crossref_json()`), arXiv IDs
+    if the arXiv API backend is used (see `arxiv.py`), ISBNs (see
+    `resolve_isbns_with_backend()`), and the bibcodes for the `adsurl`
+    field (see `get_ads_bibcodes_for_identifiers()`).
+    Identifiers that are given more than once (also in different ways,
+    see `get_canonical_key()`) are only resolved once.
+    """
+
+    # Resolve only the first of all identifiers with the same canonical key;
+    # the others get the same result
+    keys = [get_canonical_key(_) for _ in identifiers]
+    first: Dict[str, str] = {}
+    for key, identifier in zip(keys, identifiers):
+        first.setdefault(key, identifier)
+    if len(first) < len(identifiers):
+        results = resolve_identifiers(list(first.values()), config, n_jobs)
+        by_key = dict(zip(first, results))
+        return [by_key[_] for _ in keys]
+
+    # Fetch the entries for all ADS bibcodes (DOIs, arXiv IDs) with as few
+    # requests as possible; if this fails (e.g., because a request failed
+    # or a response was malformed), we resolve them one by one below. Other
+    # errors (i.e., bugs) are not hidden.
+    import requests
+    prefetch_errors = (
+        RuntimeError,  # Including `network.ResolveError`
+        ValueError,
+        KeyError,
+        requests.RequestException,
+    )
+    prefetched: Dict[str, dict] = {}
+    by_type: Dict[str, List[str]] = {}
+    for identifier_type, identifier in classify_identifiers(identifiers):
+        by_type.setdefault(identifier_type, []).append(identifier)
+    ads_bibcodes = by_type.get("ads", [])
+    if len(ads_bibcodes) > 1:
+        try:
+            prefetched.update(resolve_ads_bibcodes(ads_bibcodes, config))
+        except prefetch_errors:
+            pass
+    arxiv_ids = by_type.get("arxiv", [])
+    if config.arxiv_backend == "arxiv-api" and len(arxiv_ids) > 1:
+        try:
+            prefetched.update(
+                resolve_arxiv_ids_with_arxiv_api(arxiv_ids, config)
+            )
+        except prefetch_errors:
+            pass
+
+    # The DOIs include the ones that we found for arXiv IDs (if any), which
+    # are needed for `update_arxiv_if_doi`
+    dois = list(by_type.get("doi", []))
+    if config.update_arxiv_if_doi:
+        dois += [
+            prefetched[_]["doi"]
+            for _ in arxiv_ids
+            if "doi" in prefetched.get(_, {})
+        ]
+    if config.doi_backend == "crossref-json" and len(dois) > 1:
+        try:
+            prefetched.update(resolve_dois_with_crossref_json(dois, config))
+        except prefetch_errors:
+            pass
+    if len(isbns := by_type.get("isbn", [])) > 1:
+        try:
+            prefetched.update(resolve_isbns_with_backend(isbns, config))
+        except prefetch_errors:
+            pass
+
+    def fetch(identifier: str) -> Union[Tuple[str, dict], Exception]:
+        try:
+            with span("fetch_bibtex_dict", "resolve"):
+                return fetch_bibtex_dict(identifier, config, prefetched)
+        except Exception as e:
+            return e
+
+    def finalize(fetched: Union[Tuple[str, dict], Exception]) -> str:
+        if isinstance(fetched, Exception):
+            return format_error(fetched)
+        identifier, bibtex_dict = fetched
+        try:
+            with span("finalize_bibtex_dict", "resolve"):
+                return finalize_bibtex_dict(
+                    bibtex_dict,
+                    identifier,
+                    config,
+                    ads_bibcode=adsurl_bibcodes.get(identifier),
+                )
+        except Exception as e:
+            return format_error(e)
+
+    # Resolving is I/O-bound (we are mostly waiting for HTTP responses),
+    # so threads are sufficient to resolve multiple identifiers at once
+    with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+
+        # Fetch the BibTeX dicts for all identifiers
+        all_fetched = list(executor.map(fetch, identifiers))
+
+        # Look up the ADS bibcodes for all entries that need an `adsurl` with
+        # as few requests as possible; if this fails, `postprocess_bibtex()`
+        # falls back to looking them up one by one
+        adsurl_bibcodes: Dict[str, str] = {}
+        if config.resolve_adsurl:
+            needed = [
+                fetched[0]
+                for fetched in all_fetched
+                if not isinstance(fetched, Exception)
+                and "adsurl" not in fetched[1]
+            ]
+            if len(needed) > 1:
+                try:
+                    adsurl_bibcodes = get_ads_bibcodes_for_identifiers(
+                        needed, config
+                    )
+                except prefetch_errors:
+                    pass
+
+        # Post-process the BibTeX dicts and convert them to strings; entries
+        # that were fetched for the same final identifier (e.g., an arXiv ID
+        # that was updated to a DOI that is also given) are only processed
+        # once
+        final_keys = [
+            f"error:{i}" if isinstance(fetched, Exception)
+            else get_canonical_key(fetched[0])
+            for i, fetched in enumerate(all_fetched)
+        ]
+        unique: Dict[str, Union[Tuple[str, dict], Exception]] = {}
+        for key, fetched in zip(final_keys, all_fetched):
+            unique.setdefault(key, fetched)
+        finalized = dict(zip(unique, executor.map(finalize, unique.values())))
+        return [finalized[_] for _ in final_keys]
+
+
+def resolve_stream(
+    identifiers: Iterable[str],
+    config: Configuration,
+    n_jobs: int = 4,
+    ordered: bool = True,
+    window: Optional[int] = None,
+) -> Iterator[Tuple[str, str]]:
+    """
+    Lazily resolve a (potentially unbounded) stream of `identifiers`
+    using a pool of (at most) `n_jobs` worker threads, and yield every
+    (identifier, result) pair as soon as it is available. The results
+    are the same as for `resolve_identifier()`.
+    The input is only consumed as fast as the results are consumed: at
+    most `window` identifiers (default: `2 * n_jobs`) are in flight at
+    the same time, so memory usage does not grow with the input size.
+    If `ordered` is True, the results are yielded in the order of the
+    input; otherwise, they are yielded in the order of completion.
+    """
+
+    n_jobs = max(1, n_jobs)
+    window = max(1, window if window is not None else 2 * n_jobs)
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+
+        # For ordered output, results can only be yielded once all earlier
+        # identifiers are done; otherwise, in the order of completion
+        in_flight: Deque[Tuple[str, "Future[str]"]] = deque()
+
+        def pop_finished(block: bool) -> Iterator[Tuple[str, str]]:
+            if block and in_flight:
+                wait(
+                    [in_flight[0][1]] if ordered
+                    else [_[1] for _ in in_flight],
+                    return_when=FIRST_COMPLETED,
+                )
+            if ordered:
+                while in_flight and in_flight[0][1].done():
+                    identifier, future = in_flight.popleft()
+                    yield identifier, future.result()
+            else:
+                for item in [_ for _ in in_flight if _[1].done()]:
+                    in_flight.remove(item)
+                    yield item[0], item[1].result()
+
+        # Yield finished results after every submit (without waiting), so
+        # that they are not held back if the input is slow; only wait for
+        # a result if the window is full
+        for identifier in identifiers:
+            future = executor.submit(resolve_identifier, identifier, config)
+            in_flight.append((identifier, future))
+            yield from pop_finished(block=len(in_flight) >= window)
+
+        while in_flight:
+            yield from pop_finished(block=True)
+
+
+async def resolve_many_async(
+    identifiers: List[str],
+    config: Configuration,
+    client: Optional["httpx.AsyncClient"] = None,
+    max_concurrency: int = 100,
+) -> List[str]:
+    """
+    Asynchronous version of `resolve_identifiers()`: resolve a list of
+    `identifiers` concurrently on the current event loop, with at most
+    `max_concurrency` identifiers in flight at the same time. All
+    requests share the given `client` (or a new one, if none is given).
+    Like for `resolve_identifiers()`, duplicates are only resolved once.
+    """
+
+    # Resolve only the first of all identifiers with the same canonical key
+    keys = [get_canonical_key(_) for _ in identifiers]
+    first: Dict[str, str] = {}
+    for key, identifier in zip(keys, identifiers):
+        first.setdefault(key, identifier)
+    if len(first) < len(identifiers):
+        results = await resolve_many_async(
+            list(first.values()), config, client, max_concurrency
+        )
+        by_key = dict(zip(first, results))
+        return [by_key[_] for _ in keys]
+
+    # Create a new client, if needed
+    if client is None:
+        async with network.make_async_client(config) as client:
+            return await resolve_many_async(
+                identifiers, config, client, max_concurrency
+            )
+
+    import asyncio
+
+    # Limit the number of identifiers that are resolved at the same time
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def resolve(identifier: str) -> str:
+        async with semaphore:
+            return await resolve_identifier_async(identifier, config, client)
+
+    return list(await asyncio.gather(*[resolve(_) for _ in identifiers]))
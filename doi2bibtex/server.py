@@ -0,0 +1,273 @@
+"""
+Provide a small HTTP server with a JSON API for resolving identifiers,
+so that other services do not need to spawn a `d2b` process for every
+request. The following endpoints are available:
+
+    GET  /health                     -> {"status": "ok", "version": ...}
+    GET  /resolve?identifier=...     -> {"identifier": ..., "bibtex": ...}
+    POST /resolve  {"identifier": ..., "config": {...}}
+    POST /batch    {"identifiers": [...], "config": {...}, "jobs": 4}
+                                     -> {"results": [{...}, ...]}
+
+The (optional) `config` of a request overrides the configuration of
+the server for this request only; only the options that control the
+output are allowed (see `REQUEST_CONFIG_OPTIONS`), but not, e.g., the
+proxies, rate limits or caching. The number of `jobs` is limited to the
+`max_jobs` of the server. Identifiers that cannot be resolved are
+returned with an `error` instead of the `bibtex`.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from copy import copy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import json
+
+from doi2bibtex import __version__
+from doi2bibtex.config import Configuration
+from doi2bibtex.process import PIPELINE_OPTIONS
+from doi2bibtex.resolve import (
+    make_result,
+    resolve_identifier,
+    resolve_identifiers,
+)
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+# The options that requests may override: only the ones that control the
+# output (i.e., the post-processing), not the ones that control how (and
+# where) requests are sent, which would allow every request to create new
+# connection pools, or to bypass the rate limits
+REQUEST_CONFIG_OPTIONS = frozenset(
+    PIPELINE_OPTIONS + ("citekey_delimiter", "update_arxiv_if_doi")
+)
+
+
+def make_request_config(
+    config: Configuration,
+    overrides: Dict[str, Any],
+) -> Configuration:
+    """
+    Create a copy of the given `config` where the options in `overrides`
+    are replaced. Raises a `ValueError` for unknown options, options that
+    must not be overridden (see `REQUEST_CONFIG_OPTIONS`), or values of
+    the wrong type.
+    """
+
+    if not isinstance(overrides, dict):
+        raise ValueError("The `config` must be a JSON object!")
+
+    request_config = copy(config)
+    for key, value in overrides.items():
+        if key.startswith("_") or not hasattr(config, key):
+            raise ValueError(f'Unknown configuration key "{key}"')
+        if key not in REQUEST_CONFIG_OPTIONS:
+            raise ValueError(
+                f'Configuration key "{key}" cannot be overridden per request'
+            )
+        default = getattr(config, key)
+        if isinstance(default, bool):
+            is_valid = isinstance(value, bool)
+        elif isinstance(default, (int, float)):
+            is_valid = (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+            )
+        else:
+            is_valid = isinstance(value, type(default))
+        if not is_valid:
+            raise ValueError(f'Invalid value for configuration key "{key}"')
+        setattr(request_config, key, value)
+
+    return request_config
+
+
+class ResolveRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handle the requests to the JSON API (see the module docstring).
+    """
+
+    # Keep connections alive, so that clients can send many requests
+    protocol_version = "HTTP/1.1"
+    server: "ResolveServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """
+        Do not log every single request (unless `verbose` is set).
+        """
+
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status: int, content: Dict[str, Any]) -> None:
+        """
+        Send the given `content` as a JSON response.
+        """
+
+        body = json.dumps(content).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self) -> Dict[str, Any]:
+        """
+        Read the JSON body of a request.
+        """
+
+        length = int(self.headers.get("Content-Length") or 0)
+        content = json.loads(self.rfile.read(length) or b"{}")
+        if not isinstance(content, dict):
+            raise ValueError("The request body must be a JSON object!")
+
+        return content
+
+    def do_GET(self) -> None:
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path == "/health":
+            self.send_json(200, {"status": "ok", "version": __version__})
+        elif url.path == "/resolve" and "identifier" in query:
+            self.resolve({"identifier": query["identifier"][0]})
+        elif url.path == "/resolve":
+            self.send_json(400, {"error": "Missing `identifier`"})
+        else:
+            self.send_json(404, {"error": f"Unknown endpoint: {url.path}"})
+
+    def do_POST(self) -> None:
+
+        path = urlparse(self.path).path
+
+        try:
+            content = self.read_json()
+        except ValueError as e:
+            self.send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        if path == "/resolve":
+            self.resolve(content)
+        elif path == "/batch":
+            self.batch(content)
+        else:
+            self.send_json(404, {"error": f"Unknown endpoint: {path}"})
+
+    def parse_request_content(
+        self,
+        content: Dict[str, Any],
+        key: str,
+    ) -> Tuple[Any, Configuration]:
+        """
+        Get the value for the given `key` and the configuration (with
+        the overrides from the request) from the `content` of a request.
+        """
+
+        if key not in content:
+            raise ValueError(f"Missing `{key}`")
+
+        config = make_request_config(
+            self.server.config, content.get("config", {})
+        )
+
+        return content[key], config
+
+    def resolve(self, content: Dict[str, Any]) -> None:
+        """
+        Resolve a single identifier.
+        """
+
+        try:
+            identifier, config = self.parse_request_content(
+                content, "identifier"
+            )
+            identifier = str(identifier)
+        except ValueError as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        bibtex = resolve_identifier(identifier, config)
+        result = make_result(identifier, bibtex)
+        self.send_json(200 if "bibtex" in result else 422, result)
+
+    def batch(self, content: Dict[str, Any]) -> None:
+        """
+        Resolve multiple identifiers at once.
+        """
+
+        try:
+            identifiers, config = self.parse_request_content(
+                content, "identifiers"
+            )
+            if not isinstance(identifiers, list):
+                raise ValueError("`identifiers` must be a list")
+            identifiers = [str(_) for _ in identifiers]
+            n_jobs = int(content.get("jobs", 4))
+            n_jobs = max(1, min(n_jobs, self.server.max_jobs))
+        except (TypeError, ValueError) as e:
+            self.send_json(400, {"error": str(e)})
+            return
+
+        results = resolve_identifiers(identifiers, config, n_jobs=n_jobs)
+        self.send_json(
+            200,
+            {
+                "results": [
+                    make_result(identifier, result)
+                    for identifier, result in zip(identifiers, results)
+                ]
+            },
+        )
+
+
+class ResolveServer(ThreadingHTTPServer):
+    """
+    An HTTP server that handles every request in its own thread and
+    holds the `config` that is used (unless overridden) for requests.
+    Batch requests use at most `max_jobs` worker threads.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        config: Configuration,
+        verbose: bool = False,
+        max_jobs: int = 16,
+    ) -> None:
+
+        self.config = config
+        self.verbose = verbose
+        self.max_jobs = max(1, max_jobs)
+        super().__init__(address, ResolveRequestHandler)
+
+
+def serve_http(
+    config: Configuration,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    verbose: bool = False,
+    max_jobs: int = 16,
+) -> None:
+    """
+    Run the HTTP server on the given `host` and `port` until it is
+    interrupted.
+    """
+
+    with ResolveServer(
+        (host, port), config, verbose=verbose, max_jobs=max_jobs
+    ) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
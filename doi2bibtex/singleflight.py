@@ -0,0 +1,127 @@
+"""
+Coalesce concurrent calls for the same key ("single flight"): while a
+call for a key is in flight, all other callers with the same key wait
+for it and share its result, instead of sending their own requests.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from concurrent.futures import Future
+from threading import Lock
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    TYPE_CHECKING,
+    TypeVar,
+)
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+
+# -----------------------------------------------------------------------------
+# DEFINITIONS
+# -----------------------------------------------------------------------------
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls (from different threads) for the same key.
+    Exceptions are shared in the same way as results. Once a call has
+    finished, the next call for the same key is a new call, that is,
+    results are never cached.
+    """
+
+    def __init__(self) -> None:
+
+        self._lock = Lock()
+        self._calls: Dict[Hashable, "Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, function: Callable[[], T]) -> T:
+        """
+        Call `function()`, unless a call for the given `key` is already
+        in flight, in which case its result is returned instead.
+        """
+
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+
+        if not is_leader:
+            return future.result()  # type: ignore[no-any-return]
+
+        try:
+            result = function()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """
+    Asynchronous version of `SingleFlight` (for the coroutines of one or
+    more event loops). The call runs as a separate task, so that it is
+    not cancelled when the caller that started it is cancelled.
+    """
+
+    def __init__(self) -> None:
+
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(
+        self,
+        key: Hashable,
+        function: Callable[[], Awaitable[T]],
+    ) -> T:
+        """
+        Await `function()`, unless a call for the given `key` is already
+        in flight (on the same event loop), in which case its result is
+        returned instead.
+        """
+
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        task = self._calls.get(key)
+        if task is None or task.get_loop() is not loop:
+
+            async def call() -> T:
+                return await function()
+
+            task = self._calls[key] = asyncio.ensure_future(call())
+            task.add_done_callback(lambda _: self._remove(key, _))
+
+        return await asyncio.shield(task)
+
+    def _remove(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        """
+        Remove the finished `task` for the given `key` (and retrieve its
+        exception, so that asyncio does not warn about it if every caller
+        has been cancelled).
+        """
+
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
@@ -6,9 +6,10 @@ Utility functions.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-from pylatexenc.latex2text import LatexNodes2Text
-from unidecode import unidecode
+from functools import lru_cache
+from typing import Any
 
+import re
 import urllib.parse
 
 
@@ -16,6 +17,11 @@ import urllib.parse
 # DEFINITIONS
 # -----------------------------------------------------------------------------
 
+# Characters (and ligatures) that `latex_to_unicode()` might convert; text
+# without any of them is returned as is, without parsing it as LaTeX
+LATEX_SPECIAL_REGEX = re.compile(r"[\\{}$%~&#^_]|--|``|''|[!?]`")
+
+
 def doi_to_url(doi: str) -> str:
     """
     Convert a DOI to a URL.
@@ -25,12 +31,28 @@ def doi_to_url(doi: str) -> str:
     return f"https://doi.org/{encoded_doi}"
 
 
+@lru_cache(maxsize=None)
+def get_latex_converter() -> Any:
+    """
+    Get the (shared) `LatexNodes2Text` instance for `latex_to_unicode()`,
+    so that it is only created once instead of for every string.
+    """
+
+    from pylatexenc.latex2text import LatexNodes2Text
+
+    return LatexNodes2Text(math_mode='verbatim')
+
+
 def latex_to_unicode(text: str) -> str:
     """
     Convert LaTeX-escaped to Unicode. Example: "{\"a}" -> "ä".
     Note: characters in math mode are *not* converted.
     """
-    return str(LatexNodes2Text(math_mode='verbatim').latex_to_text(text))
+
+    if not LATEX_SPECIAL_REGEX.search(text):
+        return text
+
+    return str(get_latex_converter().latex_to_text(text))
 
 
 def remove_accented_characters(string: str) -> str:
@@ -39,6 +61,8 @@ def remove_accented_characters(string: str) -> str:
     ASCII-compatible citekey).
     """
 
+    from unidecode import unidecode
+
     # Manually replace some characters
     string = string.replace("Ä", "Ae")
     string = string.replace("Ö", "Oe")
@@ -48,10 +48,14 @@ setup(
         "unidecode",
     ],
     extras_require={
+        "async": [
+            "httpx",
+        ],
         "develop": [
             "coverage",
             "deepdiff",
             "flake8",
+            "httpx",
             "mypy",
             "pytest",
             "pytest-cov",
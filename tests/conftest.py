@@ -0,0 +1,31 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+
+import pytest
+
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    """
+    Make sure that the unit tests never read from (or write to) the
+    actual response cache in `~/.doi2bibtex/`.
+    """
+
+    file_path = tmp_path / "cache.sqlite"
+    monkeypatch.setattr(
+        "doi2bibtex.cache.get_cache_file_path",
+        lambda: file_path,
+    )
+
+    return file_path
@@ -7,12 +7,15 @@ Unit tests for ads.py.
 # -----------------------------------------------------------------------------
 
 from pathlib import Path
-from types import SimpleNamespace
-from typing import Any
+from typing import Any, List
+from urllib.parse import parse_qs, urlparse
+
+import json
 
 import pytest
 
 import doi2bibtex.ads
+from doi2bibtex.network import Response
 
 
 # -----------------------------------------------------------------------------
@@ -100,10 +103,82 @@ def test__get_ads_bibcode_for_identifier(
     # Case 5: Simulate failed request
     with monkeypatch.context() as m:
         m.setattr(
-            "requests.get",
-            lambda *_, **__: SimpleNamespace(status_code=418),
+            "doi2bibtex.network.get",
+            lambda *_, **__: Response(status_code=418, text=""),
         )
         bibcode = doi2bibtex.ads.get_ads_bibcode_for_identifier(
             "10.1103/PhysRevLett.116.061102"
         )
         assert bibcode == ""
+
+
+def test__get_ads_bibcodes_for_identifiers(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `get_ads_bibcodes_for_identifiers()`.
+    """
+
+    # Simulate the ADS search API
+    queries: List[str] = []
+
+    def fake_get(url: str, **_: Any) -> Response:
+        queries.append(parse_qs(urlparse(url).query)["q"][0])
+        docs = [
+            {
+                "bibcode": "2022A&A...666A...9G",
+                "identifier": ["10.1051/0004-6361/202142529", "2204.03439"],
+            },
+            {
+                "bibcode": "2020arXiv201005591G",
+                "identifier": ["arXiv:2010.05591"],
+            },
+            {
+                "bibcode": "2021Foo.......1B",
+                "doi": ["10.1000/XYZ.1"],
+                "identifier": ["2021Foo.......1B"],
+            },
+        ]
+        return Response(
+            status_code=200,
+            text=json.dumps({"response": {"docs": docs}}),
+        )
+
+    monkeypatch.setenv("ADS_TOKEN", "some-token")
+    monkeypatch.setattr("doi2bibtex.network.get", fake_get)
+
+    # Case 1: Identifiers are combined into OR-queries
+    bibcodes = doi2bibtex.ads.get_ads_bibcodes_for_identifiers(
+        ["10.1051/0004-6361/202142529", "2010.05591", "unknown", "2010.05591"],
+        chunk_size=2,
+    )
+    assert queries == [
+        'identifier:("10.1051/0004-6361/202142529" OR "2010.05591")',
+        'identifier:("unknown")',
+    ]
+    assert bibcodes == {
+        "10.1051/0004-6361/202142529": "2022A&A...666A...9G",
+        "2010.05591": "2020arXiv201005591G",
+        "unknown": "",
+    }
+
+    # Case 2: Identifiers are compared exactly (not as substrings), but
+    # case-insensitively and without prefixes or arXiv versions
+    bibcodes = doi2bibtex.ads.get_ads_bibcodes_for_identifiers(
+        ["2010.0559", "arXiv:2010.05591v2", "10.1000/xyz", "doi:10.1000/xyz.1"]
+    )
+    assert bibcodes == {
+        "2010.0559": "",
+        "arXiv:2010.05591v2": "2020arXiv201005591G",
+        "10.1000/xyz": "",
+        "doi:10.1000/xyz.1": "2021Foo.......1B",
+    }
+
+    # Case 3: Failed request
+    monkeypatch.setattr(
+        "doi2bibtex.network.get",
+        lambda *_, **__: Response(status_code=500, text=""),
+    )
+    with pytest.raises(RuntimeError) as runtime_error:
+        doi2bibtex.ads.get_ads_bibcodes_for_identifiers(["2010.05591"])
+    assert "Error 500 querying ADS for 1 identifiers" in str(runtime_error)
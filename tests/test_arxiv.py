@@ -0,0 +1,162 @@
+"""
+Unit tests for arxiv.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from typing import Any, List
+from urllib.parse import parse_qs, urlparse
+
+from deepdiff import DeepDiff
+
+import pytest
+
+from doi2bibtex.arxiv import (
+    get_arxiv_api_url,
+    parse_arxiv_api_response,
+    resolve_arxiv_id_with_arxiv_api,
+    resolve_arxiv_ids_with_arxiv_api,
+)
+from doi2bibtex.network import Response
+
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+ENTRIES = {
+    "2102.12345": """
+      <entry>
+        <id>http://arxiv.org/abs/2102.12345v2</id>
+        <published>2021-02-24T15:01:02Z</published>
+        <title>Some title that is
+          split over multiple lines</title>
+        <author><name>Jane Doe</name></author>
+        <author><name>John Doe</name></author>
+        <arxiv:doi>10.1000/xyz</arxiv:doi>
+      </entry>
+    """,
+    "1312.6114": """
+      <entry>
+        <id>http://arxiv.org/abs/1312.6114v11</id>
+        <published>2013-12-20T20:58:10Z</published>
+        <title>Auto-Encoding Variational Bayes</title>
+        <author><name>Diederik P Kingma</name></author>
+        <author><name>Max Welling</name></author>
+      </entry>
+    """,
+}
+
+ERROR = """
+  <entry>
+    <id>http://arxiv.org/api/errors#incorrect_id_format_for_foo</id>
+    <title>Error</title>
+  </entry>
+"""
+
+
+def make_feed(*entries: str) -> str:
+    """
+    Wrap the given `entries` in an Atom feed like the arXiv API does.
+    """
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom" '
+        'xmlns:arxiv="http://arxiv.org/schemas/atom">\n'
+        '  <title>arXiv Query</title>\n'
+        + "".join(entries)
+        + "</feed>\n"
+    )
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__get_arxiv_api_url() -> None:
+    """
+    Test `get_arxiv_api_url()`.
+    """
+
+    url = get_arxiv_api_url(["2102.12345", "hep-th/9901001v1"])
+    query = parse_qs(urlparse(url).query)
+    assert url.startswith("https://export.arxiv.org/api/query?")
+    assert query["id_list"] == ["2102.12345,hep-th/9901001v1"]
+    assert query["max_results"] == ["2"]
+
+
+def test__parse_arxiv_api_response() -> None:
+    """
+    Test `parse_arxiv_api_response()`.
+    """
+
+    # Case 1: Entry with a DOI, requested without version
+    r = Response(status_code=200, text=make_feed(ENTRIES["2102.12345"]))
+    results = parse_arxiv_api_response(r, ["2102.12345"])
+    expected = {
+        "2102.12345": {
+            "ENTRYTYPE": "online",
+            "ID": "2102.12345",
+            "author": "Jane Doe and John Doe",
+            "title": "Some title that is split over multiple lines",
+            "year": "2021",
+            "eprint": "2102.12345",
+            "eprinttype": "arXiv",
+            "doi": "10.1000/xyz",
+        }
+    }
+    assert not DeepDiff(results, expected)
+
+    # Case 2: Entry without a DOI, requested with version; errors are skipped
+    r = Response(
+        status_code=200,
+        text=make_feed(ENTRIES["1312.6114"], ERROR),
+    )
+    results = parse_arxiv_api_response(r, ["1312.6114v11", "foo"])
+    assert list(results.keys()) == ["1312.6114v11"]
+    assert results["1312.6114v11"]["eprint"] == "1312.6114v11"
+    assert "doi" not in results["1312.6114v11"]
+
+    # Case 3: Failed request
+    r = Response(status_code=503, text="")
+    with pytest.raises(RuntimeError) as runtime_error:
+        parse_arxiv_api_response(r, ["2102.12345"])
+    assert "Error 503 resolving 1 IDs" in str(runtime_error)
+
+
+def test__resolve_arxiv_ids_with_arxiv_api(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `resolve_arxiv_ids_with_arxiv_api()` and
+    `resolve_arxiv_id_with_arxiv_api()`.
+    """
+
+    # Simulate the arXiv API
+    requested: List[List[str]] = []
+
+    def fake_get(url: str, **_: Any) -> Response:
+        arxiv_ids = parse_qs(urlparse(url).query)["id_list"][0].split(",")
+        requested.append(arxiv_ids)
+        entries = [ENTRIES[_] for _ in arxiv_ids if _ in ENTRIES]
+        return Response(status_code=200, text=make_feed(*entries))
+
+    monkeypatch.setattr("doi2bibtex.network.get", fake_get)
+
+    # Case 1: IDs are de-duplicated and split into chunks
+    results = resolve_arxiv_ids_with_arxiv_api(
+        ["2102.12345", "1312.6114", "2102.12345", "0000.00000"],
+        chunk_size=2,
+    )
+    assert requested == [["2102.12345", "1312.6114"], ["0000.00000"]]
+    assert list(results.keys()) == ["2102.12345", "1312.6114"]
+
+    # Case 2: Resolve a single arXiv ID
+    bibtex_dict = resolve_arxiv_id_with_arxiv_api("1312.6114")
+    assert bibtex_dict["author"] == "Diederik P Kingma and Max Welling"
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_arxiv_id_with_arxiv_api("0000.00000")
+    assert "no BibTeX entry found" in str(runtime_error)
@@ -0,0 +1,253 @@
+"""
+Unit tests for bibfile.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+
+import json
+import os
+
+import pytest
+
+from doi2bibtex.bibfile import (
+    add_identifier_field,
+    append_entries,
+    extract_index_keys,
+    get_index_file_path,
+    get_index_key,
+    get_missing_identifiers,
+    load_bib_index,
+    read_bib_keys,
+    read_citation_keys,
+    set_citekey,
+)
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__read_citation_keys(tmp_path: Path) -> None:
+    """
+    Test `read_citation_keys()`.
+    """
+
+    # Case 1: .aux file (BibTeX and biblatex)
+    file_path = tmp_path / "paper.aux"
+    file_path.write_text(
+        "\\relax\n"
+        "\\citation{1312.6114,Doe_2020}\n"
+        "\\citation{1312.6114}\n"
+        "\\abx@aux@cite{0}{10.1000/xyz}\n"
+        "\\citation{*}\n"
+    )
+    assert read_citation_keys(file_path) == [
+        "1312.6114",
+        "Doe_2020",
+        "10.1000/xyz",
+    ]
+
+    # Case 2: .tex file (with comments and optional arguments)
+    file_path = tmp_path / "paper.tex"
+    file_path.write_text(
+        "As shown by \\citet{1312.6114} and \\citep[see][p. 3]{a, b},\n"
+        "% \\cite{commented}\n"
+        "with 100\\% accuracy \\parencite*{2022A&A...666A...9G}.\n"
+        "\\nocite{*}\n"
+    )
+    assert read_citation_keys(file_path) == [
+        "1312.6114",
+        "a",
+        "b",
+        "2022A&A...666A...9G",
+    ]
+
+
+def test__read_bib_keys(tmp_path: Path) -> None:
+    """
+    Test `read_bib_keys()`.
+    """
+
+    # Case 1: File does not exist
+    assert read_bib_keys(tmp_path / "missing.bib") == set()
+
+    # Case 2: Regular file
+    file_path = tmp_path / "refs.bib"
+    file_path.write_text(
+        "@string{apj = {ApJ}}\n"
+        "@article{Kingma_2013,\n  title = {Auto-Encoding},\n}\n"
+        "  @Misc{ 1312.6114 ,\n  title = {Foo},\n}\n"
+        "@book(isbn:978-3-16-148410-0, title = {Bar})\n"
+    )
+    assert read_bib_keys(file_path) == {
+        "Kingma_2013",
+        "1312.6114",
+        "isbn:978-3-16-148410-0",
+    }
+
+
+def test__get_missing_identifiers() -> None:
+    """
+    Test `get_missing_identifiers()`.
+    """
+
+    assert get_missing_identifiers(
+        ["1312.6114", "Doe_2020", "10.1000/xyz", "arXiv:2010.05591"],
+        {"10.1000/xyz"},
+    ) == ["1312.6114", "arXiv:2010.05591"]
+
+
+def test__set_citekey() -> None:
+    """
+    Test `set_citekey()`.
+    """
+
+    assert set_citekey(
+        "@article{Kingma_2013,\n  title = {Auto-Encoding},\n}",
+        "1312.6114",
+    ) == "@article{1312.6114,\n  title = {Auto-Encoding},\n}"
+
+
+def test__append_entries(tmp_path: Path) -> None:
+    """
+    Test `append_entries()`.
+    """
+
+    file_path = tmp_path / "refs.bib"
+
+    # Case 1: Nothing to append
+    append_entries(file_path, [])
+    assert not file_path.exists()
+
+    # Case 2: New file
+    append_entries(file_path, ["@misc{a,\n}", "@misc{b,\n}\n"])
+    assert file_path.read_text() == "@misc{a,\n}\n\n@misc{b,\n}\n"
+
+    # Case 3: Existing file without trailing newline
+    file_path.write_text("@misc{a,\n}")
+    append_entries(file_path, ["@misc{b,\n}"])
+    assert file_path.read_text() == "@misc{a,\n}\n\n@misc{b,\n}\n"
+
+
+def test__get_index_key() -> None:
+    """
+    Test `get_index_key()`.
+    """
+
+    assert get_index_key("doi:10.1051/0004-6361/202142529") == (
+        get_index_key("10.1051/0004-6361/202142529".upper())
+    )
+    assert get_index_key("arXiv:1312.6114v11") == "arxiv:1312.6114"
+    assert get_index_key("2022A&A...666A...9G") == "ads:2022A&A...666A...9G"
+    assert get_index_key("0-8264-9752-7") == "isbn:9780826497529"
+    assert get_index_key("978-0-8264-9752-9") == "isbn:9780826497529"
+    assert get_index_key("Doe_2020") is None
+
+
+def test__extract_index_keys() -> None:
+    """
+    Test `extract_index_keys()`.
+    """
+
+    bibtex_string = (
+        "@article{Kingma_2013,\n"
+        "  doi = {10.1000/XYZ},\n"
+        "  eprint = \"1312.6114v2\",\n"
+        "  adsurl = {https://adsabs.harvard.edu/abs/2022A%26A...666A...9G},\n"
+        "}\n"
+        "@book{978-0-8264-9752-9, title = {Foo}, isbn = {not an isbn}}\n"
+    )
+    assert extract_index_keys(bibtex_string) == {
+        "doi:10.1000/xyz",
+        "arxiv:1312.6114",
+        "ads:2022A&A...666A...9G",
+        "isbn:9780826497529",
+    }
+
+
+def test__add_identifier_field() -> None:
+    """
+    Test `add_identifier_field()`.
+    """
+
+    bibtex_string = (
+        "@article{Kingma_2014,\n"
+        "  doi           = {10.1000/xyz},\n"
+        "  title         = {Foo},\n"
+        "}"
+    )
+
+    # Case 1: The identifier is already in the entry
+    assert add_identifier_field(bibtex_string, "10.1000/XYZ") == bibtex_string
+
+    # Case 2: arXiv ID that was resolved to the published paper
+    result = add_identifier_field(bibtex_string, "arXiv:1312.6114v2")
+    assert result == (
+        "@article{Kingma_2014,\n"
+        "  doi           = {10.1000/xyz},\n"
+        "  title         = {Foo},\n"
+        "  eprint        = {1312.6114},\n"
+        "  eprinttype    = {arXiv},\n"
+        "}"
+    )
+    assert "arxiv:1312.6114" in extract_index_keys(result)
+
+    # Case 3: Entry without trailing comma
+    result = add_identifier_field("@book{Foo, title = {Bar}}", "2101.00001")
+    assert result == (
+        "@book{Foo, title = {Bar},\n"
+        "  eprint        = {2101.00001},\n"
+        "  eprinttype    = {arXiv},\n"
+        "}"
+    )
+
+    # Case 4: Existing fields are not overwritten
+    bibtex_string = "@misc{Foo,\n  eprint = {2101.00001},\n}"
+    assert add_identifier_field(bibtex_string, "1312.6114") == bibtex_string
+
+    # Case 5: Unknown identifiers are ignored
+    assert add_identifier_field(bibtex_string, "foo") == bibtex_string
+
+
+def test__load_bib_index(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `load_bib_index()`.
+    """
+
+    bib_path = tmp_path / "refs.bib"
+    index_path = get_index_file_path(bib_path)
+    assert index_path == tmp_path / ".refs.bib.d2b-index.json"
+
+    # Case 1: File does not exist
+    assert load_bib_index(bib_path) == set()
+    assert not index_path.exists()
+
+    # Case 2: Index is built and cached
+    bib_path.write_text("@article{a,\n  doi = {10.1000/a},\n}\n")
+    assert load_bib_index(bib_path) == {"doi:10.1000/a"}
+    assert json.loads(index_path.read_text())["keys"] == ["doi:10.1000/a"]
+
+    # Case 3: Cached index is used as long as the file does not change
+    monkeypatch.setattr(
+        "doi2bibtex.bibfile.extract_index_keys",
+        lambda _: pytest.fail("Index should not be rebuilt"),
+    )
+    assert load_bib_index(bib_path) == {"doi:10.1000/a"}
+    monkeypatch.undo()
+
+    # Case 4: Cached index is invalidated when the file changes
+    append_entries(bib_path, ["@article{b,\n  doi = {10.1000/b},\n}"])
+    stat = bib_path.stat()
+    os.utime(bib_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert load_bib_index(bib_path) == {"doi:10.1000/a", "doi:10.1000/b"}
+
+    # Case 5: Corrupt index is rebuilt
+    index_path.write_text("not json")
+    assert load_bib_index(bib_path) == {"doi:10.1000/a", "doi:10.1000/b"}
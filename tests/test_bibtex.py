@@ -8,7 +8,11 @@ Unit tests for bibtex.py.
 
 from deepdiff import DeepDiff
 
-from doi2bibtex.bibtex import bibtex_string_to_dict, dict_to_bibtex_string
+from doi2bibtex.bibtex import (
+    bibtex_string_to_dict,
+    bibtex_string_to_dicts,
+    dict_to_bibtex_string,
+)
 
 
 # -----------------------------------------------------------------------------
@@ -50,6 +54,42 @@ def test__bibtex_string_to_dict() -> None:
     )
 
 
+def test__bibtex_string_to_dicts() -> None:
+    """
+    Test `bibtex_string_to_dicts()`.
+    """
+
+    bibtex_string = """
+    @article{first,
+        author = {Jane Doe},
+        year = {2010},
+    }
+    @book{second,
+        author = {Richard Roe},
+        year = {2011},
+    }
+    """
+
+    assert not DeepDiff(
+        bibtex_string_to_dicts(bibtex_string),
+        [
+            {
+                'ENTRYTYPE': 'article',
+                'ID': 'first',
+                'author': 'Jane Doe',
+                'year': '2010',
+            },
+            {
+                'ENTRYTYPE': 'book',
+                'ID': 'second',
+                'author': 'Richard Roe',
+                'year': '2011',
+            },
+        ]
+    )
+    assert bibtex_string_to_dicts("") == []
+
+
 def test__dict_to_bibtex_string() -> None:
     """
     Test `dict_to_bibtex_string()`.
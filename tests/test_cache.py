@@ -0,0 +1,166 @@
+"""
+Unit tests for cache.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+
+import pytest
+
+from doi2bibtex.cache import ResponseCache, get_response_cache
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__response_cache(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """
+    Test `ResponseCache`.
+    """
+
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_size=10)
+
+    # Case 1: Keys do not depend on the case of the method
+    assert ResponseCache.make_key("get", "url") == (
+        ResponseCache.make_key("GET", "url")
+    )
+    assert ResponseCache.make_key("GET", "url") != (
+        ResponseCache.make_key("POST", "url", "data")
+    )
+
+    # Case 2: Set and get an entry
+    assert cache.get("a", ttl=60) is None
+    cache.set("a", backend="crossref", url="url-a", text="12345")
+    assert cache.get("a", ttl=60) == "12345"
+    assert cache.stats() == {"crossref": {"entries": 1, "size": 5}}
+
+    # Case 3: Expired entries are not returned (and removed)
+    assert cache.get("a", ttl=-1) is None
+    assert cache.stats() == {}
+
+    # Case 4: Least recently used entries are evicted
+    with monkeypatch.context() as m:
+        m.setattr("time.time", lambda: 1.0)
+        cache.set("a", backend="crossref", url="url-a", text="12345")
+        m.setattr("time.time", lambda: 2.0)
+        cache.set("b", backend="arxiv", url="url-b", text="12345")
+        m.setattr("time.time", lambda: 3.0)
+        assert cache.get("a", ttl=1e12) == "12345"
+        m.setattr("time.time", lambda: 4.0)
+        cache.set("c", backend="arxiv", url="url-c", text="12345")
+    assert cache.get("a", ttl=1e12) == "12345"
+    assert cache.get("b", ttl=1e12) is None
+    assert cache.get("c", ttl=1e12) == "12345"
+
+    # Case 5: Prune expired entries (and entries without a TTL)
+    cache.set("d", backend="dblp", url="url-d", text="")
+    assert cache.prune(ttls={"crossref": 1e12, "arxiv": 0}) == 2
+    assert cache.stats() == {"crossref": {"entries": 1, "size": 5}}
+
+    # Case 6: Clear the cache
+    assert cache.clear() == 1
+    assert cache.stats() == {}
+
+
+def test__response_cache_total_size(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """
+    Test that `ResponseCache` keeps a running total of its size.
+    """
+
+    # Count how often the total size is computed from the database
+    calls = []
+    get_total_size = ResponseCache._get_total_size
+
+    def counting_get_total_size(self: ResponseCache) -> int:
+        calls.append(self)
+        return get_total_size(self)
+
+    monkeypatch.setattr(
+        ResponseCache, "_get_total_size", counting_get_total_size
+    )
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_size=10)
+
+    # Case 1: The total size is only computed once for many writes
+    for _ in range(5):
+        cache.set("a", backend="crossref", url="url-a", text="12345")
+    cache.set("b", backend="crossref", url="url-b", text="123")
+    assert len(calls) == 1
+    assert cache._total_size == 8
+
+    # Case 2: Writes by another process are taken into account before
+    # evicting entries
+    other = ResponseCache(tmp_path / "cache.sqlite", max_size=100)
+    other.set("c", backend="arxiv", url="url-c", text="12345")
+    cache.set("d", backend="arxiv", url="url-d", text="123")
+    assert cache.get("a", ttl=1e12) is None
+    assert cache.get("d", ttl=1e12) == "123"
+    assert cache._total_size == sum(
+        _["size"] for _ in cache.stats().values()
+    )
+
+
+def test__get_response_cache(isolated_cache: Path) -> None:
+    """
+    Test `get_response_cache()`.
+    """
+
+    cache = get_response_cache(max_size=100)
+    assert cache.file_path == isolated_cache
+    assert get_response_cache(max_size=200) is cache
+    assert cache.max_size == 200
+
+
+def test__response_cache_failures(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """
+    Test the failures of `ResponseCache`.
+    """
+
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_size=100)
+    ttls = {"permanent": 60.0, "transient": 10.0}
+
+    # Case 1: Set and get a failure
+    assert cache.get_failure("doi:10.1000/xyz", ttls=ttls) is None
+    with monkeypatch.context() as m:
+        m.setattr("time.time", lambda: 100.0)
+        cache.set_failure("doi:10.1000/xyz", "permanent", "Error 404", 404)
+        m.setattr("time.time", lambda: 150.0)
+        assert cache.get_failure("doi:10.1000/xyz", ttls=ttls) == (
+            "Error 404", 404
+        )
+
+        # Case 2: Failures expire according to the TTL of their kind
+        cache.set_failure("doi:10.1000/abc", "transient", "Timeout")
+        assert cache.get_failure("doi:10.1000/abc", ttls=ttls) == (
+            "Timeout", None
+        )
+        m.setattr("time.time", lambda: 165.0)
+        assert cache.get_failure("doi:10.1000/abc", ttls=ttls) is None
+        assert cache.get_failure("doi:10.1000/abc", ttls={}) is None
+
+        # Case 3: Failures are part of the statistics
+        assert cache.stats() == {"failures": {"entries": 2, "size": 16}}
+
+        # Case 4: Prune expired failures
+        ttls["permanent"] = 100.0
+        assert cache.prune(ttls={}, failure_ttls=ttls) == 1
+        assert cache.prune(ttls={}) == 1
+        assert cache.stats() == {}
+
+    # Case 5: Clear the cache (including the failures)
+    cache.set("a", backend="crossref", url="url-a", text="12345")
+    cache.set_failure("doi:10.1000/xyz", "permanent", "Error 404", 404)
+    assert cache.clear() == 2
+    assert cache.stats() == {}
@@ -7,11 +7,31 @@ Unit tests for cli.py.
 # -----------------------------------------------------------------------------
 
 from pathlib import Path
+from typing import List
+
+import io
+import json
+import subprocess
+import sys
 
 import pytest
 
-from doi2bibtex.cli import parse_cli_args, plain, fancy
+from doi2bibtex.cache import get_response_cache
+from doi2bibtex.cli import (
+    aux_command,
+    batch,
+    cache_command,
+    fancy,
+    parse_cache_args,
+    parse_cli_args,
+    plain,
+    read_identifiers_file,
+    report_profile,
+    stream,
+    sync_command,
+)
 from doi2bibtex.config import Configuration
+from doi2bibtex.profiling import get_profiler, span, start_profiling
 
 
 # -----------------------------------------------------------------------------
@@ -27,19 +47,127 @@ def test__parse_cli_args(capsys: pytest.CaptureFixture) -> None:
     # Case 1
     args = parse_cli_args(["some-id"])
     assert not args.plain
-    assert args.identifier == "some-id"
+    assert args.identifiers == ["some-id"]
 
     # Case 2
     args = parse_cli_args(["some-other-id", "--plain"])
     assert args.plain
-    assert args.identifier == "some-other-id"
+    assert args.identifiers == ["some-other-id"]
 
     # Case 3
+    args = parse_cli_args(["id-1", "id-2", "--jobs", "8"])
+    assert args.identifiers == ["id-1", "id-2"]
+    assert args.jobs == 8
+    assert args.file is None
+
+    # Case 4
     try:
         parse_cli_args(["--help"])
     except SystemExit:
         pass
-    assert "[-h] [--plain] [--version] [IDENTIFIER]" in capsys.readouterr().out
+    out = " ".join(capsys.readouterr().out.split())
+    assert (
+        "[-h] [--file FILE] [--stdin] [--jobs JOBS] [--unordered] [--json] "
+        "[--plain] [--daemon] [--profile] [--profile-trace FILE] "
+        "[--profile-json FILE] [--version]" in out
+    )
+    assert "[IDENTIFIER ...]" in out or "[IDENTIFIER [IDENTIFIER" in out
+
+    # Case 5
+    args = parse_cli_args(["some-id", "--profile-trace", "trace.json"])
+    assert not args.profile
+    assert args.profile_trace == Path("trace.json")
+    assert args.profile_json is None
+
+
+def test__read_identifiers_file(tmp_path: Path) -> None:
+    """
+    Test `read_identifiers_file()`.
+    """
+
+    file_path = tmp_path / "identifiers.txt"
+    file_path.write_text("# Some comment\n1312.6114\n\n  10.1000/xyz  \n")
+    assert read_identifiers_file(file_path) == ["1312.6114", "10.1000/xyz"]
+
+
+def test__batch(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """
+    Test `batch()`.
+    """
+
+    def fake_resolve_identifiers(
+        identifiers: List[str],
+        config: Configuration,
+        n_jobs: int,
+    ) -> List[str]:
+        return [
+            f"@article{{{_}}}" if _ != "bad" else
+            "\n  There was an error:\n  Unrecognized identifier: bad\n"
+            for _ in identifiers
+        ]
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Case 1: Results are printed in order, failures are reported on stderr
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifiers", fake_resolve_identifiers
+    )
+    n_failed = batch(["a", "bad", "b"], config=config, n_jobs=2)
+    outerr = capsys.readouterr()
+    assert n_failed == 1
+    assert outerr.out == "@article{a}\n\n@article{b}\n\n"
+    assert outerr.err == (
+        'Failed to resolve "bad": Unrecognized identifier: bad\n'
+    )
+
+
+def test__stream(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """
+    Test `stream()`.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    def fake_resolve_identifier(identifier: str, config: Configuration) -> str:
+        if identifier == "bad":
+            return "\n  There was an error:\n  Unrecognized identifier: bad\n"
+        return f"@article{{{identifier}}}"
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifier", fake_resolve_identifier
+    )
+    lines = "a\n\n# comment\nbad\n  b  \n"
+
+    # Case 1: Plain text output
+    n_failed = stream(io.StringIO(lines), config=config, n_jobs=2)
+    outerr = capsys.readouterr()
+    assert n_failed == 1
+    assert outerr.out == "@article{a}\n\n@article{b}\n\n"
+    assert outerr.err == (
+        'Failed to resolve "bad": Unrecognized identifier: bad\n'
+    )
+
+    # Case 2: JSON output
+    n_failed = stream(io.StringIO(lines), config, n_jobs=2, as_json=True)
+    records = [json.loads(_) for _ in capsys.readouterr().out.splitlines()]
+    assert n_failed == 1
+    assert records == [
+        {"identifier": "a", "bibtex": "@article{a}"},
+        {"identifier": "bad", "error": "Unrecognized identifier: bad"},
+        {"identifier": "b", "bibtex": "@article{b}"},
+    ]
 
 
 def test__plain(
@@ -110,3 +238,260 @@ def test__fancy(
             '',
         ]
     )
+
+
+def test__aux_command(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    tmp_path: Path,
+) -> None:
+    """
+    Test `aux_command()`.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    requested: List[List[str]] = []
+
+    def fake_resolve_identifiers(
+        identifiers: List[str],
+        config: Configuration,
+        n_jobs: int = 1,
+    ) -> List[str]:
+        requested.append(identifiers)
+        return [
+            "\n  There was an error:\n  Not found\n" if "bad" in _
+            else "@article{Some_2020,\n  title = {Title},\n}"
+            for _ in identifiers
+        ]
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifiers", fake_resolve_identifiers
+    )
+
+    aux_path = tmp_path / "paper.aux"
+    aux_path.write_text(
+        "\\citation{1312.6114,Doe_2020,10.1000/bad}\n"
+        "\\citation{10.1000/xyz}\n"
+    )
+    bib_path = tmp_path / "refs.bib"
+    bib_path.write_text("@misc{10.1000/xyz,\n}\n")
+
+    # Case 1: Dry run
+    n_failed = aux_command(aux_path, bib_path, config, n_jobs=2, dry_run=True)
+    outerr = capsys.readouterr()
+    assert n_failed == 0
+    assert outerr.out == "1312.6114\n10.1000/bad\n"
+    assert "Skipping 1 missing citations" in outerr.err
+    assert not requested
+
+    # Case 2: Only the missing citations are resolved and appended
+    n_failed = aux_command(aux_path, bib_path, config, n_jobs=2)
+    outerr = capsys.readouterr()
+    assert n_failed == 1
+    assert requested == [["1312.6114", "10.1000/bad"]]
+    assert bib_path.read_text() == (
+        "@misc{10.1000/xyz,\n}\n\n"
+        "@article{1312.6114,\n  title = {Title},\n}\n"
+    )
+    assert 'Failed to resolve "10.1000/bad": Not found' in outerr.err
+
+    # Case 3: Nothing left to resolve (except for the failed citation)
+    requested.clear()
+    aux_command(aux_path, bib_path, config, n_jobs=2)
+    assert requested == [["10.1000/bad"]]
+
+
+def test__sync_command(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+    tmp_path: Path,
+) -> None:
+    """
+    Test `sync_command()`.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    requested: List[List[str]] = []
+
+    def fake_resolve_identifiers(
+        identifiers: List[str],
+        config: Configuration,
+        n_jobs: int = 1,
+    ) -> List[str]:
+        requested.append(identifiers)
+        return [
+            "\n  There was an error:\n  Not found\n" if "bad" in _
+            else f"@article{{Some_2020,\n  doi = {{10.1000/from-{_}}},\n}}"
+            for _ in identifiers
+        ]
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifiers", fake_resolve_identifiers
+    )
+
+    bib_path = tmp_path / "refs.bib"
+    bib_path.write_text("@misc{Doe_2020,\n  doi = {10.1000/XYZ},\n}\n")
+    file_path = tmp_path / "identifiers.txt"
+    file_path.write_text(
+        "10.1000/xyz\n1312.6114\narXiv:1312.6114v2\n10.1000/bad\nfoo\n"
+    )
+
+    # Case 1: Dry run
+    n_failed = sync_command(
+        bib_path, file_path, config, n_jobs=2, dry_run=True
+    )
+    outerr = capsys.readouterr()
+    assert n_failed == 1
+    assert outerr.out == "1312.6114\n10.1000/bad\n"
+    assert 'Failed to resolve "foo"' in outerr.err
+    assert not requested
+
+    # Case 2: Only the missing identifiers are resolved and appended
+    n_failed = sync_command(bib_path, file_path, config, n_jobs=2)
+    outerr = capsys.readouterr()
+    assert n_failed == 2
+    assert requested == [["1312.6114", "10.1000/bad"]]
+    assert bib_path.read_text().endswith(
+        "\n\n@article{Some_2020,\n  doi = {10.1000/from-1312.6114},\n"
+        "  eprint        = {1312.6114},\n  eprinttype    = {arXiv},\n}\n"
+    )
+    assert 'Failed to resolve "10.1000/bad": Not found' in outerr.err
+
+    # Case 3: The cached index is up to date, so only the failed identifier
+    # is resolved again
+    requested.clear()
+    monkeypatch.setattr(
+        "doi2bibtex.bibfile.extract_index_keys",
+        lambda _: pytest.fail("Index should not be rebuilt"),
+    )
+    sync_command(bib_path, file_path, config, n_jobs=2)
+    assert requested == [["10.1000/bad"]]
+    monkeypatch.undo()
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifiers", fake_resolve_identifiers
+    )
+
+    # Case 4: The .bib file is edited, so the index is rebuilt from the
+    # file; the arXiv ID (which was resolved to a DOI) must still be found
+    with open(bib_path, "a") as f:
+        f.write("\n@misc{Manual_2021,\n  title = {Foo},\n}\n")
+    requested.clear()
+    text = bib_path.read_text()
+    sync_command(bib_path, file_path, config, n_jobs=2)
+    assert requested == [["10.1000/bad"]]
+    assert bib_path.read_text() == text
+
+
+def test__parse_cache_args() -> None:
+    """
+    Test `parse_cache_args()`.
+    """
+
+    assert parse_cache_args(["stats"]).action == "stats"
+    with pytest.raises(SystemExit):
+        parse_cache_args(["invalid-action"])
+
+
+def test__cache_command(
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """
+    Test `cache_command()`.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Add some entries to the (isolated) cache
+    cache = get_response_cache(max_size=1024 * 1024)
+    cache.set("a", backend="crossref", url="url-a", text="a" * 2048)
+    cache.set("b", backend="unknown", url="url-b", text="b")
+
+    # Case 1: stats
+    cache_command("stats", config)
+    out = capsys.readouterr().out
+    assert "crossref             1 entries         2.0 KiB" in out
+    assert "total                2 entries         2.0 KiB" in out
+
+    # Case 2: prune (removes the entry without TTL)
+    cache_command("prune", config)
+    assert capsys.readouterr().out == "Removed 1 entries from the cache.\n"
+
+    # Case 3: clear
+    cache_command("clear", config)
+    assert capsys.readouterr().out == "Removed 1 entries from the cache.\n"
+    assert cache.stats() == {}
+
+
+def test__report_profile(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    """
+    Test `report_profile()`.
+    """
+
+    # Case 1: profiling is not enabled
+    report_profile()
+    assert capsys.readouterr().err == ""
+
+    # Case 2: print the breakdown and write the timeline to files
+    start_profiling()
+    with span("crossref", "http"):
+        pass
+    trace_path = tmp_path / "trace.json"
+    json_path = tmp_path / "profile.json"
+    report_profile(trace_path=trace_path, json_path=json_path)
+    assert get_profiler() is None
+    err = capsys.readouterr().err
+    assert err.startswith("Profile (wall time: ")
+    assert "http        crossref" in err
+    with open(trace_path, "r") as json_file:
+        trace = json.load(json_file)
+    assert [_["name"] for _ in trace["traceEvents"]] == ["crossref"]
+    with open(json_path, "r") as json_file:
+        timeline = json.load(json_file)
+    assert timeline["summary"][0]["calls"] == 1
+    assert timeline["spans"][0]["category"] == "http"
+
+
+def test__lazy_imports() -> None:
+    """
+    Test that importing the CLI does not import any heavy dependencies
+    (which are only needed by some code paths), to keep `d2b` fast.
+    """
+
+    code = (
+        "import sys, doi2bibtex.cli; "
+        "print(' '.join(sorted(set(_.split('.')[0] for _ in sys.modules))))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+
+    for module in (
+        "bibtexparser",
+        "bs4",
+        "httpx",
+        "isbnlib",
+        "pylatexenc",
+        "requests",
+        "rich",
+        "unidecode",
+        "yaml",
+    ):
+        assert module not in output
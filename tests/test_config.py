@@ -14,7 +14,8 @@ from deepdiff import DeepDiff
 
 import pytest
 
-from doi2bibtex.config import Configuration
+import doi2bibtex.config
+from doi2bibtex.config import Configuration, get_default_config
 
 
 # -----------------------------------------------------------------------------
@@ -80,3 +81,24 @@ def test__configuration(
         assert "Ignoring unknown " in str(user_warning[0].message)
         assert config.limit_authors == 3
         assert 'ignored_property' not in vars(config)
+
+
+def test__get_default_config(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `get_default_config()`.
+    """
+
+    # Count how often the config file is loaded
+    loads = []
+    monkeypatch.setattr(doi2bibtex.config, "_default_config", None)
+    monkeypatch.setattr(
+        Configuration,
+        "load_from_yaml_file",
+        lambda self: loads.append(self),
+    )
+
+    # Case 1: The default configuration is created and loaded only once
+    config = get_default_config()
+    assert isinstance(config, Configuration)
+    assert get_default_config() is config
+    assert len(loads) == 1
@@ -0,0 +1,222 @@
+"""
+Unit tests for crossref.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from typing import Any, List
+from urllib.parse import parse_qs, unquote, urlparse
+
+import json
+
+from deepdiff import DeepDiff
+
+import pytest
+
+from doi2bibtex.crossref import (
+    crossref_work_to_bibtex_dict,
+    escape_latex,
+    get_crossref_work_url,
+    get_crossref_works_url,
+    resolve_doi_with_crossref_json,
+    resolve_dois_with_crossref_json,
+)
+from doi2bibtex.network import Response
+
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+WORK = {
+    "DOI": "10.1051/0004-6361/202142529",
+    "type": "journal-article",
+    "title": ["Physically constrained causal noise models"],
+    "container-title": ["Astronomy &amp; Astrophysics"],
+    "author": [
+        {"given": "Timothy D.", "family": "Gebhard"},
+        {"given": "Markus J.", "family": "Bonse"},
+        {"name": "The Exoplanet Collaboration"},
+    ],
+    "volume": "666",
+    "page": "A9",
+    "publisher": "EDP Sciences",
+    "published": {"date-parts": [[2022, 10]]},
+}
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__get_crossref_works_url() -> None:
+    """
+    Test `get_crossref_works_url()`.
+    """
+
+    url = get_crossref_works_url(["10.1000/a", "10.1000/b"])
+    query = parse_qs(urlparse(url).query)
+    assert url.startswith("https://api.crossref.org/works?")
+    assert query["filter"] == ["doi:10.1000/a,doi:10.1000/b"]
+    assert query["rows"] == ["2"]
+    assert "title" in query["select"][0].split(",")
+
+
+def test__get_crossref_work_url() -> None:
+    """
+    Test `get_crossref_work_url()`.
+    """
+
+    assert get_crossref_work_url("10.1000/a,b") == (
+        "https://api.crossref.org/works/10.1000/a%2Cb"
+    )
+
+
+def test__escape_latex() -> None:
+    """
+    Test `escape_latex()`.
+    """
+
+    assert escape_latex("A &amp; B") == r"A \& B"
+    assert escape_latex(r"A \& B") == r"A \& B"
+    assert escape_latex("The <i>Gaia</i>\n  mission") == "The Gaia mission"
+    assert escape_latex("100% #1") == r"100\% \#1"
+
+
+def test__crossref_work_to_bibtex_dict() -> None:
+    """
+    Test `crossref_work_to_bibtex_dict()`.
+    """
+
+    # Case 1: Journal article
+    assert not DeepDiff(
+        crossref_work_to_bibtex_dict(WORK),
+        {
+            "ENTRYTYPE": "article",
+            "ID": "Gebhard_2022",
+            "author": (
+                "Timothy D. Gebhard and Markus J. Bonse and "
+                "{The Exoplanet Collaboration}"
+            ),
+            "title": "Physically constrained causal noise models",
+            "journal": r"Astronomy \& Astrophysics",
+            "volume": "666",
+            "pages": "A9",
+            "publisher": "EDP Sciences",
+            "year": "2022",
+            "month": "oct",
+            "doi": "10.1051/0004-6361/202142529",
+            "url": "https://doi.org/10.1051%2F0004-6361%2F202142529",
+        },
+    )
+
+    # Case 2: Minimal proceedings paper
+    bibtex_dict = crossref_work_to_bibtex_dict(
+        {
+            "DOI": "10.1000/xyz",
+            "type": "proceedings-article",
+            "container-title": ["Some Conference"],
+            "issued": {"date-parts": [[2020]]},
+        }
+    )
+    assert bibtex_dict["ENTRYTYPE"] == "inproceedings"
+    assert bibtex_dict["ID"] == "10.1000/xyz"
+    assert bibtex_dict["booktitle"] == "Some Conference"
+    assert bibtex_dict["year"] == "2020"
+    assert "month" not in bibtex_dict
+
+    # Case 3: Empty list of authors
+    bibtex_dict = crossref_work_to_bibtex_dict(
+        {
+            "DOI": "10.1000/xyz",
+            "author": [],
+            "issued": {"date-parts": [[2020]]},
+        }
+    )
+    assert bibtex_dict["ID"] == "10.1000/xyz"
+    assert "author" not in bibtex_dict
+
+    # Case 4: Date without a month (but with a null placeholder)
+    bibtex_dict = crossref_work_to_bibtex_dict(
+        {"DOI": "10.1000/xyz", "issued": {"date-parts": [[2020, None]]}}
+    )
+    assert bibtex_dict["year"] == "2020"
+    assert "month" not in bibtex_dict
+
+
+def test__resolve_dois_with_crossref_json(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `resolve_dois_with_crossref_json()` and
+    `resolve_doi_with_crossref_json()`.
+    """
+
+    # Simulate the Crossref API (which only knows about one DOI)
+    requested: List[List[str]] = []
+
+    def fake_get(url: str, **_: Any) -> Response:
+        if not (query := urlparse(url).query):
+            doi = unquote(urlparse(url).path[len("/works/"):])
+            requested.append([doi])
+            if doi != "10.1000/a,b":
+                return Response(status_code=404, text="Resource not found.")
+            work = dict(WORK, DOI=doi)
+            return Response(
+                status_code=200, text=json.dumps({"message": work})
+            )
+        filters = parse_qs(query)["filter"][0].split(",")
+        requested.append([_[4:] for _ in filters])
+        items = [WORK] if "doi:10.1051/0004-6361/202142529" in filters else []
+        return Response(
+            status_code=200,
+            text=json.dumps({"message": {"items": items}}),
+        )
+
+    monkeypatch.setattr("doi2bibtex.network.get", fake_get)
+
+    # Case 1: DOIs are matched case-insensitively and split into chunks
+    results = resolve_dois_with_crossref_json(
+        ["10.1000/missing", "10.1051/0004-6361/202142529".upper(), "10.1/x"],
+        chunk_size=2,
+    )
+    assert requested == [
+        ["10.1000/missing", "10.1051/0004-6361/202142529".upper()],
+        ["10.1/x"],
+    ]
+    assert list(results.keys()) == ["10.1051/0004-6361/202142529".upper()]
+
+    # Case 2: Resolve a single DOI
+    bibtex_dict = resolve_doi_with_crossref_json("10.1051/0004-6361/202142529")
+    assert bibtex_dict["ID"] == "Gebhard_2022"
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_doi_with_crossref_json("10.1000/missing")
+    assert "no BibTeX entry found" in str(runtime_error)
+
+    # Case 3: DOIs with a comma are requested one by one
+    requested.clear()
+    results = resolve_dois_with_crossref_json(
+        ["10.1000/a,b", "10.1051/0004-6361/202142529", "10.1000/c,d"]
+    )
+    assert requested == [
+        ["10.1000/a,b"],
+        ["10.1000/c,d"],
+        ["10.1051/0004-6361/202142529"],
+    ]
+    assert list(results.keys()) == [
+        "10.1000/a,b", "10.1051/0004-6361/202142529"
+    ]
+    assert resolve_doi_with_crossref_json("10.1000/a,b")["doi"] == (
+        "10.1000/a,b"
+    )
+
+    # Case 4: Failed request
+    monkeypatch.setattr(
+        "doi2bibtex.network.get",
+        lambda *_, **__: Response(status_code=503, text=""),
+    )
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_dois_with_crossref_json(["10.1000/a", "10.1000/b"])
+    assert "Error 503 resolving 2 DOIs" in str(runtime_error)
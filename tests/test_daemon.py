@@ -0,0 +1,98 @@
+"""
+Unit tests for daemon.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from threading import Thread
+from typing import List
+
+import socket
+
+import pytest
+
+from doi2bibtex.config import Configuration
+from doi2bibtex.daemon import (
+    DaemonServer,
+    get_socket_path,
+    is_daemon_running,
+    resolve_with_daemon,
+)
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__get_socket_path() -> None:
+    """
+    Test `get_socket_path()`.
+    """
+
+    assert get_socket_path() == Path.home() / ".doi2bibtex" / "d2b.sock"
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="No Unix sockets")
+def test__resolve_with_daemon(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """
+    Test `DaemonServer`, `is_daemon_running()` and `resolve_with_daemon()`.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    def fake_resolve_identifiers(
+        identifiers: List[str],
+        config: Configuration,
+        n_jobs: int = 1,
+    ) -> List[str]:
+        if "bad" in identifiers:
+            raise ValueError("Something went wrong")
+        return [f"@article{{{_}}}" for _ in identifiers]
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifiers", fake_resolve_identifiers
+    )
+    socket_path = tmp_path / "d2b.sock"
+
+    # Case 1: No daemon is running
+    assert not is_daemon_running(socket_path)
+    assert resolve_with_daemon(["a"], socket_path=socket_path) is None
+
+    # Case 2: Stale socket file of a daemon that is no longer running
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(str(socket_path))
+    assert not is_daemon_running(socket_path)
+    assert resolve_with_daemon(["a"], socket_path=socket_path) is None
+    socket_path.unlink()
+
+    # Start the daemon in a background thread
+    server = DaemonServer(socket_path, config)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+
+        # Case 3: Daemon is running
+        assert is_daemon_running(socket_path)
+        assert (socket_path.stat().st_mode & 0o777) == 0o600
+        assert resolve_with_daemon(["a", "b"], socket_path=socket_path) == [
+            "@article{a}",
+            "@article{b}",
+        ]
+
+        # Case 4: The request fails on the daemon side
+        assert resolve_with_daemon(["bad"], socket_path=socket_path) is None
+
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -6,12 +6,12 @@ Unit tests for dblp.py.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
-from types import SimpleNamespace
 from warnings import warn
 
 import pytest
 
 from doi2bibtex.dblp import crossmatch_with_dblp
+from doi2bibtex.network import Response
 
 
 # -----------------------------------------------------------------------------
@@ -31,7 +31,10 @@ def test__crossmatch_with_dblp(monkeypatch: pytest.MonkeyPatch) -> None:
 
     # Case 2: Simulate failed request
     with monkeypatch.context() as m:
-        m.setattr("requests.get", lambda _: SimpleNamespace(status_code=418))
+        m.setattr(
+            "doi2bibtex.network.get",
+            lambda *_, **__: Response(status_code=418, text=""),
+        )
         with pytest.raises(RuntimeError) as runtime_error:
             identifier = "1312.6114"
             bibtex_dict = {
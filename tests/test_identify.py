@@ -7,10 +7,13 @@ Unit tests for identify.py.
 # -----------------------------------------------------------------------------
 
 from doi2bibtex.identify import (
+    classify_identifier,
+    classify_identifiers,
     is_ads_bibcode,
     is_arxiv_id,
     is_doi,
     is_isbn,
+    normalize_identifier,
 )
 
 
@@ -76,3 +79,79 @@ def test__is_isbn() -> None:
     assert not is_isbn('9700000000000')
     assert not is_isbn('9000000000000')
     assert not is_isbn('9710000000000')
+
+
+def test__normalize_identifier() -> None:
+    """
+    Test `normalize_identifier()`.
+    """
+
+    assert normalize_identifier(" identifier  ") == "identifier"
+    assert normalize_identifier("doi:identifier") == "identifier"
+    assert normalize_identifier("DOI:identifier") == "identifier"
+    assert normalize_identifier("arXiv:identifier") == "identifier"
+    assert normalize_identifier("arxiv:identifier") == "identifier"
+    assert normalize_identifier("identifier:doi:") == "identifier:doi:"
+
+
+def test__classify_identifier() -> None:
+    """
+    Test `classify_identifier()`.
+    """
+
+    # Case 1: All supported types (with and without prefixes)
+    assert classify_identifier("doi:10.1051/0004-6361/202142529") == (
+        "doi",
+        "10.1051/0004-6361/202142529",
+    )
+    assert classify_identifier(" arXiv:2010.05591 ") == ("arxiv", "2010.05591")
+    assert classify_identifier("math.GT/0309136") == (
+        "arxiv",
+        "math.GT/0309136",
+    )
+    assert classify_identifier("2022A&A...666A...9G") == (
+        "ads",
+        "2022A&A...666A...9G",
+    )
+    assert classify_identifier("978-3-16-148410-0") == (
+        "isbn",
+        "978-3-16-148410-0",
+    )
+
+    # Case 2: Unknown identifier
+    assert classify_identifier("foo bar") == ("unknown", "foo bar")
+
+    # Case 3: The result is consistent with the `is_*()` functions
+    for identifier in (
+        "10.1021/ac0341261",
+        "2010.05591v2",
+        "1992ApJ...400L...1W",
+        "0826497527",
+        "9876ABCDF.518L..131",
+    ):
+        expected = (
+            "doi" if is_doi(identifier) else
+            "arxiv" if is_arxiv_id(identifier) else
+            "ads" if is_ads_bibcode(identifier) else
+            "isbn" if is_isbn(identifier) else
+            "unknown"
+        )
+        assert classify_identifier(identifier)[0] == expected
+
+
+def test__classify_identifiers() -> None:
+    """
+    Test `classify_identifiers()`.
+    """
+
+    identifiers = [
+        "doi:10.1021/ac0341261",
+        "2010.05591",
+        "1992ApJ...400L...1W",
+        "0826497527",
+        "foo",
+    ]
+    assert list(classify_identifiers(identifiers)) == [
+        classify_identifier(_) for _ in identifiers
+    ]
+    assert list(classify_identifiers(iter([]))) == []
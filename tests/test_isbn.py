@@ -6,9 +6,53 @@ Unit tests for isbn.py.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
+from typing import Any, List
+from urllib.parse import parse_qs, urlparse
+
+import json
+import re
+
 import pytest
 
-from doi2bibtex.isbn import resolve_isbn_with_google_api
+from doi2bibtex.isbn import (
+    get_google_books_url,
+    get_open_library_url,
+    open_library_book_to_bibtex_dict,
+    resolve_isbn_with_google_api,
+    resolve_isbn_with_open_library,
+    resolve_isbns_with_google_api,
+    resolve_isbns_with_open_library,
+)
+from doi2bibtex.network import Response
+
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+# Projected Google Books volume (see `GOOGLE_BOOKS_FIELDS`)
+VOLUME = {
+    "volumeInfo": {
+        "title": "Exoplanet Atmospheres",
+        "subtitle": "Physical Processes",
+        "authors": ["Sara Seager"],
+        "publisher": "Princeton University Press",
+        "publishedDate": "2010-08-01",
+        "industryIdentifiers": [
+            {"type": "ISBN_10", "identifier": "1400835305"},
+            {"type": "ISBN_13", "identifier": "9781400835300"},
+        ],
+    }
+}
+
+# Open Library book (`jscmd=data`)
+BOOK = {
+    "title": "Exoplanet Atmospheres",
+    "subtitle": "Physical Processes",
+    "authors": [{"name": "Sara Seager", "url": "https://openlibrary.org/"}],
+    "publishers": [{"name": "Princeton University Press"}],
+    "publish_date": "August 2010",
+}
 
 
 # -----------------------------------------------------------------------------
@@ -51,3 +95,138 @@ def test__resolve_isbn_with_google_api() -> None:
         "title": "Birds of Southern Africa: Fifth Edition",
         "year": "2023",
     }
+
+
+def test__get_google_books_url() -> None:
+    """
+    Test `get_google_books_url()`.
+    """
+
+    url = get_google_books_url(["978-1-4008-3530-0", "9780691248493"])
+    query = parse_qs(urlparse(url).query)
+    assert url.startswith("https://www.googleapis.com/books/v1/volumes?")
+    assert query["q"] == ["isbn:9781400835300 OR isbn:9780691248493"]
+    assert query["fields"][0].startswith("items/volumeInfo(")
+
+
+def test__resolve_isbns_with_google_api(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `resolve_isbns_with_google_api()`.
+    """
+
+    # Simulate the Google Books API (which only knows about one book)
+    requested: List[List[str]] = []
+
+    def fake_get(url: str, **_: Any) -> Response:
+        query = parse_qs(urlparse(url).query)["q"][0]
+        requested.append(isbns := re.findall(r"isbn:(\w+)", query))
+        known = {"1400835305", "9781400835300"}
+        items = [VOLUME] if known.intersection(isbns) else []
+        return Response(status_code=200, text=json.dumps({"items": items}))
+
+    monkeypatch.setattr("doi2bibtex.network.get", fake_get)
+
+    # Case 1: ISBNs are matched as ISBN-13s and split into chunks
+    results = resolve_isbns_with_google_api(
+        ["9780691248493", "978-1-4008-3530-0", "1-4008-3530-5"],
+        chunk_size=2,
+    )
+    assert requested == [["9780691248493", "9781400835300"], ["1400835305"]]
+    assert list(results.keys()) == ["978-1-4008-3530-0", "1-4008-3530-5"]
+    assert results["978-1-4008-3530-0"] == {
+        "ENTRYTYPE": "book",
+        "ID": "Seager_2010",
+        "author": "Sara Seager",
+        "isbn": "978-1-4008-3530-0",
+        "publisher": "Princeton University Press",
+        "title": "Exoplanet Atmospheres: Physical Processes",
+        "year": "2010",
+    }
+
+    # Case 2: Failed request
+    monkeypatch.setattr(
+        "doi2bibtex.network.get",
+        lambda *_, **__: Response(status_code=503, text=""),
+    )
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_isbns_with_google_api(["9780691248493", "9781400835300"])
+    assert "Error 503 resolving 2 ISBNs" in str(runtime_error)
+
+
+def test__get_open_library_url() -> None:
+    """
+    Test `get_open_library_url()`.
+    """
+
+    url = get_open_library_url(["978-1-4008-3530-0", "0691248494"])
+    query = parse_qs(urlparse(url).query)
+    assert url.startswith("https://openlibrary.org/api/books?")
+    assert query["bibkeys"] == ["ISBN:9781400835300,ISBN:0691248494"]
+    assert query["jscmd"] == ["data"]
+
+
+def test__open_library_book_to_bibtex_dict() -> None:
+    """
+    Test `open_library_book_to_bibtex_dict()`.
+    """
+
+    # Case 1: Complete book
+    assert open_library_book_to_bibtex_dict(BOOK, "9781400835300") == {
+        "ENTRYTYPE": "book",
+        "ID": "Seager_2010",
+        "author": "Sara Seager",
+        "isbn": "9781400835300",
+        "publisher": "Princeton University Press",
+        "title": "Exoplanet Atmospheres: Physical Processes",
+        "year": "2010",
+    }
+
+    # Case 2: Minimal book
+    bibtex_dict = open_library_book_to_bibtex_dict(
+        {
+            "title": "Some Book",
+            "authors": [{"name": "Jane Doe"}],
+            "publish_date": "n.d.",
+        },
+        "9780691248493",
+    )
+    assert bibtex_dict["title"] == "Some Book"
+    assert bibtex_dict["year"] == ""
+    assert bibtex_dict["publisher"] == ""
+
+
+def test__resolve_isbns_with_open_library(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `resolve_isbns_with_open_library()` and
+    `resolve_isbn_with_open_library()`.
+    """
+
+    # Simulate Open Library (which only knows about one book)
+    requested: List[List[str]] = []
+
+    def fake_get(url: str, **_: Any) -> Response:
+        bibkeys = parse_qs(urlparse(url).query)["bibkeys"][0].split(",")
+        requested.append([_[5:] for _ in bibkeys])
+        books = {_: BOOK for _ in bibkeys if _ == "ISBN:9781400835300"}
+        return Response(status_code=200, text=json.dumps(books))
+
+    monkeypatch.setattr("doi2bibtex.network.get", fake_get)
+
+    # Case 1: Books are matched by their bibkeys and split into chunks
+    results = resolve_isbns_with_open_library(
+        ["978-1-4008-3530-0", "9780691248493", "9781400835300"],
+        chunk_size=2,
+    )
+    assert requested == [["9781400835300", "9780691248493"], ["9781400835300"]]
+    assert list(results.keys()) == ["978-1-4008-3530-0", "9781400835300"]
+    assert results["978-1-4008-3530-0"]["ID"] == "Seager_2010"
+
+    # Case 2: Resolve a single ISBN
+    assert resolve_isbn_with_open_library("9781400835300")["year"] == "2010"
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_isbn_with_open_library("9780691248493")
+    assert "no BibTeX entry found" in str(runtime_error)
@@ -0,0 +1,519 @@
+"""
+Unit tests for network.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import sys
+import threading
+
+import pytest
+import requests
+
+from doi2bibtex.config import Configuration
+from doi2bibtex.network import (
+    LatencyTracker,
+    ResolveError,
+    Response,
+    RetryPolicy,
+    add_mailto,
+    check_failure_cache,
+    classify_failure,
+    get,
+    get_failure_ttls,
+    get_hedge_delay,
+    get_host,
+    get_rate_limit,
+    get_session,
+    get_timeout,
+    get_ttl,
+    post,
+    record_failure,
+    rewrite_url,
+)
+from doi2bibtex.ratelimit import RateLimiter
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def config(monkeypatch: pytest.MonkeyPatch) -> Configuration:
+    """
+    Default configuration (without loading the configuration file).
+    """
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        return Configuration()
+
+
+def test__get_session(config: Configuration) -> None:
+    """
+    Test `get_session()`.
+    """
+
+    # Case 1: The same settings give the same session
+    session = get_session(config)
+    assert get_session(config) is session
+    assert str(session.headers["User-Agent"]).startswith("doi2bibtex/")
+
+    # Case 2: Connection pool settings are applied to the adapters
+    config.max_connections_per_host = 3
+    adapter = get_session(config).get_adapter("https://api.crossref.org")
+    assert adapter._pool_maxsize == 3  # type: ignore
+    assert adapter._pool_block  # type: ignore
+
+    # Case 3: Different proxies give a different session
+    config.proxies = {"https": "http://localhost:3128"}
+    session = get_session(config)
+    assert session.proxies["https"] == "http://localhost:3128"
+    assert get_session(config) is session
+
+
+def test__get_ttl(config: Configuration) -> None:
+    """
+    Test `get_ttl()`.
+    """
+
+    config.cache_ttl_days = {"crossref": 2}
+    assert get_ttl("crossref", config) == 2 * 24 * 60 * 60
+    assert get_ttl("unknown", config) == 0
+
+
+def test__classify_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `classify_failure()`.
+    """
+
+    httpx = pytest.importorskip("httpx")
+
+    # Case 1: Identifiers that do not exist (or have no BibTeX entry)
+    assert classify_failure(ResolveError("Error 404", 404)) == "permanent"
+    assert classify_failure(ResolveError("Error 410", 410)) == "permanent"
+    assert classify_failure(ResolveError("No entry found")) == "permanent"
+
+    # Case 2: Rate limits, server errors, timeouts and connection errors
+    assert classify_failure(ResolveError("Error 503", 503)) == "transient"
+    assert classify_failure(requests.Timeout()) == "transient"
+    assert classify_failure(requests.ConnectionError()) == "transient"
+    assert classify_failure(httpx.ConnectTimeout("")) == "transient"
+
+    # Case 3: Everything else
+    assert classify_failure(ResolveError("Error 401", 401)) is None
+    assert classify_failure(ResolveError("Error 429", 429)) is None
+    assert classify_failure(RuntimeError("No ADS token found!")) is None
+    assert classify_failure(KeyError("year")) is None
+
+    # Case 4: `httpx` is an optional dependency
+    monkeypatch.setitem(sys.modules, "httpx", None)
+    assert classify_failure(ResolveError("Error 404", 404)) == "permanent"
+    assert classify_failure(requests.Timeout()) == "transient"
+    assert classify_failure(RuntimeError("Some error")) is None
+
+
+def test__failure_cache(config: Configuration) -> None:
+    """
+    Test `record_failure()` and `check_failure_cache()`.
+    """
+
+    # Case 1: TTLs are given in hours
+    assert get_failure_ttls(config) == {
+        "permanent": 24 * 60 * 60, "transient": 0
+    }
+
+    # Case 2: Permanent failures are remembered
+    check_failure_cache("doi:10.1000/xyz", config)
+    record_failure("doi:10.1000/xyz", ResolveError("Error 404", 404), config)
+    with pytest.raises(ResolveError) as resolve_error:
+        check_failure_cache("doi:10.1000/xyz", config)
+    assert str(resolve_error.value) == "Error 404 (cached)"
+    assert resolve_error.value.status_code == 404
+
+    # Case 3: Failures without a kind (or key) are not remembered
+    record_failure("doi:10.1000/abc", RuntimeError("Some error"), config)
+    record_failure(None, ResolveError("Error 404", 404), config)
+    check_failure_cache("doi:10.1000/abc", config)
+    check_failure_cache(None, config)
+
+    # Case 4: Kinds of failures with a TTL of 0 are not remembered (which
+    # is the default for transient failures), unless users opt in
+    record_failure("doi:10.1000/abc", requests.Timeout(), config)
+    check_failure_cache("doi:10.1000/abc", config)
+    config.negative_cache_ttl_hours["transient"] = 0.25
+    record_failure("doi:10.1000/abc", requests.Timeout(), config)
+    with pytest.raises(ResolveError):
+        check_failure_cache("doi:10.1000/abc", config)
+
+    # Case 5: Rate limits are never remembered
+    record_failure("doi:10.1000/def", ResolveError("Error 429", 429), config)
+    check_failure_cache("doi:10.1000/def", config)
+
+    # Case 6: Nothing is remembered if the cache is disabled
+    config.use_cache = False
+    check_failure_cache("doi:10.1000/xyz", config)
+
+
+def test__get_host() -> None:
+    """
+    Test `get_host()`.
+    """
+
+    assert get_host("https://API.crossref.org/works?q=1") == "api.crossref.org"
+    assert get_host("http://localhost:8080/") == "localhost"
+    assert get_host("not a url") == ""
+
+
+def test__rewrite_url(config: Configuration) -> None:
+    """
+    Test `rewrite_url()`.
+    """
+
+    url = "https://api.crossref.org/works/10.1000/xyz"
+
+    # Case 1: no base URLs are replaced
+    assert rewrite_url(url, config) == url
+
+    # Case 2: replace the base URL of Crossref
+    config.base_urls = {"https://api.crossref.org": "http://127.0.0.1/cr"}
+    assert rewrite_url(url, config) == "http://127.0.0.1/cr/works/10.1000/xyz"
+    assert rewrite_url("https://dblp.org/", config) == "https://dblp.org/"
+
+
+def test__get_rate_limit(config: Configuration) -> None:
+    """
+    Test `get_rate_limit()`.
+    """
+
+    config.rate_limits = {"api.crossref.org": 10, "dblp.org": 0}
+    assert get_rate_limit("api.crossref.org", config) == 10.0
+    assert get_rate_limit("dblp.org", config) is None
+    assert get_rate_limit("example.org", config) is None
+
+
+def test__add_mailto(config: Configuration) -> None:
+    """
+    Test `add_mailto()`.
+    """
+
+    # Case 1: No email address
+    kwargs: Dict[str, Any] = {}
+    add_mailto("https://api.crossref.org/works", config, kwargs)
+    assert kwargs == {}
+
+    # Case 2: Requests to Crossref
+    config.crossref_mailto = "jane@example.org"
+    kwargs = {"headers": {"Accept": "application/json"}}
+    add_mailto("https://api.crossref.org/works", config, kwargs)
+    assert kwargs["headers"]["Accept"] == "application/json"
+    assert kwargs["headers"]["User-Agent"].endswith(
+        "(mailto:jane@example.org)"
+    )
+
+    # Case 3: Requests to other hosts
+    kwargs = {}
+    add_mailto("https://dblp.org/search", config, kwargs)
+    assert kwargs == {}
+
+
+def test__request(
+    monkeypatch: pytest.MonkeyPatch,
+    config: Configuration,
+) -> None:
+    """
+    Test `request()` (via `get()` and `post()`).
+    """
+
+    # Keep track of the requests that are actually sent
+    sent: List[str] = []
+
+    def fake_request(
+        _: Any,
+        method: str,
+        url: str,
+        **__: Any,
+    ) -> SimpleNamespace:
+        sent.append(f"{method} {url}")
+        status_code = 404 if "missing" in url else 200
+        return SimpleNamespace(
+            status_code=status_code,
+            text=f"response for {url}",
+            headers={"X-Some-Header": "value"},
+        )
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    # Case 1: The first request is sent, the second one is cached
+    for _ in range(2):
+        response = get("https://example.org/a", "crossref", config)
+        assert response.status_code == 200
+        assert response.text == "response for https://example.org/a"
+    assert sent == ["GET https://example.org/a"]
+
+    # Case 2: Different request bodies are cached separately
+    post("https://example.org/b", "ads", config, data="1")
+    post("https://example.org/b", "ads", config, data="2")
+    post("https://example.org/b", "ads", config, data="1")
+    assert sent[1:] == ["POST https://example.org/b"] * 2
+
+    # Case 3: Failed requests are not cached
+    for _ in range(2):
+        response = get("https://example.org/missing", "crossref", config)
+        assert response.status_code == 404
+    assert sent[3:] == ["GET https://example.org/missing"] * 2
+
+    # Case 4: Backends without a TTL are not cached
+    for _ in range(2):
+        get("https://example.org/c", "unknown", config)
+    assert sent[5:] == ["GET https://example.org/c"] * 2
+
+    # Case 5: Caching can be disabled completely
+    config.use_cache = False
+    get("https://example.org/a", "crossref", config)
+    assert sent[7:] == ["GET https://example.org/a"]
+
+
+def test__request_rate_limits(
+    monkeypatch: pytest.MonkeyPatch,
+    config: Configuration,
+) -> None:
+    """
+    Test that `request()` respects rate limits and retries requests that
+    were throttled by the server.
+    """
+
+    config.use_cache = False
+    config.rate_limit_retries = 2
+    config.rate_limits = {"example.org": 1}
+
+    # Use a fresh rate limiter and do not actually wait
+    rate_limiter = RateLimiter()
+    monkeypatch.setattr(
+        "doi2bibtex.network.get_rate_limiter", lambda: rate_limiter
+    )
+    delays: List[float] = []
+    monkeypatch.setattr("doi2bibtex.network.time.sleep", delays.append)
+
+    # The server throttles the first `n_throttled` requests
+    sent: List[int] = []
+    n_throttled = [0]
+
+    def fake_request(_: Any, *__: Any, **___: Any) -> SimpleNamespace:
+        sent.append(1)
+        if len(sent) <= n_throttled[0]:
+            return SimpleNamespace(
+                status_code=429, text="", headers={"Retry-After": "2"}
+            )
+        return SimpleNamespace(status_code=200, text="ok", headers={})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    # Case 1: Requests are retried after `Retry-After` (plus jitter)
+    n_throttled[0] = 2
+    response = get("https://example.org/a", "crossref", config)
+    assert response.status_code == 200
+    assert len(sent) == 3
+    assert len(delays) == 2
+    assert all(2 <= _ <= 2.5 + 1 for _ in delays)
+
+    # Case 2: After `rate_limit_retries`, the 429 is returned
+    sent.clear()
+    n_throttled[0] = 5
+    response = get("https://example.org/a", "crossref", config)
+    assert response.status_code == 429
+    assert len(sent) == 3
+
+
+def test__get_timeout(config: Configuration) -> None:
+    """
+    Test `get_timeout()`.
+    """
+
+    config.timeouts = {"all": [5, 30], "dblp": [2, 10]}
+    assert get_timeout("dblp", config) == (2.0, 10.0)
+    assert get_timeout("crossref", config) == (5.0, 30.0)
+
+    config.timeouts = {}
+    assert get_timeout("crossref", config) is None
+
+
+def test__latency_tracker() -> None:
+    """
+    Test `LatencyTracker`.
+    """
+
+    latency_tracker = LatencyTracker(max_samples=100)
+
+    # Case 1: Not enough latencies
+    for latency in range(10):
+        latency_tracker.add("dblp", float(latency))
+    assert latency_tracker.get_quantile("dblp", 0.95) is None
+    assert latency_tracker.get_quantile("dblp", 0.5, min_samples=10) == 5.0
+    assert latency_tracker.get_quantile("crossref", 0.5) is None
+
+    # Case 2: Only the most recent latencies are kept
+    for latency in range(1000):
+        latency_tracker.add("dblp", float(latency))
+    assert latency_tracker.get_quantile("dblp", 0.0) == 900.0
+    assert latency_tracker.get_quantile("dblp", 0.95) == 995.0
+    assert latency_tracker.get_quantile("dblp", 1.0) == 999.0
+
+
+def test__get_hedge_delay(
+    monkeypatch: pytest.MonkeyPatch,
+    config: Configuration,
+) -> None:
+    """
+    Test `get_hedge_delay()`.
+    """
+
+    latency_tracker = LatencyTracker()
+    for latency in range(100):
+        latency_tracker.add("dblp", latency / 100)
+    monkeypatch.setattr(
+        "doi2bibtex.network.get_latency_tracker", lambda: latency_tracker
+    )
+
+    # Case 1: Hedging is disabled
+    assert get_hedge_delay("GET", "dblp", config) is None
+
+    # Case 2: Hedging is enabled, but only for idempotent requests
+    config.hedge_requests = True
+    assert get_hedge_delay("GET", "dblp", config) == 0.95
+    assert get_hedge_delay("POST", "dblp", config) is None
+    assert get_hedge_delay("GET", "crossref", config) is None
+
+
+def test__retry_policy(
+    monkeypatch: pytest.MonkeyPatch,
+    config: Configuration,
+) -> None:
+    """
+    Test `RetryPolicy`.
+    """
+
+    rate_limiter = RateLimiter()
+    monkeypatch.setattr(
+        "doi2bibtex.network.get_rate_limiter", lambda: rate_limiter
+    )
+    config.max_retries = 2
+    config.rate_limit_retries = 1
+
+    # Case 1: Errors and transient server errors are retried with backoff
+    retry_policy = RetryPolicy("GET", config)
+    delay = retry_policy.retry_after_error()
+    assert delay is not None and 1 <= delay <= 1.25
+    delay = retry_policy.retry_after_response("a.org", Response(502, ""))
+    assert delay is not None and 2 <= delay <= 2.5
+    assert retry_policy.retry_after_error() is None
+
+    # Case 2: Successful responses and client errors are not retried
+    retry_policy = RetryPolicy("GET", config)
+    for status_code in (200, 404):
+        response = Response(status_code, "")
+        assert retry_policy.retry_after_response("a.org", response) is None
+
+    # Case 3: Throttled requests wait for the rate limiter
+    response = Response(429, "", {"Retry-After": "3"})
+    assert retry_policy.retry_after_response("a.org", response) == 0.0
+    assert 3 <= rate_limiter.reserve("a.org") <= 3.75
+    assert retry_policy.retry_after_response("a.org", response) is None
+
+    # Case 4: POST requests are only retried if they were throttled
+    retry_policy = RetryPolicy("POST", config)
+    assert retry_policy.retry_after_error() is None
+    server_error = Response(503, "")
+    assert retry_policy.retry_after_response("a.org", server_error) is None
+    response = Response(429, "")
+    assert retry_policy.retry_after_response("a.org", response) == 0.0
+
+
+def test__request_retries(
+    monkeypatch: pytest.MonkeyPatch,
+    config: Configuration,
+) -> None:
+    """
+    Test that `request()` uses timeouts and retries failed requests.
+    """
+
+    config.use_cache = False
+    config.max_retries = 2
+    config.timeouts = {"all": [1, 2]}
+    delays: List[float] = []
+    monkeypatch.setattr("doi2bibtex.network.time.sleep", delays.append)
+
+    # The first `n_failures` requests time out or fail with a server error
+    sent: List[Any] = []
+    n_failures = [0]
+
+    def fake_request(_: Any, *__: Any, **kwargs: Any) -> SimpleNamespace:
+        sent.append(kwargs["timeout"])
+        if len(sent) <= n_failures[0]:
+            if len(sent) % 2:
+                raise requests.ReadTimeout("Too slow")
+            return SimpleNamespace(status_code=503, text="", headers={})
+        return SimpleNamespace(status_code=200, text="ok", headers={})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    # Case 1: Requests are retried with backoff
+    n_failures[0] = 2
+    assert get("https://example.org/a", "crossref", config).text == "ok"
+    assert sent == [(1.0, 2.0)] * 3
+    assert len(delays) == 2
+
+    # Case 2: After `max_retries`, the error is raised
+    sent.clear()
+    n_failures[0] = 3
+    with pytest.raises(requests.ReadTimeout):
+        get("https://example.org/a", "crossref", config)
+    assert len(sent) == 3
+
+    # Case 3: POST requests are not retried
+    sent.clear()
+    n_failures[0] = 1
+    with pytest.raises(requests.ReadTimeout):
+        post("https://example.org/a", "crossref", config, data="1")
+    assert len(sent) == 1
+
+
+def test__request_hedging(
+    monkeypatch: pytest.MonkeyPatch,
+    config: Configuration,
+) -> None:
+    """
+    Test that `request()` sends a second request if the first one is
+    slower than usual, and uses the faster of the two responses.
+    """
+
+    config.use_cache = False
+    config.hedge_requests = True
+    monkeypatch.setattr(
+        "doi2bibtex.network.get_hedge_delay", lambda *_: 0.05
+    )
+
+    # The first request hangs until the test is done
+    sent: List[int] = []
+    release = threading.Event()
+
+    def fake_request(_: Any, *__: Any, **___: Any) -> SimpleNamespace:
+        sent.append(1)
+        if len(sent) == 1:
+            release.wait(timeout=10)
+            return SimpleNamespace(status_code=200, text="slow", headers={})
+        return SimpleNamespace(status_code=200, text="fast", headers={})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    try:
+        assert get("https://example.org/a", "crossref", config).text == "fast"
+        assert len(sent) == 2
+    finally:
+        release.set()
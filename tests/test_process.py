@@ -15,8 +15,16 @@ import pytest
 from doi2bibtex.ads import get_ads_token
 from doi2bibtex.config import Configuration
 from doi2bibtex.process import (
+    MAX_PIPELINES,
+    _pipelines,
+    canonicalize_identifier,
+    compile_pipeline,
+    get_canonical_key,
+    get_pipeline,
     preprocess_identifier,
     postprocess_bibtex,
+    register_step,
+    unregister_step,
     abbreviate_journal_name,
     convert_latex_chars,
     convert_month_to_number,
@@ -47,6 +55,34 @@ def test__preprocess_identifier() -> None:
     assert preprocess_identifier("arxiv:identifier") == "identifier"
 
 
+def test__canonicalize_identifier() -> None:
+    """
+    Test `canonicalize_identifier()` and `get_canonical_key()`.
+    """
+
+    # Case 1: DOIs are lowercased
+    assert canonicalize_identifier("doi:10.1051/0004-6361/202142529") == (
+        canonicalize_identifier(" 10.1051/0004-6361/202142529".upper())
+    )
+    assert get_canonical_key("DOI:10.1000/XYZ") == "doi:10.1000/xyz"
+
+    # Case 2: The version of arXiv IDs is removed
+    assert canonicalize_identifier("arXiv:1312.6114v11") == (
+        "arxiv", "1312.6114"
+    )
+    assert get_canonical_key("hep-th/9901001v2") == "arxiv:hep-th/9901001"
+
+    # Case 3: ISBNs are converted to ISBN-13s without hyphens
+    assert get_canonical_key("0-8264-9752-7") == "isbn:9780826497529"
+    assert get_canonical_key("978-0-8264-9752-9") == "isbn:9780826497529"
+
+    # Case 4: ADS bibcodes and unknown identifiers are only pre-processed
+    assert get_canonical_key("2022A&A...666A...9G") == (
+        "ads:2022A&A...666A...9G"
+    )
+    assert canonicalize_identifier(" Doe_2020 ") == ("unknown", "Doe_2020")
+
+
 def test__postprocess_bibtex(monkeypatch: pytest.MonkeyPatch) -> None:
     """
     Test `postprocess_bibtex()`.
@@ -105,6 +141,140 @@ def test__postprocess_bibtex(monkeypatch: pytest.MonkeyPatch) -> None:
     )
 
 
+def test__compile_pipeline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `compile_pipeline()`.
+    """
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Case 1: Default configuration
+    names = [name for name, _ in compile_pipeline(config)]
+    assert names == [
+        "fix_broken_ampersand",
+        "fix_broken_pagenumbers",
+        "convert_latex_chars",
+        "fix_arxiv_entrytype",
+        "abbreviate_journal_name",
+        "generate_citekey",
+        "truncate_author_list",
+        "format_author_names",
+        "convert_month_to_number",
+        "resolve_adsurl",
+        "remove_fields",
+        "remove_url_if_doi",
+    ]
+
+    # Case 2: Disabled options are not part of the pipeline
+    config.convert_latex_chars = False
+    config.resolve_adsurl = False
+    config.remove_fields = {}
+    config.crossmatch_with_dblp = True
+    names = [name for name, _ in compile_pipeline(config)]
+    assert "convert_latex_chars" not in names
+    assert "resolve_adsurl" not in names
+    assert "remove_fields" not in names
+    assert names[-1] == "crossmatch_with_dblp"
+
+    # Case 3: The fields to remove are precomputed for every entry type
+    config.remove_fields = {"all": ["abstract"], "article": ["publisher"]}
+    steps = dict(compile_pipeline(config))
+    entry = {"ENTRYTYPE": "article", "abstract": "a", "publisher": "p"}
+    assert steps["remove_fields"](entry, "", config, None) == {
+        "ENTRYTYPE": "article"
+    }
+    entry = {"ENTRYTYPE": "book", "abstract": "a", "publisher": "p"}
+    assert steps["remove_fields"](entry, "", config, None) == {
+        "ENTRYTYPE": "book", "publisher": "p"
+    }
+
+
+def test__get_pipeline(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `get_pipeline()`.
+    """
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        other_config = Configuration()
+
+    # Case 1: The same options give the same (cached) pipeline
+    pipeline = get_pipeline(config)
+    assert get_pipeline(config) is pipeline
+    assert get_pipeline(other_config) is pipeline
+
+    # Case 2: Changing an option gives a new pipeline
+    config.remove_fields = {"all": ["abstract", "keywords"]}
+    assert get_pipeline(config) is not pipeline
+    config.limit_authors = 3
+    assert get_pipeline(config) is not get_pipeline(other_config)
+
+    # Case 3: Options that do not affect the pipeline are ignored
+    other_config.pygments_theme = "monokai"
+    assert get_pipeline(other_config) is pipeline
+
+    # Case 4: The number of cached pipelines is limited
+    for limit_authors in range(2 * MAX_PIPELINES):
+        config.limit_authors = limit_authors
+        get_pipeline(config)
+    assert len(_pipelines) <= MAX_PIPELINES
+
+
+def test__register_step(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `register_step()` and `unregister_step()`.
+    """
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        config.resolve_adsurl = False
+
+    def add_note(bibtex_dict: dict, identifier: str, _: Configuration) -> dict:
+        bibtex_dict["note"] = f"Resolved from {identifier}"
+        return bibtex_dict
+
+    def add_keywords(bibtex_dict: dict, *_: object) -> dict:
+        bibtex_dict["keywords"] = "ml"
+        return bibtex_dict
+
+    try:
+
+        # Case 1: Custom steps run after all other steps by default
+        register_step("add_note", add_note)
+        names = [name for name, _ in get_pipeline(config)]
+        assert names[-1] == "add_note"
+        bibtex_dict = postprocess_bibtex(
+            {"ENTRYTYPE": "misc", "author": "Jane Doe", "year": "2020"},
+            "some-identifier",
+            config,
+        )
+        assert bibtex_dict["note"] == "Resolved from some-identifier"
+
+        # Case 2: Custom steps can run before a built-in step
+        config.remove_fields = {"all": ["keywords"]}
+        register_step("add_keywords", add_keywords, before="remove_fields")
+        names = [name for name, _ in get_pipeline(config)]
+        assert names.index("add_keywords") + 1 == names.index("remove_fields")
+        bibtex_dict = postprocess_bibtex(
+            {"ENTRYTYPE": "misc", "author": "Jane Doe", "year": "2020"},
+            "some-identifier",
+            config,
+        )
+        assert "keywords" not in bibtex_dict
+
+    finally:
+        unregister_step("add_note")
+        unregister_step("add_keywords")
+
+    # Case 3: Unregistered steps are removed from the pipeline
+    names = [name for name, _ in get_pipeline(config)]
+    assert "add_note" not in names and "add_keywords" not in names
+
+
 def test__abbreviate_journal_name() -> None:
     """
     Test `abbreviate_journal_name()`.
@@ -0,0 +1,164 @@
+"""
+Unit tests for profiling.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from typing import Iterator
+
+import threading
+
+import pytest
+
+from doi2bibtex.config import Configuration
+from doi2bibtex.process import postprocess_bibtex
+from doi2bibtex.profiling import (
+    Profiler,
+    Span,
+    get_profiler,
+    span,
+    start_profiling,
+    stop_profiling,
+)
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+@pytest.fixture(autouse=True)
+def no_profiling() -> Iterator[None]:
+    """
+    Make sure that profiling is disabled after every test.
+    """
+
+    yield
+    stop_profiling()
+
+
+def test__profiler() -> None:
+    """
+    Test `Profiler`.
+    """
+
+    profiler = Profiler()
+    profiler.spans = [
+        Span("crossref", "http", 0.0, 0.5, 1),
+        Span("crossref", "http", 0.1, 1.5, 2),
+        Span("convert_latex_chars", "postprocess", 2.0, 0.25, 1),
+    ]
+
+    # Case 1: summary
+    summary = profiler.get_summary()
+    assert [_["name"] for _ in summary] == ["crossref", "convert_latex_chars"]
+    assert summary[0]["calls"] == 2
+    assert summary[0]["total"] == 2.0
+    assert summary[0]["mean"] == 1.0
+    assert summary[0]["max"] == 1.5
+
+    # Case 2: table
+    profiler.stop()
+    table = profiler.format_summary().split("\n")
+    assert table[0].startswith("Profile (wall time: ")
+    assert "peak memory" not in table[0]
+    assert table[2].split() == [
+        "http", "crossref", "2", "2.000", "1000.0", "1500.0"
+    ]
+
+    # Case 3: Chrome trace
+    events = profiler.to_chrome_trace()["traceEvents"]
+    assert len(events) == 3
+    assert events[1]["ph"] == "X"
+    assert events[1]["ts"] == 100_000
+    assert events[1]["dur"] == 1_500_000
+    assert events[1]["tid"] == 2
+
+    # Case 4: JSON timeline
+    timeline = profiler.to_timeline()
+    assert timeline["wall_time"] == profiler.wall_time
+    assert timeline["peak_memory"] is None
+    assert [_["start"] for _ in timeline["spans"]] == [0.0, 0.1, 2.0]
+
+    # Case 5: peak memory
+    profiler = Profiler(trace_memory=True)
+    data = [0] * 100_000
+    del data
+    profiler.stop()
+    assert profiler.peak_memory is not None
+    assert profiler.peak_memory > 100_000
+    assert "peak memory" in profiler.format_summary()
+
+
+def test__span() -> None:
+    """
+    Test `span()`, `start_profiling()` and `stop_profiling()`.
+    """
+
+    # Case 1: profiling is disabled
+    assert get_profiler() is None
+    with span("crossref", "http"):
+        pass
+    assert stop_profiling() is None
+
+    # Case 2: profiling is enabled (also for other threads)
+    def work() -> None:
+        with span("dblp", "http"):
+            pass
+
+    profiler = start_profiling()
+    assert get_profiler() is profiler
+    with span("resolve_identifier", "resolve"):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+        with span("crossref", "http"):
+            pass
+    assert stop_profiling() is profiler
+    assert get_profiler() is None
+    assert [_.name for _ in profiler.spans] == [
+        "dblp", "crossref", "resolve_identifier"
+    ]
+    assert profiler.spans[0].thread_id != threading.get_ident()
+    assert profiler.spans[1].thread_id == threading.get_ident()
+    assert profiler.spans[2].start <= profiler.spans[0].start
+    assert profiler.wall_time is not None
+
+    # Case 3: spans are recorded even if there is an exception
+    profiler = start_profiling()
+    with pytest.raises(RuntimeError):
+        with span("crossref", "http"):
+            raise RuntimeError("Some error")
+    assert len(profiler.spans) == 1
+
+
+def test__postprocess_bibtex_profiling(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that every step of `postprocess_bibtex()` is timed.
+    """
+
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        config.resolve_adsurl = False
+        config.crossmatch_with_dblp = False
+
+    bibtex_dict = {
+        "ENTRYTYPE": "article",
+        "ID": "Kingma_2013",
+        "author": "Kingma, Diederik P and Welling, Max",
+        "title": "Auto-Encoding Variational Bayes",
+        "year": "2013",
+    }
+
+    profiler = start_profiling()
+    postprocess_bibtex(bibtex_dict, "1312.6114", config)
+    stop_profiling()
+    names = [_.name for _ in profiler.spans]
+    assert "convert_latex_chars" in names
+    assert "generate_citekey" in names
+    assert {_.category for _ in profiler.spans} == {"postprocess"}
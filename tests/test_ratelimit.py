@@ -0,0 +1,159 @@
+"""
+Unit tests for ratelimit.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from email.utils import formatdate
+from typing import List
+
+import time
+
+import pytest
+
+from doi2bibtex.ratelimit import (
+    MAX_DELAY,
+    RateLimiter,
+    get_header,
+    get_retry_delay,
+    is_rate_limited,
+    parse_interval,
+    parse_retry_after,
+)
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """
+    Replace `time.monotonic()` with a clock that only moves manually.
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr("doi2bibtex.ratelimit.time.monotonic", lambda: now[0])
+
+    return now
+
+
+def test__get_header() -> None:
+    """
+    Test `get_header()`.
+    """
+
+    headers = {"Retry-After": "5", "x-ratelimit-remaining": "0"}
+    assert get_header(headers, "retry-after") == "5"
+    assert get_header(headers, "X-RateLimit-Remaining") == "0"
+    assert get_header(headers, "X-RateLimit-Reset") is None
+
+
+def test__parse_retry_after() -> None:
+    """
+    Test `parse_retry_after()`.
+    """
+
+    # Case 1: Number of seconds
+    assert parse_retry_after("5") == 5.0
+    assert parse_retry_after("-1") == 0.0
+
+    # Case 2: HTTP date
+    delay = parse_retry_after(formatdate(time.time() + 30, usegmt=True))
+    assert delay is not None and 25 < delay <= 30
+
+    # Case 3: Missing or invalid values
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test__parse_interval() -> None:
+    """
+    Test `parse_interval()`.
+    """
+
+    assert parse_interval("1s") == 1.0
+    assert parse_interval("500ms") == 0.5
+    assert parse_interval("2m") == 120.0
+    assert parse_interval("3") == 3.0
+    assert parse_interval("one second") is None
+    assert parse_interval(None) is None
+
+
+def test__is_rate_limited() -> None:
+    """
+    Test `is_rate_limited()`.
+    """
+
+    assert is_rate_limited(429, {})
+    assert is_rate_limited(503, {"Retry-After": "1"})
+    assert not is_rate_limited(503, {})
+    assert not is_rate_limited(200, {"Retry-After": "1"})
+
+
+def test__get_retry_delay() -> None:
+    """
+    Test `get_retry_delay()`.
+    """
+
+    # Case 1: Use the `Retry-After` of the server (plus jitter)
+    for _ in range(10):
+        assert 10 <= get_retry_delay({"Retry-After": "10"}, 0) <= 12.5
+
+    # Case 2: Exponential backoff
+    for _ in range(10):
+        assert 1 <= get_retry_delay({}, 0) <= 1.25
+        assert 4 <= get_retry_delay({}, 2) <= 5
+
+    # Case 3: Delays are limited
+    assert get_retry_delay({"Retry-After": "86400"}, 0) <= 1.25 * MAX_DELAY
+
+
+def test__rate_limiter(clock: List[float]) -> None:
+    """
+    Test `RateLimiter`.
+    """
+
+    rate_limiter = RateLimiter()
+
+    # Case 1: Hosts without a rate limit are not limited
+    assert [rate_limiter.reserve("a.org") for _ in range(5)] == [0.0] * 5
+
+    # Case 2: Bursts of up to `rate` requests, then one every 1 / rate
+    delays = [rate_limiter.reserve("b.org", rate=2) for _ in range(5)]
+    assert delays == [0.0, 0.0, 0.5, 1.0, 1.5]
+
+    # Case 3: The tokens are refilled over time
+    clock[0] += 10
+    delays = [rate_limiter.reserve("b.org", rate=2) for _ in range(3)]
+    assert delays == [0.0, 0.0, 0.5]
+
+    # Case 4: Blocked hosts wait, and the bucket starts empty afterwards
+    clock[0] += 10
+    rate_limiter.block("b.org", 5.0)
+    delays = [rate_limiter.reserve("b.org", rate=2) for _ in range(2)]
+    assert delays == [5.0, 5.5]
+    rate_limiter.block("a.org", 3.0)
+    assert rate_limiter.reserve("a.org") == 3.0
+
+    # Case 5: Crossref announces a lower rate limit
+    rate_limiter.update(
+        "c.org",
+        {"X-Rate-Limit-Limit": "1", "X-Rate-Limit-Interval": "1s"},
+    )
+    delays = [rate_limiter.reserve("c.org", rate=10) for _ in range(3)]
+    assert delays == [0.0, 1.0, 2.0]
+
+    # Case 6: ADS has no requests left until the limit is reset
+    rate_limiter.update(
+        "d.org",
+        {
+            "X-RateLimit-Remaining": "0",
+            "X-RateLimit-Reset": str(time.time() + 86400),
+        },
+    )
+    assert rate_limiter.reserve("d.org") == MAX_DELAY
+    rate_limiter.update("e.org", {"X-RateLimit-Remaining": "10"})
+    assert rate_limiter.reserve("e.org") == 0.0
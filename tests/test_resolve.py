@@ -6,23 +6,85 @@ Unit tests for resolve.py.
 # IMPORTS
 # -----------------------------------------------------------------------------
 
+from copy import copy
 from pathlib import Path
+from threading import Thread
 from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from deepdiff import DeepDiff
 
+import asyncio
+import json
+import time
+
 import pytest
 
 from doi2bibtex.ads import get_ads_token
 from doi2bibtex.config import Configuration
+from doi2bibtex.network import ResolveError, Response
+from doi2bibtex.process import apply_steps, get_pipeline
 from doi2bibtex.resolve import (
+    fetch_from_backend,
+    get_flight_key,
+    make_result,
+    merge_enrichment,
     resolve_ads_bibcode,
+    resolve_ads_bibcodes,
     resolve_arxiv_id,
+    resolve_arxiv_id_with_backend,
     resolve_doi,
+    resolve_doi_with_backend,
     resolve_identifier,
+    resolve_identifier_async,
+    resolve_identifiers,
+    resolve_isbn_with_backend,
+    resolve_isbns_with_backend,
+    resolve_many_async,
+    resolve_stream,
 )
 
 
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+def fake_backend(method: str, url: str) -> Tuple[int, str]:
+    """
+    Return recorded (status code, text) responses for a few requests,
+    so that we can test the resolution without network access.
+    """
+
+    if url.startswith("https://arxiv2bibtex.org/?q=2204.03439"):
+        return 200, (
+            '<div id="biblatex"><textarea class="wikiinfo">'
+            "@online{2204.03439,\n"
+            "Author = {Timothy D. Gebhard and Markus J. Bonse},\n"
+            "Title = {Physically constrained causal noise models},\n"
+            "Year = {2022},\n"
+            "Eprint = {2204.03439},\n"
+            "Eprinttype = {arXiv},\n"
+            "Doi = {10.1051/0004-6361/202142529},\n"
+            "}</textarea></div>"
+        )
+    if url.startswith("https://api.crossref.org/works/10.1051"):
+        return 200, (
+            "@article{Gebhard_2022, "
+            "title={Physically constrained causal noise models}, "
+            "volume={666}, "
+            "DOI={10.1051/0004-6361/202142529}, "
+            "journal={Astronomy {\\&}amp$\\mathsemicolon$ Astrophysics}, "
+            "publisher={{EDP} Sciences}, "
+            "author={Gebhard, Timothy D. and Bonse, Markus J. and "
+            "Quanz, Sascha P. and Sch{\\\"o}lkopf, Bernhard}, "
+            "year={2022}, month=oct, pages={A9} }"
+        )
+    if url.startswith("https://dblp.org/search/publ/api"):
+        return 200, json.dumps({"result": {"hits": {"@total": "0"}}})
+
+    return 404, ""
+
+
 # -----------------------------------------------------------------------------
 # UNIT TESTS
 # -----------------------------------------------------------------------------
@@ -49,6 +111,59 @@ def test__resolve_ads_bibcode() -> None:
     assert bibtex_dict["doi"] == "10.1051/0004-6361/202142529"
 
 
+def test__resolve_ads_bibcodes(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `resolve_ads_bibcodes()`.
+    """
+
+    # Simulate the ADS export API (which uses the bibcodes as citekeys)
+    requested = []
+
+    def fake_post(*_: Any, **kwargs: Any) -> Response:
+        bibcodes = json.loads(kwargs["data"])["bibcode"]
+        requested.append(bibcodes)
+        export = "\n\n".join(
+            f"@ARTICLE{{{_},\n  title = {{Title of {_}}},\n}}"
+            for _ in bibcodes
+            if _ != "2000Missing..1....1X"
+        )
+        return Response(status_code=200, text=json.dumps({"export": export}))
+
+    monkeypatch.setenv("ADS_TOKEN", "some-token")
+    monkeypatch.setattr("doi2bibtex.network.post", fake_post)
+
+    # Case 1: Bibcodes are split into chunks, duplicates are only sent once
+    bibcodes = [
+        "2022A&A...666A...9G",
+        "2010ApJ...721L..67R",
+        "2000Missing..1....1X",
+        "2022A&A...666A...9G",
+        "1992ApJ...400L...1W",
+    ]
+    results = resolve_ads_bibcodes(bibcodes, chunk_size=2)
+    assert requested == [
+        ["2022A&A...666A...9G", "2010ApJ...721L..67R"],
+        ["2000Missing..1....1X", "1992ApJ...400L...1W"],
+    ]
+    assert sorted(results.keys()) == [
+        "1992ApJ...400L...1W",
+        "2010ApJ...721L..67R",
+        "2022A&A...666A...9G",
+    ]
+    assert results["2010ApJ...721L..67R"]["title"] == (
+        "Title of 2010ApJ...721L..67R"
+    )
+
+    # Case 2: Failed request
+    monkeypatch.setattr(
+        "doi2bibtex.network.post",
+        lambda *_, **__: Response(status_code=429, text=""),
+    )
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_ads_bibcodes(bibcodes)
+    assert "Error 429 resolving 4 ADS bibcodes" in str(runtime_error)
+
+
 def test__resolve_arxiv_id(monkeypatch: pytest.MonkeyPatch) -> None:
     """
     Test `resolve_arxiv_id()`.
@@ -56,7 +171,10 @@ def test__resolve_arxiv_id(monkeypatch: pytest.MonkeyPatch) -> None:
 
     # Case 1: Simulate failed request
     with monkeypatch.context() as m:
-        m.setattr("requests.get", lambda _: SimpleNamespace(status_code=404))
+        m.setattr(
+            "doi2bibtex.network.get",
+            lambda *_, **__: Response(status_code=404, text=""),
+        )
         with pytest.raises(RuntimeError) as runtime_error:
             resolve_arxiv_id("1312.6114")
         assert "Error 404 resolving" in str(runtime_error)
@@ -88,7 +206,10 @@ def test__resolve_doi(monkeypatch: pytest.MonkeyPatch) -> None:
 
     # Case 1: Simulate failed request
     with monkeypatch.context() as m:
-        m.setattr("requests.get", lambda _: SimpleNamespace(status_code=404))
+        m.setattr(
+            "doi2bibtex.network.get",
+            lambda *_, **__: Response(status_code=404, text=""),
+        )
         with pytest.raises(RuntimeError) as runtime_error:
             resolve_doi("10.1088/1742-6596/898/7/072029")
         assert "Error 404 resolving" in str(runtime_error)
@@ -121,6 +242,286 @@ def test__resolve_doi(monkeypatch: pytest.MonkeyPatch) -> None:
     )
 
 
+def test__resolve_doi_with_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `resolve_doi_with_backend()`.
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_doi",
+        lambda doi, config: {"backend": "crossref-bibtex"},
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_doi_with_crossref_json",
+        lambda doi, config: {"backend": "crossref-json"},
+    )
+
+    # Case 1: Default backend
+    assert resolve_doi_with_backend("10.1000/xyz", config) == {
+        "backend": "crossref-bibtex"
+    }
+
+    # Case 2: JSON backend
+    config.doi_backend = "crossref-json"
+    assert resolve_doi_with_backend("10.1000/xyz", config) == {
+        "backend": "crossref-json"
+    }
+
+    # Case 3: Unknown backend
+    config.doi_backend = "unknown"
+    with pytest.raises(ValueError) as value_error:
+        resolve_doi_with_backend("10.1000/xyz", config)
+    assert 'Unknown DOI backend: "unknown"' in str(value_error)
+
+
+def test__resolve_arxiv_id_with_backend(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test `resolve_arxiv_id_with_backend()`.
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_arxiv_id",
+        lambda arxiv_id, config: {"backend": "arxiv2bibtex"},
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_arxiv_id_with_arxiv_api",
+        lambda arxiv_id, config: {"backend": "arxiv-api"},
+    )
+
+    # Case 1: Default backend
+    assert resolve_arxiv_id_with_backend("2102.12345", config) == {
+        "backend": "arxiv2bibtex"
+    }
+
+    # Case 2: arXiv API backend
+    config.arxiv_backend = "arxiv-api"
+    assert resolve_arxiv_id_with_backend("2102.12345", config) == {
+        "backend": "arxiv-api"
+    }
+
+    # Case 3: Unknown backend
+    config.arxiv_backend = "unknown"
+    with pytest.raises(ValueError) as value_error:
+        resolve_arxiv_id_with_backend("2102.12345", config)
+    assert 'Unknown arXiv backend: "unknown"' in str(value_error)
+
+
+def test__resolve_isbn_with_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `resolve_isbn_with_backend()` and `resolve_isbns_with_backend()`.
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Google Books only knows about ISBNs starting with "978", Open Library
+    # about all of them
+    def fake_google_books(isbn: str, config: Configuration) -> dict:
+        if not isbn.startswith("978"):
+            raise RuntimeError(f'Error resolving "{isbn}"')
+        return {"backend": "google-books"}
+
+    requested: Dict[str, List[str]] = {}
+
+    def fake_bulk(backend: str) -> Any:
+        def resolve(isbns: List[str], config: Configuration) -> dict:
+            requested[backend] = isbns
+            return {
+                _: {"backend": backend}
+                for _ in isbns
+                if backend == "open-library" or _.startswith("978")
+            }
+        return resolve
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_isbn_with_google_api", fake_google_books
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_isbn_with_open_library",
+        lambda isbn, config: {"backend": "open-library"},
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_isbns_with_google_api",
+        fake_bulk("google-books"),
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_isbns_with_open_library",
+        fake_bulk("open-library"),
+    )
+
+    # Case 1: Default backend (without a fallback)
+    assert resolve_isbn_with_backend("9780691248493", config) == {
+        "backend": "google-books"
+    }
+    with pytest.raises(RuntimeError) as runtime_error:
+        resolve_isbn_with_backend("0691248494", config)
+    assert 'Error resolving "0691248494"' in str(runtime_error)
+
+    # Case 2: Open Library as a fallback
+    config.isbn_backends = ["google-books", "open-library"]
+    assert resolve_isbn_with_backend("0691248494", config) == {
+        "backend": "open-library"
+    }
+
+    # Case 3: The fallback is only asked for the missing ISBNs
+    isbns = ["9780691248493", "0691248494"]
+    assert resolve_isbns_with_backend(isbns, config) == {
+        "9780691248493": {"backend": "google-books"},
+        "0691248494": {"backend": "open-library"},
+    }
+    assert requested["open-library"] == ["0691248494"]
+
+    # Case 4: Unknown backends (even after a valid one) and no backends
+    # give the same error for a single ISBN and for multiple ISBNs
+    for isbn_backends, message in (
+        (["google-books", "unknown"], 'Unknown ISBN backend: "unknown"'),
+        ([], "No ISBN backend selected!"),
+    ):
+        config.isbn_backends = isbn_backends
+        with pytest.raises(ValueError) as value_error:
+            resolve_isbn_with_backend("9780691248493", config)
+        assert message in str(value_error)
+        with pytest.raises(ValueError) as value_error:
+            resolve_isbns_with_backend(isbns, config)
+        assert message in str(value_error)
+
+    # Case 5: If a request of a backend fails, the next one is asked; other
+    # errors are not hidden
+    def failing_bulk(error: Exception) -> Any:
+        def resolve(isbns: List[str], config: Configuration) -> dict:
+            raise error
+        return resolve
+
+    config.isbn_backends = ["google-books", "open-library"]
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_isbns_with_google_api",
+        failing_bulk(ResolveError("Error 503", 503)),
+    )
+    assert resolve_isbns_with_backend(isbns, config) == {
+        "9780691248493": {"backend": "open-library"},
+        "0691248494": {"backend": "open-library"},
+    }
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_isbns_with_google_api",
+        failing_bulk(KeyError("last")),
+    )
+    with pytest.raises(KeyError):
+        resolve_isbns_with_backend(isbns, config)
+
+
+def test__fetch_from_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `fetch_from_backend()` (in particular, remembering failures).
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        config.resolve_adsurl = False
+        config.max_retries = 0
+
+    # Count the requests to a fake backend that knows no DOIs
+    urls = []
+
+    def fake_request(_: Any, method: str, url: str, **__: Any) -> Any:
+        urls.append(url)
+        status_code = 503 if "unavailable" in url else 404
+        return SimpleNamespace(status_code=status_code, text="", headers={})
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+
+    # Case 1: Permanent failures are answered from the cache (also for
+    # different ways of writing the same DOI)
+    error = resolve_identifier("10.1000/does-not-exist", config)
+    assert 'Error 404 resolving DOI "10.1000/does-not-exist"' in error
+    assert len(urls) == 1
+    assert resolve_identifier("doi:10.1000/DOES-NOT-EXIST", config) == (
+        error.rstrip("\n") + " (cached)\n"
+    )
+    assert len(urls) == 1
+
+    # Case 2: Transient failures are not remembered (by default)
+    for _ in range(2):
+        with pytest.raises(RuntimeError) as runtime_error:
+            fetch_from_backend("doi", "10.1000/unavailable", config)
+        assert "Error 503" in str(runtime_error.value)
+    assert len(urls) == 3
+
+    # Case 3: Nothing is remembered if the cache is disabled
+    config.use_cache = False
+    resolve_identifier("10.1000/does-not-exist", config)
+    assert len(urls) == 4
+
+    # Case 4: Unrecognized identifiers
+    with pytest.raises(RuntimeError) as runtime_error:
+        fetch_from_backend("unknown", "invalid", config)
+    assert "Unrecognized identifier: invalid" in str(runtime_error.value)
+
+
+def test__get_flight_key(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `get_flight_key()` (and that concurrent fetches with different
+    copies of the configuration share a single request).
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Case 1: Copies of the config and other ways of writing the identifier
+    # have the same key, other backends do not
+    other_config = copy(config)
+    other_config.limit_authors = 3
+    key = get_flight_key("10.1000/xyz", config)
+    assert get_flight_key("doi:10.1000/XYZ", other_config) == key
+    other_config.doi_backend = "crossref-json"
+    assert get_flight_key("10.1000/xyz", other_config) != key
+
+    # Case 2: Concurrent fetches with copies of the config are coalesced
+    requested = []
+
+    def fake_resolve_doi_with_backend(doi: str, config: Configuration) -> dict:
+        requested.append(doi)
+        time.sleep(0.2)
+        return {"ENTRYTYPE": "article", "ID": doi}
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_doi_with_backend",
+        fake_resolve_doi_with_backend,
+    )
+    results: List[dict] = []
+    threads = [
+        Thread(
+            target=lambda: results.append(
+                fetch_from_backend("doi", "10.1000/xyz", copy(config))
+            )
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert requested == ["10.1000/xyz"]
+    assert len(results) == 3
+
+
 def test__resolve_identifier(monkeypatch: pytest.MonkeyPatch) -> None:
     """
     Test `resolve_identifier()`.
@@ -212,3 +613,394 @@ def test__resolve_identifier(monkeypatch: pytest.MonkeyPatch) -> None:
     # Case 6: Failure due to invalid identifier
     result = resolve_identifier("this-is-not-a-valid-identifier", config)
     assert "Unrecognized identifier" in result
+
+
+def test__resolve_identifier_enrichment(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """
+    Test that `resolve_identifier()` looks up the `adsurl` and runs the
+    cross-match with dblp at the same time as the other requests, and
+    that the entry is post-processed in a single pass.
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        config.resolve_adsurl = True
+
+    # Every (fake) backend takes some time to respond
+    delay = 0.3
+    calls: Dict[str, str] = {}
+
+    def fake_resolve_arxiv_id(arxiv_id: str, *_: Any) -> dict:
+        time.sleep(delay)
+        return {
+            "ENTRYTYPE": "misc",
+            "ID": "arXiv",
+            "author": "Jane Doe",
+            "title": "Some Title",
+            "year": "2022",
+            "doi": "10.1000/xyz",
+        }
+
+    def fake_resolve_doi(doi: str, *_: Any) -> dict:
+        time.sleep(delay)
+        return {
+            "ENTRYTYPE": "article",
+            "ID": "doi",
+            "author": "Jane Doe",
+            "title": "Some Title",
+            "year": "2022",
+            "doi": doi,
+        }
+
+    def fake_get_ads_bibcode(identifier: str, *_: Any) -> str:
+        calls["ads"] = identifier
+        time.sleep(delay)
+        return "2022A&A...666A...9G"
+
+    def fake_crossmatch_with_dblp(bibtex_dict: dict, *_: Any) -> dict:
+        calls["dblp"] = bibtex_dict["author"]
+        time.sleep(delay)
+        bibtex_dict["addendum"] = "Published at ICML~2022."
+        return bibtex_dict
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_arxiv_id_with_backend",
+        fake_resolve_arxiv_id,
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_doi_with_backend", fake_resolve_doi
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.get_ads_bibcode_for_identifier",
+        fake_get_ads_bibcode,
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.crossmatch_with_dblp", fake_crossmatch_with_dblp
+    )
+
+    # Keep track of the post-processing steps that are applied
+    applied: List[str] = []
+
+    def recording_apply_steps(steps: List[Any], *args: Any) -> dict:
+        applied.extend(name for name, _ in steps)
+        return apply_steps(steps, *args)
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.apply_steps", recording_apply_steps
+    )
+
+    # Case 1: Default configuration (without dblp): the ADS lookup runs at
+    # the same time as Crossref, also for an arXiv ID that is updated to
+    # the DOI (after the arXiv response)
+    start = time.monotonic()
+    result = resolve_identifier("10.1000/xyz", config)
+    assert time.monotonic() - start < 1.8 * delay
+    assert calls == {"ads": "10.1000/xyz"}
+    assert "adsurl        = {https://adsabs.harvard.edu/abs/2022A" in result
+    assert applied == [name for name, _ in get_pipeline(config)]
+    calls.clear()
+    start = time.monotonic()
+    result = resolve_identifier("arXiv:2204.03439", config)
+    assert time.monotonic() - start < 2.8 * delay
+    assert calls == {"ads": "10.1000/xyz"}
+    assert result.startswith("@article{Doe_2022,")
+
+    # Case 2: With dblp, which runs at the same time as the ADS lookup, on
+    # the post-processed entry; every step is still only applied once
+    config.crossmatch_with_dblp = True
+    calls.clear()
+    applied.clear()
+    start = time.monotonic()
+    result = resolve_identifier("10.1000/xyz", config)
+    assert time.monotonic() - start < 2.5 * delay
+    assert calls == {"ads": "10.1000/xyz", "dblp": "{Doe}, Jane"}
+    assert "adsurl        = {https://adsabs.harvard.edu/abs/2022A" in result
+    assert "addendum      = {Published at ICML~2022.}" in result
+    assert applied == [
+        name for name, _ in get_pipeline(config)
+        if name != "crossmatch_with_dblp"
+    ]
+
+    # Case 3: The fields from dblp are added after `remove_fields` (like
+    # in the pipeline), so they are not removed
+    config.remove_fields = {"all": ["addendum"]}
+    result = resolve_identifier("arXiv:2204.03439", config)
+    assert result.startswith("@article{Doe_2022,")
+    assert "adsurl" in result and "addendum" in result
+
+
+def test__merge_enrichment() -> None:
+    """
+    Test `merge_enrichment()`.
+    """
+
+    before = {"ID": "a", "title": "T", "addendum": "Old."}
+    after = {"ID": "a", "title": "T", "addendum": "Old. New.", "note": "n"}
+    bibtex_dict = {"ID": "a", "title": "T", "adsurl": "u", "addendum": "Old."}
+    assert merge_enrichment(bibtex_dict, before, after) == {
+        "ID": "a",
+        "title": "T",
+        "adsurl": "u",
+        "addendum": "Old. New.",
+        "note": "n",
+    }
+
+
+def test__resolve_identifiers(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `resolve_identifiers()`.
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        config.resolve_adsurl = False
+
+    # Fake fetching entries (all identifiers starting with "x" fail, and
+    # the arXiv ID "2101.00002" is updated to the DOI "10.1000/abc")
+    fetched = []
+    finalized = []
+
+    def fake_fetch_bibtex_dict(
+        identifier: str,
+        config: Configuration,
+        prefetched: Dict[str, dict],
+    ) -> Tuple[str, dict]:
+        fetched.append(identifier)
+        identifier = identifier.strip()
+        if identifier.startswith("x"):
+            raise RuntimeError(f"Unrecognized identifier: {identifier}")
+        if identifier == "2101.00002":
+            identifier = "10.1000/abc"
+        return identifier, prefetched.get(identifier, {"ID": identifier})
+
+    def fake_finalize_bibtex_dict(
+        bibtex_dict: dict,
+        identifier: str,
+        config: Configuration,
+        ads_bibcode: Optional[str],
+    ) -> str:
+        finalized.append(identifier)
+        return f"@misc{{{bibtex_dict['ID']},{ads_bibcode}}}"
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.fetch_bibtex_dict", fake_fetch_bibtex_dict
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.finalize_bibtex_dict", fake_finalize_bibtex_dict
+    )
+
+    # Case 1: Results are returned in the order of the input
+    identifiers = [str(i) for i in range(20)]
+    assert resolve_identifiers(identifiers, config, n_jobs=4) == [
+        f"@misc{{{i},None}}" for i in range(20)
+    ]
+
+    # Case 2: Empty input
+    assert resolve_identifiers([], config, n_jobs=4) == []
+
+    # Case 3: Failures are returned as error messages
+    assert resolve_identifiers(["1", "x"], config) == [
+        "@misc{1,None}",
+        "\n  There was an error:\n  Unrecognized identifier: x\n",
+    ]
+
+    # Case 4: ADS bibcodes are fetched in bulk and passed on
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_ads_bibcodes",
+        lambda bibcodes, config: {_: {"ID": f"ads-{_}"} for _ in bibcodes},
+    )
+    assert resolve_identifiers(
+        ["2022A&A...666A...9G", "1312.6114", " 2010ApJ...721L..67R"], config
+    ) == [
+        "@misc{ads-2022A&A...666A...9G,None}",
+        "@misc{1312.6114,None}",
+        "@misc{ads-2010ApJ...721L..67R,None}",
+    ]
+
+    # Case 5: Bibcodes for the `adsurl` are looked up in bulk
+    config.resolve_adsurl = True
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.get_ads_bibcodes_for_identifiers",
+        lambda identifiers, config: {_: f"bib-{_}" for _ in identifiers},
+    )
+    assert resolve_identifiers(["1", "2", "x"], config) == [
+        "@misc{1,bib-1}",
+        "@misc{2,bib-2}",
+        "\n  There was an error:\n  Unrecognized identifier: x\n",
+    ]
+
+    # Case 6: Duplicates (in different ways of writing them) are resolved
+    # only once, and get the same result
+    config.resolve_adsurl = False
+    fetched.clear()
+    assert resolve_identifiers(
+        ["10.1000/XYZ", "2101.00001v2", "doi:10.1000/xyz", "2101.00001"],
+        config,
+    ) == 2 * ["@misc{10.1000/XYZ,None}", "@misc{2101.00001v2,None}"]
+    assert fetched == ["10.1000/XYZ", "2101.00001v2"]
+
+    # Case 7: An arXiv ID that is updated to a DOI which is also given is
+    # only post-processed once
+    finalized.clear()
+    assert resolve_identifiers(["2101.00002", "10.1000/abc"], config) == (
+        2 * ["@misc{10.1000/abc,None}"]
+    )
+    assert finalized == ["10.1000/abc"]
+
+    # Case 8: If a bulk request fails, the identifiers are resolved one by
+    # one; other errors (i.e., bugs) are not hidden
+    def failing_resolve_ads_bibcodes(error: Exception) -> Any:
+        def resolve(bibcodes: List[str], config: Configuration) -> dict:
+            raise error
+        return resolve
+
+    bibcodes = ["2022A&A...666A...9G", "2010ApJ...721L..67R"]
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_ads_bibcodes",
+        failing_resolve_ads_bibcodes(ResolveError("Error 503", 503)),
+    )
+    assert resolve_identifiers(bibcodes, config) == [
+        f"@misc{{{_},None}}" for _ in bibcodes
+    ]
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_ads_bibcodes",
+        failing_resolve_ads_bibcodes(IndexError("list index out of range")),
+    )
+    with pytest.raises(IndexError):
+        resolve_identifiers(bibcodes, config)
+
+
+def test__resolve_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `resolve_stream()`.
+    """
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Fake resolving identifiers (identifiers starting with "slow" take a
+    # bit longer, so that they are finished after the other ones)
+    def fake_resolve_identifier(identifier: str, config: Configuration) -> str:
+        if identifier.startswith("slow"):
+            time.sleep(0.2)
+        return f"@misc{{{identifier}}}"
+
+    monkeypatch.setattr(
+        "doi2bibtex.resolve.resolve_identifier", fake_resolve_identifier
+    )
+
+    # Keep track of how many identifiers have been consumed from the input
+    n_consumed = 0
+
+    def identifiers(n: int) -> Iterator[str]:
+        nonlocal n_consumed
+        for i in range(n):
+            n_consumed += 1
+            yield "slow" if i == 0 else str(i)
+
+    # Case 1: Ordered output; the input is consumed lazily
+    n_yielded = 0
+    results = []
+    for identifier, result in resolve_stream(
+        identifiers(50), config, n_jobs=2, window=4
+    ):
+        n_yielded += 1
+        assert n_consumed - n_yielded <= 4
+        results.append((identifier, result))
+    assert [_[0] for _ in results] == ["slow"] + [str(i) for i in range(1, 50)]
+    assert results[0][1] == "@misc{slow}"
+
+    # Case 2: Unordered output
+    n_consumed = 0
+    results = list(
+        resolve_stream(identifiers(6), config, n_jobs=2, ordered=False)
+    )
+    assert [_[0] for _ in results][-1] == "slow"
+    assert sorted(_[0] for _ in results) == ["1", "2", "3", "4", "5", "slow"]
+
+    # Case 3: Empty input
+    assert list(resolve_stream([], config)) == []
+
+    # Case 4: Slow input; finished results are yielded right away, and are
+    # not held back until the window is full
+    events = []
+
+    def slow_identifiers() -> Iterator[str]:
+        for identifier in ("a", "b", "c"):
+            events.append(f"next:{identifier}")
+            yield identifier
+            time.sleep(0.1)
+
+    for identifier, _ in resolve_stream(slow_identifiers(), config, window=10):
+        events.append(f"result:{identifier}")
+    assert events.index("result:a") < events.index("next:c")
+
+
+def test__make_result() -> None:
+    """
+    Test `make_result()`.
+    """
+
+    assert make_result("a", "@article{a}") == {
+        "identifier": "a",
+        "bibtex": "@article{a}",
+    }
+    assert make_result("b", "\n  There was an error:\n  Oops\n") == {
+        "identifier": "b",
+        "error": "Oops",
+    }
+
+
+def test__resolve_identifier_async(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `resolve_identifier_async()` and `resolve_many_async()`.
+    """
+
+    httpx = pytest.importorskip("httpx")
+
+    # Set up a modified default config object (prevent loading from file)
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+        config.resolve_adsurl = False
+        config.crossmatch_with_dblp = True
+        config.use_cache = False
+
+    # Use the same recorded responses for the sync and the async version
+    def fake_request(_: Any, method: str, url: str, **__: Any) -> Any:
+        status_code, text = fake_backend(method, url)
+        return SimpleNamespace(status_code=status_code, text=text, headers={})
+
+    def handler(request: Any) -> Any:
+        status_code, text = fake_backend(request.method, str(request.url))
+        return httpx.Response(status_code, text=text)
+
+    monkeypatch.setattr("requests.Session.request", fake_request)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    # Case 1: arXiv ID that is updated to the DOI (including dblp)
+    expected = resolve_identifier("2204.03439", config)
+    assert expected.startswith("@article{Gebhard_2022,")
+    assert asyncio.run(
+        resolve_identifier_async("2204.03439", config, client)
+    ) == expected
+
+    # Case 2: Failures produce the same error message
+    assert asyncio.run(
+        resolve_identifier_async("10.1000/does-not-exist", config, client)
+    ) == resolve_identifier("10.1000/does-not-exist", config)
+
+    # Case 3: Resolve many identifiers (order is preserved)
+    identifiers = ["2204.03439", "invalid", "10.1051/0004-6361/202142529"]
+    results = asyncio.run(
+        resolve_many_async(identifiers, config, client, max_concurrency=2)
+    )
+    assert results == [resolve_identifier(_, config) for _ in identifiers]
@@ -0,0 +1,222 @@
+"""
+Unit tests for server.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from pathlib import Path
+from threading import Thread
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from doi2bibtex.config import Configuration
+from doi2bibtex.server import ResolveServer, make_request_config
+
+
+# -----------------------------------------------------------------------------
+# FIXTURES
+# -----------------------------------------------------------------------------
+
+@pytest.fixture
+def server(monkeypatch: pytest.MonkeyPatch) -> Iterator[ResolveServer]:
+    """
+    Run a `ResolveServer` (with fake resolver functions) in a thread.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    def fake_resolve_identifier(identifier: str, config: Configuration) -> str:
+        if identifier == "bad":
+            return "\n  There was an error:\n  Unrecognized identifier: bad\n"
+        return f"@article{{{identifier}, limit = {config.limit_authors}}}"
+
+    def fake_resolve_identifiers(
+        identifiers: List[str],
+        config: Configuration,
+        n_jobs: int = 1,
+    ) -> List[str]:
+        return [fake_resolve_identifier(_, config) for _ in identifiers]
+
+    monkeypatch.setattr(
+        "doi2bibtex.server.resolve_identifier", fake_resolve_identifier
+    )
+    monkeypatch.setattr(
+        "doi2bibtex.server.resolve_identifiers", fake_resolve_identifiers
+    )
+
+    server = ResolveServer(("127.0.0.1", 0), config)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def send(
+    server: ResolveServer,
+    path: str,
+    content: Optional[Any] = None,
+) -> Tuple[int, Any]:
+    """
+    Send a GET request (or a POST request, if `content` is given) to
+    the `server` and return the status code and the JSON response.
+    """
+
+    host, port = server.server_address[:2]
+    request = urllib.request.Request(
+        url=f"http://{host!s}:{port}{path}",
+        data=None if content is None else json.dumps(content).encode(),
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__make_request_config(monkeypatch: pytest.MonkeyPatch) -> None:
+    """
+    Test `make_request_config()`.
+    """
+
+    # Load default configuration
+    with monkeypatch.context() as m:
+        m.setattr(Path, "exists", lambda _: False)
+        config = Configuration()
+
+    # Case 1: Valid overrides do not modify the original configuration
+    request_config = make_request_config(
+        config, {"limit_authors": 3, "generate_citekey": False}
+    )
+    assert request_config.limit_authors == 3
+    assert not request_config.generate_citekey
+    assert config.limit_authors == 1000
+    assert config.generate_citekey
+
+    # Case 2: Unknown key
+    with pytest.raises(ValueError) as value_error:
+        make_request_config(config, {"foo": 1})
+    assert 'Unknown configuration key "foo"' in str(value_error)
+
+    # Case 3: Values of the wrong type
+    invalid_overrides: List[Dict[str, Any]] = [
+        {"limit_authors": "3"},
+        {"limit_authors": True},
+        {"generate_citekey": 1},
+        {"remove_fields": []},
+    ]
+    for overrides in invalid_overrides:
+        with pytest.raises(ValueError) as value_error:
+            make_request_config(config, overrides)
+        assert "Invalid value" in str(value_error)
+
+    # Case 4: Overrides are not a dict
+    with pytest.raises(ValueError):
+        make_request_config(config, [])  # type: ignore
+
+    # Case 5: Options that must not be overridden per request
+    for key in ("proxies", "use_cache", "rate_limits", "doi_backend"):
+        with pytest.raises(ValueError) as value_error:
+            make_request_config(config, {key: getattr(config, key)})
+        assert "cannot be overridden per request" in str(value_error)
+
+
+def test__resolve_server(server: ResolveServer) -> None:
+    """
+    Test the endpoints of `ResolveServer`.
+    """
+
+    # Case 1: Health check
+    status, content = send(server, "/health")
+    assert status == 200
+    assert content["status"] == "ok"
+
+    # Case 2: Resolve a single identifier (GET and POST, with overrides)
+    status, content = send(server, "/resolve?identifier=a")
+    assert status == 200
+    assert content == {
+        "identifier": "a",
+        "bibtex": "@article{a, limit = 1000}",
+    }
+    status, content = send(
+        server,
+        "/resolve",
+        {"identifier": "a", "config": {"limit_authors": 3}},
+    )
+    assert status == 200
+    assert content["bibtex"] == "@article{a, limit = 3}"
+
+    # Case 3: Identifier that cannot be resolved
+    status, content = send(server, "/resolve", {"identifier": "bad"})
+    assert status == 422
+    assert content["error"] == "Unrecognized identifier: bad"
+
+    # Case 4: Batch mode
+    status, content = send(server, "/batch", {"identifiers": ["a", "bad"]})
+    assert status == 200
+    assert content == {
+        "results": [
+            {"identifier": "a", "bibtex": "@article{a, limit = 1000}"},
+            {"identifier": "bad", "error": "Unrecognized identifier: bad"},
+        ]
+    }
+
+    # Case 5: Invalid requests
+    assert send(server, "/resolve")[0] == 400
+    assert send(server, "/resolve", {})[0] == 400
+    assert send(server, "/resolve", {"identifier": "a", "config": 1})[0] == 400
+    assert send(server, "/batch", {"identifiers": "a"})[0] == 400
+    assert send(server, "/batch", ["a"])[0] == 400
+    assert send(server, "/unknown")[0] == 404
+    assert send(server, "/unknown", {})[0] == 404
+    assert send(
+        server, "/batch", {"identifiers": ["a"], "config": {"proxies": {}}}
+    )[0] == 400
+    invalid_jobs: List[Any] = [None, [], {}, "many"]
+    for jobs in invalid_jobs:
+        content = {"identifiers": ["a"], "jobs": jobs}
+        assert send(server, "/batch", content)[0] == 400
+
+
+def test__resolve_server_max_jobs(
+    monkeypatch: pytest.MonkeyPatch,
+    server: ResolveServer,
+) -> None:
+    """
+    Test that the `jobs` of batch requests are limited by `max_jobs`.
+    """
+
+    n_jobs_used: List[int] = []
+
+    def fake_resolve_identifiers(
+        identifiers: List[str],
+        config: Configuration,
+        n_jobs: int = 1,
+    ) -> List[str]:
+        n_jobs_used.append(n_jobs)
+        return [f"@misc{{{_}}}" for _ in identifiers]
+
+    monkeypatch.setattr(
+        "doi2bibtex.server.resolve_identifiers", fake_resolve_identifiers
+    )
+    server.max_jobs = 8
+
+    for jobs in (2, 1000, -5):
+        content = {"identifiers": ["a"], "jobs": jobs}
+        assert send(server, "/batch", content)[0] == 200
+    assert n_jobs_used == [2, 8, 1]
@@ -0,0 +1,120 @@
+"""
+Unit tests for singleflight.py.
+"""
+
+# -----------------------------------------------------------------------------
+# IMPORTS
+# -----------------------------------------------------------------------------
+
+from concurrent.futures import ThreadPoolExecutor
+
+import asyncio
+import threading
+
+import pytest
+
+from doi2bibtex.singleflight import AsyncSingleFlight, SingleFlight
+
+
+# -----------------------------------------------------------------------------
+# UNIT TESTS
+# -----------------------------------------------------------------------------
+
+def test__single_flight() -> None:
+    """
+    Test `SingleFlight`.
+    """
+
+    flights = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_function() -> str:
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return "result"
+
+    # Case 1: Concurrent calls for the same key share one call
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        leader = executor.submit(flights.do, "a", slow_function)
+        started.wait(timeout=5)
+        followers = [
+            executor.submit(flights.do, "a", slow_function) for _ in range(3)
+        ]
+        other = executor.submit(flights.do, "b", lambda: "other")
+        assert other.result() == "other"
+        release.set()
+        assert leader.result() == "result"
+        assert [_.result() for _ in followers] == 3 * ["result"]
+    assert len(calls) == 1
+    assert len(flights) == 0
+
+    # Case 2: Results are not cached once the call has finished
+    assert flights.do("a", slow_function) == "result"
+    assert len(calls) == 2
+
+    # Case 3: Exceptions are raised (and shared)
+    def failing_function() -> str:
+        raise RuntimeError("Some error")
+
+    with pytest.raises(RuntimeError) as runtime_error:
+        flights.do("a", failing_function)
+    assert "Some error" in str(runtime_error)
+    assert len(flights) == 0
+
+
+def test__async_single_flight() -> None:
+    """
+    Test `AsyncSingleFlight`.
+    """
+
+    flights = AsyncSingleFlight()
+    calls = []
+
+    async def slow_function() -> str:
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def failing_function() -> str:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("Some error")
+
+    # Case 1: Concurrent calls for the same key share one call
+    async def case_1() -> list:
+        return list(
+            await asyncio.gather(
+                *[flights.do("a", slow_function) for _ in range(4)],
+                flights.do("b", slow_function),
+            )
+        )
+
+    assert asyncio.run(case_1()) == 5 * ["result"]
+    assert len(calls) == 2
+    assert len(flights) == 0
+
+    # Case 2: Exceptions are shared
+    async def case_2() -> list:
+        return list(
+            await asyncio.gather(
+                *[flights.do("a", failing_function) for _ in range(2)],
+                return_exceptions=True,
+            )
+        )
+
+    errors = asyncio.run(case_2())
+    assert all(isinstance(_, RuntimeError) for _ in errors)
+
+    # Case 3: Cancelling the first caller does not cancel the others
+    async def case_3() -> str:
+        first = asyncio.ensure_future(flights.do("a", slow_function))
+        second = asyncio.ensure_future(flights.do("a", slow_function))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    calls.clear()
+    assert asyncio.run(case_3()) == "result"
+    assert len(calls) == 1
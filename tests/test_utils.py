@@ -42,6 +42,13 @@ def test__latex_to_unicode() -> None:
     assert latex_to_unicode(r"\t{oo}") == r"oo"
     assert latex_to_unicode(r"\c{c}") == r"ç"
 
+    # Text without any LaTeX is returned as is (without parsing it)
+    assert latex_to_unicode("Gravitational-wave detection?") == (
+        "Gravitational-wave detection?"
+    )
+    assert latex_to_unicode("pages 160--175") == "pages 160–175"
+    assert latex_to_unicode("Tom ~ Jerry") == "Tom \N{NO-BREAK SPACE} Jerry"
+
 
 def test__remove_accented_characters() -> None:
     """